@@ -0,0 +1 @@
+"""Offline performance benchmarks for the WCAG tools (see ``benchmarks.run``)."""
@@ -0,0 +1,180 @@
+"""Generated HTML fixture corpus for the benchmarks.
+
+Fixtures are built deterministically from a seed, so every run (and every
+machine) benchmarks byte-identical pages. Each *kind* stresses a different
+part of the pipeline: form controls for 3.3.x, media and timers for 2.2.x,
+mixed-language passages for 3.1.x and deeply nested markup for the streaming
+parser. Pages are generated on first request and kept in memory.
+"""
+
+import random
+import threading
+from typing import Callable, Dict, List, NamedTuple
+
+SIZES: Dict[str, int] = {
+    "10k": 10 * 1024,
+    "100k": 100 * 1024,
+    "1m": 1 << 20,
+    "10m": 10 << 20,
+    "50m": 50 << 20,
+}
+KINDS = ("mixed", "forms", "media", "multilingual", "deep")
+# Sizes generated for the specialised kinds; "mixed" covers every size.
+KIND_SIZES = ("10k", "100k", "1m")
+
+_SENTENCES: Dict[str, List[str]] = {
+    "en": [
+        "The committee reviewed the proposal and asked for a clearer timeline before the next meeting.",
+        "Residents can renew their parking permits online or at any branch of the city library.",
+        "Accessible design benefits everyone, not only people who rely on assistive technology.",
+        "Please keep your receipt, because refunds are only issued with proof of purchase.",
+        "Notwithstanding the aforementioned contractual obligations, indemnification remains applicable.",
+    ],
+    "fr": [
+        "Le conseil municipal a approuvé le nouveau plan de circulation pour le centre-ville.",
+        "Les inscriptions pour les activités de l'été commencent au début du mois de mai.",
+        "Veuillez conserver votre ticket jusqu'à la fin du trajet pour le présenter au contrôleur.",
+    ],
+    "de": [
+        "Die Bibliothek bleibt wegen Renovierungsarbeiten bis Ende des Monats geschlossen.",
+        "Bitte füllen Sie das Formular vollständig aus, bevor Sie es an uns zurückschicken.",
+        "Der Zug nach München fährt heute ausnahmsweise von einem anderen Bahnsteig ab.",
+    ],
+    "es": [
+        "El ayuntamiento ha ampliado el horario de las bibliotecas durante el periodo de exámenes.",
+        "Para solicitar una cita previa, llame al teléfono de atención al ciudadano.",
+        "Los resultados de la encuesta se publicarán en la página web la próxima semana.",
+    ],
+    "ru": [
+        "Городская библиотека будет закрыта на ремонт до конца месяца.",
+        "Пожалуйста, заполните анкету полностью перед отправкой документов.",
+        "Результаты опроса будут опубликованы на сайте на следующей неделе.",
+    ],
+    "ja": [
+        "図書館は改装工事のため今月末まで休館いたします。",
+        "申請書にすべての項目を記入してから提出してください。",
+        "アンケートの結果は来週ウェブサイトで公開される予定です。",
+    ],
+}
+
+
+class Fixture(NamedTuple):
+    name: str
+    kind: str
+    size: int  # target size in bytes; generated pages end within one section of it
+
+
+def corpus(sizes=tuple(SIZES), kinds=KINDS) -> List[Fixture]:
+    """Every fixture for the selected size labels and kinds."""
+    fixtures = []
+    for kind in kinds:
+        for label in sizes:
+            if kind == "mixed" or label in KIND_SIZES:
+                fixtures.append(Fixture(f"{kind}-{label}", kind, SIZES[label]))
+    return fixtures
+
+
+# ===================== Sections =====================
+
+def _paragraph(rng: random.Random, lang: str = "en") -> str:
+    text = " ".join(rng.choice(_SENTENCES[lang]) for _ in range(rng.randint(2, 5)))
+    return f"<p>{text}</p>\n"
+
+
+def _foreign_paragraph(rng: random.Random) -> str:
+    lang = rng.choice([code for code in _SENTENCES if code != "en"])
+    text = " ".join(rng.choice(_SENTENCES[lang]) for _ in range(3))
+    # One in four passages carries the wrong lang attribute, so 3.1.2 has something to find.
+    declared = "en" if rng.random() < 0.25 else lang
+    return f'<blockquote lang="{declared}"><p>{text}</p></blockquote>\n'
+
+
+def _form(rng: random.Random) -> str:
+    n = rng.randint(10**5, 10**6)
+    fields = [
+        f'<label for="name{n}">Full name</label><input id="name{n}" name="name" autocomplete="name">',
+        f'<input type="email" name="email{n}" aria-label="Email address" aria-describedby="help{n}">',
+        f'<span id="help{n}">We only use this to send your receipt.</span>',
+        '<input type="text" name="phone">',  # unlabelled, and repeated across forms (3.3.7)
+        f'<input type="password" name="password{n}" autocomplete="off" aria-invalid="false">',
+        f'<select name="country{n}"><option>France</option><option>Germany</option></select>',
+        f'<label><input type="checkbox" name="terms{n}"> I accept the terms</label>',
+        '<button type="submit">Submit</button>',
+    ]
+    rng.shuffle(fields)
+    onsubmit = ' onsubmit="return confirm(\'Send?\')"' if rng.random() < 0.5 else ""
+    return f'<form action="/submit"{onsubmit}>\n' + "\n".join(fields) + "\n</form>\n"
+
+
+def _media(rng: random.Random) -> str:
+    n = rng.randint(10**5, 10**6)
+    parts = [
+        f'<figure><img src="/img/{n}.png" alt="Chart of monthly visitors"><figcaption>Visitors</figcaption></figure>',
+        f'<video src="/media/{n}.mp4" {"autoplay muted" if rng.random() < 0.3 else "controls"}></video>',
+        f'<audio src="/media/{n}.mp3" controls></audio>',
+        f"<script>setTimeout(function () {{ rotate({n}); }}, 5000);</script>",
+    ]
+    if rng.random() < 0.1:
+        parts.append("<marquee>Breaking news</marquee>")
+    return "\n".join(parts) + "\n"
+
+
+def _deep(rng: random.Random) -> str:
+    depth = rng.randint(100, 300)
+    inner = _paragraph(rng)
+    return '<div class="wrap">' * depth + inner + "</div>" * depth + "\n"
+
+
+def _links(rng: random.Random) -> str:
+    items = "".join(f'<li><a href="/page/{rng.randint(1, 500)}">Section {i}</a></li>' for i in range(8))
+    return f"<ul>{items}</ul>\n"
+
+
+_MIX: Dict[str, List[Callable[[random.Random], str]]] = {
+    "mixed": [_paragraph, _paragraph, _paragraph, _form, _media, _foreign_paragraph, _links, _deep],
+    "forms": [_form, _form, _form, _paragraph],
+    "media": [_media, _media, _paragraph],
+    "multilingual": [_foreign_paragraph, _foreign_paragraph, _paragraph],
+    "deep": [_deep, _deep, _paragraph],
+}
+
+
+def generate(fixture: Fixture, seed: int = 0) -> bytes:
+    """Render *fixture* to UTF-8 bytes (deterministic for a given seed)."""
+    rng = random.Random(f"{fixture.name}:{seed}")
+    head = (
+        '<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="utf-8">'
+        f"<title>Benchmark fixture {fixture.name}</title>"
+        '<meta name="viewport" content="width=device-width, initial-scale=1"></head>\n<body>\n'
+        '<header><a href="#main">Skip to content</a><nav aria-label="Main">'
+        '<a href="/">Home</a> <a href="/help">Help</a> <a href="/contact">Contact</a></nav></header>\n'
+        '<main id="main">\n'
+    )
+    tail = "</main>\n<footer><p>© Benchmark Ltd</p><a href=\"/faq\">FAQ</a></footer>\n</body>\n</html>\n"
+    sections = _MIX[fixture.kind]
+    budget = fixture.size - len(head) - len(tail)
+    parts: List[str] = [head]
+    written = 0
+    while written < budget:
+        chunk = rng.choice(sections)(rng)
+        parts.append(chunk)
+        written += len(chunk.encode("utf-8"))
+    parts.append(tail)
+    return "".join(parts).encode("utf-8")
+
+
+class FixtureStore:
+    """Generates fixtures on first use and keeps them in memory."""
+
+    def __init__(self, fixtures: List[Fixture], seed: int = 0):
+        self.fixtures = {fixture.name: fixture for fixture in fixtures}
+        self.seed = seed
+        self._pages: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> bytes:
+        with self._lock:
+            page = self._pages.get(name)
+            if page is None:
+                page = self._pages[name] = generate(self.fixtures[name], self.seed)
+            return page
@@ -0,0 +1,365 @@
+"""Benchmark every tool in ``wcag_agents.tools`` against the local fixture corpus.
+
+For each fixture the harness measures:
+
+* ``snapshot``: download plus streaming parse of the page (cold, every repeat);
+* every public function of ``tools``: latency against the shared snapshot
+  (median and minimum over the repeats), peak traced allocations and RSS
+  growth while it runs;
+* ``throughput``: pages per second of ``bulk_audit.audit_site`` over many
+  distinct URLs of the same fixture.
+
+The result cache is disabled so every repeat does the real work. Tools that
+drive a Node CLI or a browser only run with ``--external`` (``npx`` may try to
+download packages, which is not offline); any tool that fails is reported with
+its error and left out of baseline comparisons.
+
+Usage::
+
+    python -m benchmarks.run                                  # 10k/100k/1m fixtures
+    python -m benchmarks.run --sizes all --save-baseline ci   # record baselines/ci.json
+    python -m benchmarks.run --compare ci                     # exit 1 on regressions
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .fixtures import KINDS, SIZES, Fixture, FixtureStore, corpus
+from .server import serve
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+DEFAULT_SIZES = ("10k", "100k", "1m")
+DEFAULT_REPEATS = 5
+THROUGHPUT_PAGES = 50
+THROUGHPUT_MAX_SIZE = 1 << 20
+# Tools that need Node.js packages or a Chromium build rather than only Python.
+EXTERNAL_TOOLS = frozenset(
+    (
+        "run_pa11y",
+        "run_axe_devtools",
+        "run_lighthouse_accessibility",
+        "get_accessibility_tree",
+        "query_accessibility_tree",
+        "test_keyboard_accessibility",
+        "test_focus_not_obscured",
+        "test_seizure_prevention",
+        "test_focus_appearance",
+        "test_input_modalities",
+        "test_target_size_minimum",
+    )
+)
+
+# Allowed relative change per metric before a comparison fails, and the
+# direction in which the metric gets worse.
+TOLERANCES = {
+    "latency_ms": 0.25,
+    "peak_alloc_kb": 0.20,
+    "rss_growth_mb": 0.50,
+    "pages_per_sec": 0.20,
+}
+HIGHER_IS_BETTER = {"pages_per_sec"}
+# Differences below these absolute amounts are noise, whatever the ratio.
+NOISE_FLOOR = {"latency_ms": 1.0, "peak_alloc_kb": 64.0, "rss_growth_mb": 4.0, "pages_per_sec": 1.0}
+
+
+def _import_tools():
+    # Benchmarks run from a checkout; make ``src`` importable without an install.
+    os.environ.setdefault("WCAG_CACHE", "0")
+    src = str(ROOT / "src")
+    if src not in sys.path:
+        sys.path.insert(0, src)
+    from wcag_agents import tools
+
+    return tools
+
+
+def discover_tools(tools_module) -> Dict[str, Callable[[str], Any]]:
+    """Every public ``(url, ...)`` function defined in ``tools``."""
+    found = {}
+    for name, obj in vars(tools_module).items():
+        if name.startswith("_") or not inspect.isfunction(obj) or obj.__module__ != tools_module.__name__:
+            continue
+        params = list(inspect.signature(obj).parameters)
+        if params and params[0] == "url":
+            found[name] = obj
+    return dict(sorted(found.items()))
+
+# ===================== Measurement =====================
+
+def _rss_bytes() -> int:
+    try:
+        import psutil  # type: ignore
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        import resource
+
+        # ru_maxrss is the lifetime peak (KiB on Linux); good enough as a fallback.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _RssSampler:
+    """Samples process RSS in a background thread and keeps the peak."""
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.start_rss = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "_RssSampler":
+        self.start_rss = self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+    @property
+    def growth_mb(self) -> float:
+        return (self.peak - self.start_rss) / (1 << 20)
+
+
+def _status(result: Any) -> str:
+    if isinstance(result, dict):
+        if "error" in result:
+            return "ERROR"
+        nested = result.get("result")
+        if isinstance(nested, dict) and "error" in nested:
+            return "ERROR"
+        return str(result.get("status", "OK"))
+    return "OK"
+
+
+def _error_text(result: Any) -> str:
+    if isinstance(result, dict):
+        nested = result.get("result")
+        error = result.get("error") or (nested.get("error") if isinstance(nested, dict) else None)
+        if error:
+            return str(error).splitlines()[0][:200]
+    return ""
+
+
+def measure(fn: Callable[[], Any], repeats: int) -> Dict[str, Any]:
+    """Latency, allocation and RSS figures for *fn*; one traced run plus *repeats* timed ones."""
+    # Warm-up: one-off costs (model loading, imports) are not what a regression looks like.
+    fn()
+    with _RssSampler() as rss:
+        tracemalloc.start()
+        try:
+            result = fn()
+            _, peak_alloc = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        status = _status(result)
+        timings: List[float] = []
+        # A tool that fails (missing CLI or browser) is not worth repeating.
+        for _ in range(repeats if status != "ERROR" else 0):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+    record: Dict[str, Any] = {"status": status}
+    if status == "ERROR":
+        record["error"] = _error_text(result)
+        return record
+    record.update(
+        latency_ms=round(statistics.median(timings), 3),
+        latency_min_ms=round(min(timings), 3),
+        peak_alloc_kb=round(peak_alloc / 1024, 1),
+        rss_growth_mb=round(rss.growth_mb, 2),
+    )
+    return record
+
+
+def _throughput(url: str, pages: int, concurrency: int) -> Dict[str, Any]:
+    from wcag_agents.bulk_audit import audit_site
+    from wcag_agents.http_pool import close_session
+
+    urls = [f"{url}?copy={i}" for i in range(pages)]
+
+    async def run() -> float:
+        try:
+            start = time.perf_counter()
+            await audit_site(urls, concurrency=concurrency)
+            return time.perf_counter() - start
+        finally:
+            await close_session()
+
+    elapsed = asyncio.run(run())
+    return {"status": "OK", "pages": pages, "pages_per_sec": round(pages / elapsed, 2)}
+
+
+def run_fixture(
+    base_url: str, fixture: Fixture, checks: Dict[str, Callable], repeats: int, pages: int, concurrency: int
+) -> Dict[str, Dict[str, Any]]:
+    from wcag_agents.snapshot import clear_snapshots, get_snapshot
+
+    url = f"{base_url}/{fixture.name}.html"
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def cold_snapshot():
+        clear_snapshots()
+        snap = get_snapshot(url)
+        snap.index  # noqa: B018 - force the parse when it was not streamed
+        return {"status": "TRUNCATED" if snap.truncated else "OK"}
+
+    results["snapshot"] = measure(cold_snapshot, repeats)
+    for name, check in checks.items():
+        get_snapshot(url)  # warm: checks measure their own work, not the download
+        results[name] = measure(lambda check=check: check(url), repeats)
+    if pages and fixture.size <= THROUGHPUT_MAX_SIZE:
+        clear_snapshots()
+        results["throughput"] = _throughput(url, pages, concurrency)
+    clear_snapshots()
+    return results
+
+# ===================== Baselines =====================
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def save_baseline(name: str, report: Dict[str, Any]) -> Path:
+    BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return path
+
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any], tolerance: Optional[float] = None) -> List[str]:
+    """Every metric of *report* that is worse than *baseline* beyond its tolerance."""
+    regressions = []
+    for fixture, checks in report["results"].items():
+        for check, record in checks.items():
+            before = baseline["results"].get(fixture, {}).get(check)
+            if not before or "ERROR" in (before.get("status"), record.get("status")):
+                continue
+            for metric, allowed in TOLERANCES.items():
+                if metric not in record or metric not in before:
+                    continue
+                old, new = float(before[metric]), float(record[metric])
+                change = (old - new) if metric in HIGHER_IS_BETTER else (new - old)
+                limit = old * (tolerance if tolerance is not None else allowed)
+                if change > max(limit, NOISE_FLOOR[metric]):
+                    regressions.append(f"{fixture} {check} {metric}: {old:g} -> {new:g}")
+    return regressions
+
+# ===================== Command line =====================
+
+def _print_table(report: Dict[str, Any]) -> None:
+    header = f"{'fixture':<18} {'check':<34} {'status':<13} {'median ms':>10} {'alloc KiB':>11} {'RSS +MiB':>9} {'pages/s':>8}"
+    print(header)
+    print("-" * len(header))
+    for fixture, checks in report["results"].items():
+        for check, record in checks.items():
+            def cell(key: str, width: int) -> str:
+                value = record.get(key)
+                return f"{value:>{width}}" if value is not None else " " * (width - 1) + "-"
+
+            print(
+                f"{fixture:<18} {check:<34} {record['status']:<13} {cell('latency_ms', 10)} "
+                f"{cell('peak_alloc_kb', 11)} {cell('rss_growth_mb', 9)} {cell('pages_per_sec', 8)}"
+            )
+
+
+def _split(value: Optional[str], allowed, default) -> Tuple[str, ...]:
+    if not value:
+        return tuple(default)
+    if value == "all":
+        return tuple(allowed)
+    items = tuple(item.strip() for item in value.split(",") if item.strip())
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise SystemExit(f"Unknown value(s): {', '.join(unknown)} (expected: {', '.join(allowed)})")
+    return items
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the WCAG tools against a local fixture corpus.")
+    parser.add_argument("--sizes", help=f"comma-separated size labels or 'all' (default: {','.join(DEFAULT_SIZES)})")
+    parser.add_argument("--kinds", help="comma-separated fixture kinds or 'all' (default: all)")
+    parser.add_argument("--checks", help="comma-separated tool names (default: every Python-only tool)")
+    parser.add_argument("--external", action="store_true", help="include tools that need Node.js or a browser")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--pages", type=int, default=THROUGHPUT_PAGES, help="pages per throughput run (0 to skip)")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrency of the throughput run")
+    parser.add_argument("--json", help="also write the full report to this file")
+    parser.add_argument("--save-baseline", metavar="NAME", help="store the report as baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against baselines/NAME.json and fail on regressions")
+    parser.add_argument("--tolerance", type=float, help="override every per-metric tolerance (e.g. 0.1 for 10%%)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    tools_module = _import_tools()
+    available = discover_tools(tools_module)
+    default = tuple(name for name in available if args.external or name not in EXTERNAL_TOOLS)
+    names = _split(args.checks, tuple(available), default)
+    checks = {name: available[name] for name in names}
+    fixtures = corpus(_split(args.sizes, tuple(SIZES), DEFAULT_SIZES), _split(args.kinds, KINDS, KINDS))
+
+    baseline = None
+    if args.compare:
+        path = BASELINE_DIR / f"{args.compare}.json"
+        if not path.exists():
+            raise SystemExit(f"No baseline at {path}; record one with --save-baseline {args.compare}")
+        baseline = json.loads(path.read_text(encoding="utf-8"))
+
+    store = FixtureStore(fixtures)
+    report: Dict[str, Any] = {"meta": _metadata(), "results": {}}
+    with serve(store) as base_url:
+        for fixture in fixtures:
+            page = store.get(fixture.name)
+            print(f"# {fixture.name} ({len(page) / 1024:.0f} KiB)", file=sys.stderr)
+            report["results"][fixture.name] = run_fixture(
+                base_url, fixture, checks, args.repeats, args.pages, args.concurrency
+            )
+            report["results"][fixture.name]["snapshot"]["bytes"] = len(page)
+
+    _print_table(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.save_baseline:
+        print(f"Baseline written to {save_baseline(args.save_baseline, report)}", file=sys.stderr)
+    if baseline is not None:
+        if baseline["meta"].get("machine") != report["meta"]["machine"] or baseline["meta"].get("cpus") != report["meta"]["cpus"]:
+            print("Warning: baseline was recorded on different hardware; comparisons may be noisy.", file=sys.stderr)
+        regressions = compare(baseline, report, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against baseline '{args.compare}':", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"No regressions against baseline '{args.compare}'.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Local HTTP server for the fixture corpus.
+
+Serves ``/<fixture name>.html`` from a ``FixtureStore`` on 127.0.0.1, so the
+benchmarks exercise the real download and streaming-parse path without any
+internet access. Query strings are ignored, which lets a run request the same
+page under many distinct URLs (``?copy=N``) to defeat snapshot sharing.
+"""
+
+import contextlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+from urllib.parse import urlparse
+
+from .fixtures import FixtureStore
+
+
+def _handler(store: FixtureStore):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            name = urlparse(self.path).path.strip("/")
+            if name.endswith(".html"):
+                name = name[: -len(".html")]
+            if name not in store.fixtures:
+                self.send_error(404)
+                return
+            body = store.get(name)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            # The client may stop reading once it hits its byte cap.
+            with contextlib.suppress(BrokenPipeError, ConnectionResetError):
+                self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return FixtureHandler
+
+
+@contextlib.contextmanager
+def serve(store: FixtureStore, port: int = 0) -> Iterator[str]:
+    """Serve *store* in a background thread; yields the base URL (``http://127.0.0.1:<port>``)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(store))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="benchmark-fixtures", daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -66,13 +66,14 @@ setup(
     },
     entry_points={
         "console_scripts": [
-            "agents-km-accessibility=accessibility.cli:main",
-            "wcag-validator=accessibility.utils.wcag_validator:main",
-            "accessibility-test=accessibility.testing:main",
+            "agents-km-accessibility=wcag_agents.cli:main",
+            "wcag-validator=wcag_agents.cli:main",
+            "wcag-bulk-audit=wcag_agents.bulk_audit:main",
         ],
     },
     include_package_data=True,
     package_data={
+        "wcag_agents": ["*.js"],
         "accessibility": [
             "config/*.yaml",
             "config/*.json",
@@ -1,3 +1,14 @@
-from .root_agent import root_agent
+# ``root_agent`` is built on first access: importing it pulls in ADK and every
+# LlmAgent, which the CLI and the bulk audit never need.
 
 __all__ = ["root_agent"]
+
+
+def __getattr__(name):
+    if name == "root_agent":
+        from .root_agent import root_agent
+
+        # The import bound the submodule under this name; expose the agent instead.
+        globals()["root_agent"] = root_agent
+        return root_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,7 +5,8 @@ Entry point for the WCAG multi-agent system built with Google ADK.
 from google.adk.agents import LlmAgent
 from .wcag_agents.operable_coordinator import operable_coordinator
 from .wcag_agents.understandable_coordinator import understandable_coordinator
-from .wcag_agents.tools import test_website_accessibility
+from .wcag_agents.full_audit import run_full_audit
+from .wcag_agents.metrics import agent_callbacks
 
 root_agent = LlmAgent(
     model="gemini-1.5-flash",
@@ -16,9 +17,10 @@ root_agent = LlmAgent(
 Routing rules:
 • WCAG 2.x questions → transfer_to_agent(agent_name='OperableCoordinator')
 • WCAG 3.x questions → transfer_to_agent(agent_name='UnderstandableCoordinator')
-• If the user provides a URL with no specific principle, first run `test_website_accessibility`, then route to both coordinators sequentially and aggregate the results.
+• If the user provides a URL with no specific principle, call `run_full_audit` once and summarise its merged result directly. It already runs every Operable and Understandable specialist check concurrently, so do NOT transfer to the coordinators for a full audit.
 • Handle high-level WCAG questions directly when simple enough.
 """,
-    tools=[test_website_accessibility],
+    tools=[run_full_audit],
     sub_agents=[operable_coordinator, understandable_coordinator],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""Async variants of the network-facing WCAG tools.
+
+These are the tools registered on the ``LlmAgent``s. Pages are downloaded
+through the shared connection pool in ``http_pool`` and the CPU-bound check
+logic from ``tools`` then runs in a worker thread against the cached snapshot,
+so no tool blocks the ADK event loop while it waits on the network, a
+subprocess or a browser.
+"""
+
+import asyncio
+import shutil
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import flash, focus_appearance, geometry, node_worker, tabwalk, tools
+from .ax_tree import CompactAXTree, lookup_tree, remember_tree
+from .browser_pool import PLAYWRIGHT_MISSING, get_browser_pool, playwright_available
+from .cache import cached_check
+from .http_pool import get_snapshot_async
+from .metrics import cli_label, get_metrics, instrumented, timed
+
+
+async def _run_static_check(check: Callable[[str], Dict[str, Any]], url: str) -> Dict[str, Any]:
+    url = tools._normalize_url(url)
+    try:
+        await get_snapshot_async(url)
+    except Exception:
+        # The sync check retries the fetch and reports the failure in its own format.
+        pass
+    return await asyncio.to_thread(check, url)
+
+
+async def _run_cli_async(cmd: list[str]) -> dict:
+    """Async counterpart of ``tools._run_cli``."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError:
+        return {"error": f"{cmd[0]} binary not found. Please ensure it is installed in the system PATH."}
+    except Exception as exc:
+        return {"error": str(exc)}
+    try:
+        with timed(get_metrics().cli.labels(cli_label(cmd)), "cli", command=" ".join(cmd[:2])):
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=tools.CLI_TIMEOUT)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return {"error": f"Command '{' '.join(cmd)}' timed out after {tools.CLI_TIMEOUT} seconds"}
+    return tools._cli_result(
+        proc.returncode, stdout.decode("utf-8", errors="replace"), stderr.decode("utf-8", errors="replace")
+    )
+
+# ===================== Static HTML checks =====================
+
+async def test_timing_controls(url: str) -> Dict[str, Any]:
+    """WCAG 2.2.1–2.2.6 – Detect meta refresh, JS timers, autoplaying media and marquees."""
+    return await _run_static_check(tools.test_timing_controls, url)
+
+
+async def test_readability(url: str) -> Dict[str, Any]:
+    """WCAG 3.1.1–3.1.6 – Check page language, language of parts, difficult words, abbreviations, reading level and pronunciation aids."""
+    return await _run_static_check(tools.test_readability, url)
+
+
+async def test_predictability(url: str) -> Dict[str, Any]:
+    """WCAG 3.2.1–3.2.6 – Detect context changes on focus/input, navigation landmarks, consistent labelling and help links."""
+    return await _run_static_check(tools.test_predictability, url)
+
+
+async def test_input_assistance(url: str) -> Dict[str, Any]:
+    """WCAG 3.3.1–3.3.9 – Check form labels, error identification, confirmation prompts, help text, autocomplete and authentication."""
+    return await _run_static_check(tools.test_input_assistance, url)
+
+# ===================== Browser-recorded checks =====================
+
+@instrumented
+async def test_seizure_prevention(url: str) -> Dict[str, Any]:
+    """WCAG 2.3.1–2.3.3 – Record the rendered page and measure general and red flashes per second."""
+    url = tools._normalize_url(url)
+    if not playwright_available():
+        return tools._seizure_result(url, error=PLAYWRIGHT_MISSING)
+    try:
+        recording = await get_browser_pool().run_async(flash.record, url)
+    except Exception as exc:
+        return tools._seizure_result(url, error=tools._first_line(exc))
+    # Decoding and the frame-stack analysis are CPU-bound; keep them off the event loop.
+    return await asyncio.to_thread(tools._seizure_result, url, recording)
+
+
+async def _try_tab_walk(url: str) -> Tuple[Optional[tabwalk.TabWalk], str]:
+    """Async counterpart of ``tools._try_tab_walk``, sharing its recorded and in-progress walks."""
+    if not playwright_available():
+        return None, PLAYWRIGHT_MISSING
+    try:
+        recorded = tabwalk.lookup_walk(url)
+        if recorded is None:
+            recorded = tabwalk.remember_walk(
+                url,
+                await get_browser_pool().run_async(
+                    tabwalk.walk, url, timeout=tabwalk.TAB_BUDGET + 60, key=("tabwalk", url)
+                ),
+            )
+        return recorded, ""
+    except Exception as exc:
+        return None, tools._first_line(exc)
+
+
+@instrumented
+async def test_keyboard_accessibility(url: str) -> Dict[str, Any]:
+    """WCAG 2.1.1–2.1.4 – Tab and Shift+Tab through the rendered page, recording the focus order and
+    detecting keyboard traps (focus loops that Escape cannot leave). Requires Playwright with Chromium;
+    without it the check reports NEEDS_TESTING.
+    """
+    url = tools._normalize_url(url)
+    return tools._keyboard_result(url, *await _try_tab_walk(url))
+
+
+@instrumented
+async def test_focus_not_obscured(url: str) -> Dict[str, Any]:
+    """WCAG 2.4.11-12 – Tab through the rendered page and check every focused element against the fixed
+    and sticky overlays (headers, cookie banners, chat widgets) on screen at that moment. Requires
+    Playwright with Chromium; without it the check reports NEEDS_REVIEW.
+    """
+    url = tools._normalize_url(url)
+    return tools._focus_not_obscured_result(url, *await _try_tab_walk(url))
+
+
+@instrumented
+async def test_focus_appearance(url: str) -> Dict[str, Any]:
+    """WCAG 2.4.7 / 2.4.13 – Screenshot every focusable element unfocused and focused in one page session
+    and measure the changed area and its contrast. Requires Playwright with Chromium; without it the check
+    reports NEEDS_REVIEW.
+    """
+    url = tools._normalize_url(url)
+    if not playwright_available():
+        return tools._focus_appearance_result(url, error=PLAYWRIGHT_MISSING)
+    try:
+        captured = await get_browser_pool().run_async(
+            focus_appearance.capture, url, timeout=focus_appearance.FOCUS_BUDGET + 60
+        )
+    except Exception as exc:
+        return tools._focus_appearance_result(url, error=tools._first_line(exc))
+    # Image decoding and comparison are CPU-bound; keep them off the event loop.
+    report = await asyncio.to_thread(focus_appearance.analyze, captured)
+    return tools._focus_appearance_result(url, report)
+
+
+async def _target_report(url: str) -> geometry.TargetReport:
+    """Async counterpart of ``tools._target_report``, sharing its recent and in-progress measurements."""
+    report = geometry.lookup_targets(url)
+    if report is None:
+        report = geometry.remember_targets(
+            url, await get_browser_pool().run_async(geometry.measure_targets, url, key=("targets", url))
+        )
+    return report
+
+
+@instrumented
+async def test_input_modalities(url: str) -> Dict[str, Any]:
+    """WCAG 2.5.1–2.5.6 – Pointer gestures, cancellation, label in name, motion actuation and 44 × 44 CSS px targets."""
+    url = tools._normalize_url(url)
+    report = None
+    if playwright_available():
+        try:
+            report = await _target_report(url)
+        except Exception:
+            pass  # fall back to the manual-verification note
+    return tools._input_modalities_result(url, report)
+
+
+@instrumented
+async def test_target_size_minimum(url: str) -> Dict[str, Any]:
+    """WCAG 2.5.8 – Measure every rendered target against 24 × 24 CSS px, with the spacing and inline exceptions.
+    Requires Playwright with Chromium; without it the check reports NEEDS_TESTING.
+    """
+    url = tools._normalize_url(url)
+    if not playwright_available():
+        return tools._target_size_result(url, error=PLAYWRIGHT_MISSING)
+    try:
+        report = await _target_report(url)
+    except Exception as exc:
+        return tools._target_size_result(url, error=tools._first_line(exc))
+    return tools._target_size_result(url, report)
+
+# ===================== External CLI Integrations =====================
+
+@instrumented
+@cached_check(version=1)
+async def run_pa11y(url: str) -> dict:
+    """Run Pa11y accessibility scan via the warm Node worker, falling back to npx (requires Node & pa11y)."""
+    url = tools._normalize_url(url)
+    result = await node_worker.run_engine_async("pa11y", url)
+    if result is None:
+        if not shutil.which("npx"):
+            return {"error": "npx command not found – Node.js is required for Pa11y."}
+        result = await _run_cli_async(tools._pa11y_cmd(url))
+    return {"tool": "pa11y", "url": url, "result": result}
+
+
+@instrumented
+@cached_check(version=1)
+async def run_axe_devtools(url: str) -> dict:
+    """Run axe DevTools CLI scan (requires Node & axe DevTools installed)."""
+    url = tools._normalize_url(url)
+    result = await node_worker.run_engine_async("axe", url)
+    if result is None:
+        if not shutil.which("npx"):
+            return {"error": "npx command not found – Node.js is required for axe DevTools."}
+        result = await _run_cli_async(tools._axe_cmd(url))
+    return {"tool": "axe-devtools", "url": url, "result": result}
+
+
+@instrumented
+@cached_check(version=1)
+async def run_lighthouse_accessibility(url: str) -> dict:
+    """Run Lighthouse accessibility audit via npx Lighthouse CLI (Chrome DevTools)."""
+    url = tools._normalize_url(url)
+    result = await node_worker.run_engine_async("lighthouse", url)
+    if result is None:
+        if not shutil.which("npx"):
+            return {"error": "npx command not found – Node.js is required for Lighthouse."}
+        result = await _run_cli_async(tools._lighthouse_cmd(url))
+    return {"tool": "lighthouse", "url": url, "result": result}
+
+# ===================== Chrome DevTools Integrations =====================
+
+async def _accessibility_tree(url: str) -> CompactAXTree:
+    tree = lookup_tree(url)
+    if tree is None:
+        tree = remember_tree(url, await get_browser_pool().run_async(tools._capture_accessibility_tree, url))
+    return tree
+
+
+@instrumented
+async def get_accessibility_tree(url: str) -> dict:
+    """Capture the page's accessibility tree using the Chrome DevTools protocol via Playwright.
+    Returns a pruned summary (role counts, landmarks, heading outline, unnamed controls, focus order);
+    call `query_accessibility_tree` to drill into a node or list. Requires the `playwright` Python
+    package and Chromium browser. If unavailable, returns an error message.
+    """
+    url = tools._normalize_url(url)
+    if not playwright_available():
+        return {"error": PLAYWRIGHT_MISSING}
+
+    try:
+        tree = await _accessibility_tree(url)
+        return {"tool": "chromedevtools-accessibility-tree", "url": url, "summary": tree.summary()}
+    except Exception as exc:
+        return {"error": str(exc) or type(exc).__name__}
+
+
+@instrumented
+async def query_accessibility_tree(
+    url: str, query: str = "subtree", node: int = 0, depth: int = 2, role: str = "", name: str = ""
+) -> dict:
+    """Drill into the accessibility tree captured by `get_accessibility_tree` (reused for a few minutes).
+    query: "subtree" (node id + depth), "find" (role and/or name substring), "landmarks", "headings",
+    "unnamed_controls", "focus_order" or "summary". Lists hold the first 25 matches plus their total
+    "count"; narrow "find" by role or name to see others.
+    """
+    url = tools._normalize_url(url)
+    if not playwright_available():
+        return {"error": PLAYWRIGHT_MISSING}
+
+    try:
+        tree = await _accessibility_tree(url)
+        result = tree.query(query, node=node, depth=depth, role=role, name=name)
+        return {"tool": "chromedevtools-accessibility-tree", "url": url, "query": query, "result": result}
+    except Exception as exc:
+        return {"error": str(exc) or type(exc).__name__}
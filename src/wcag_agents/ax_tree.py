@@ -0,0 +1,319 @@
+"""Compact accessibility tree for LLM consumption.
+
+Playwright's ``accessibility.snapshot()`` is a nested dict per node, which runs
+to megabytes of JSON on real pages. ``CompactAXTree`` stores the same tree as
+parallel arrays in document order (role and name interned, parent indices,
+heading levels and state flags), answers the questions the agents ask
+(landmarks, heading outline, unnamed controls, focus order) directly, and
+renders a pruned summary by default with subtrees available on demand.
+Every answer is bounded: lists keep their first ``SUMMARY_LIMIT`` entries
+with the total count, and subtrees stop at ``SUBTREE_MAX_DEPTH`` levels and
+``SUBTREE_LIMIT`` nodes, so no single query can return the whole tree.
+
+Recently captured trees are kept per URL for a few minutes so drill-down
+queries do not render the page again.
+"""
+
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+LANDMARK_ROLES = frozenset(("banner", "complementary", "contentinfo", "form", "main", "navigation", "region", "search"))
+CONTROL_ROLES = frozenset(
+    (
+        "button", "checkbox", "combobox", "link", "listbox", "menuitem", "menuitemcheckbox", "menuitemradio",
+        "option", "radio", "searchbox", "slider", "spinbutton", "switch", "tab", "textbox", "treeitem",
+    )
+)
+# Nodes that only carry structure; subtrees are rendered through them.
+_TRANSPARENT_ROLES = frozenset(("generic", "none", "presentation"))
+_TEXT_ROLES = frozenset(("text", "StaticText", "LineBreak"))
+
+# State flags (bit per Playwright snapshot property).
+DISABLED, FOCUSED, EXPANDED, REQUIRED, INVALID, CHECKED, SELECTED, HASPOPUP = (1 << i for i in range(8))
+_FLAG_NAMES = (
+    ("disabled", DISABLED), ("focused", FOCUSED), ("expanded", EXPANDED), ("required", REQUIRED),
+    ("invalid", INVALID), ("checked", CHECKED), ("selected", SELECTED), ("haspopup", HASPOPUP),
+)
+
+NAME_PREVIEW = 80
+SUMMARY_LIMIT = 25
+SUBTREE_MAX_DEPTH = 6
+SUBTREE_LIMIT = 200
+
+TREE_TTL = 300
+TREE_LIMIT = 16
+
+
+def _flags(node: Dict[str, Any]) -> int:
+    flags = 0
+    for key, bit in _FLAG_NAMES:
+        value = node.get(key)
+        if value and value != "false":  # "mixed" checkboxes count as checked
+            flags |= bit
+    return flags
+
+
+def _preview(name: str) -> str:
+    return name if len(name) <= NAME_PREVIEW else name[: NAME_PREVIEW - 1] + "…"
+
+
+class CompactAXTree:
+    """Array-backed accessibility tree; node 0 is the root."""
+
+    __slots__ = ("roles", "names", "role", "name", "parent", "level", "flags", "_role_ids", "_name_ids", "_children")
+
+    def __init__(self):
+        self.roles: List[str] = []
+        self.names: List[str] = [""]
+        self.role = array("H")
+        self.name = array("I")
+        self.parent = array("i")
+        self.level = array("B")
+        self.flags = array("B")
+        self._role_ids: Dict[str, int] = {}
+        self._name_ids: Dict[str, int] = {"": 0}
+        self._children: Optional[List[List[int]]] = None
+
+    # ---- Construction ----
+
+    def _intern(self, table: List[str], ids: Dict[str, int], value: str) -> int:
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(table)
+            table.append(value)
+        return index
+
+    def add(self, role: str, name: str, parent: int, level: int = 0, flags: int = 0) -> int:
+        self.role.append(self._intern(self.roles, self._role_ids, role))
+        self.name.append(self._intern(self.names, self._name_ids, name))
+        self.parent.append(parent)
+        self.level.append(min(level, 255))
+        self.flags.append(flags)
+        self._children = None
+        return len(self.role) - 1
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Optional[Dict[str, Any]]) -> "CompactAXTree":
+        """Build from Playwright's nested ``accessibility.snapshot()`` with one iterative walk."""
+        tree = cls()
+        if not snapshot:
+            return tree
+        stack: List[Tuple[Dict[str, Any], int]] = [(snapshot, -1)]
+        while stack:
+            node, parent = stack.pop()
+            index = tree.add(
+                str(node.get("role", "")),
+                str(node.get("name", "") or ""),
+                parent,
+                int(node.get("level") or 0),
+                _flags(node),
+            )
+            # Reversed so children are numbered in document order.
+            for child in reversed(node.get("children") or ()):
+                stack.append((child, index))
+        return tree
+
+    def __len__(self) -> int:
+        return len(self.role)
+
+    # ---- Node access ----
+
+    def role_of(self, index: int) -> str:
+        return self.roles[self.role[index]]
+
+    def name_of(self, index: int) -> str:
+        return self.names[self.name[index]]
+
+    def children(self, index: int) -> List[int]:
+        if self._children is None:
+            children: List[List[int]] = [[] for _ in range(len(self))]
+            for child, parent in enumerate(self.parent):
+                if parent >= 0:
+                    children[parent].append(child)
+            self._children = children
+        return self._children[index]
+
+    def node(self, index: int) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"id": index, "role": self.role_of(index)}
+        name = self.name_of(index)
+        if name:
+            record["name"] = _preview(name)
+        if self.level[index]:
+            record["level"] = self.level[index]
+        states = [key for key, bit in _FLAG_NAMES if self.flags[index] & bit]
+        if states:
+            record["states"] = states
+        return record
+
+    def _indices(self, roles: frozenset) -> Iterator[int]:
+        wanted = {self._role_ids[r] for r in roles if r in self._role_ids}
+        return (i for i, role in enumerate(self.role) if role in wanted)
+
+    def _listing(self, indices: Iterable[int], limit: int) -> Dict[str, Any]:
+        """The total count of *indices* and the nodes of the first *limit* of them."""
+        items: List[Dict[str, Any]] = []
+        count = 0
+        for i in indices:
+            count += 1
+            if len(items) < limit:
+                items.append(self.node(i))
+        listing: Dict[str, Any] = {"count": count, "items": items}
+        if count > limit:
+            listing["truncated"] = True
+        return listing
+
+    # ---- Queries ----
+
+    def landmarks(self, limit: int = SUMMARY_LIMIT) -> Dict[str, Any]:
+        # A region is only a landmark when it has an accessible name.
+        return self._listing(
+            (i for i in self._indices(LANDMARK_ROLES) if self.role_of(i) != "region" or self.name[i]), limit
+        )
+
+    def headings(self, limit: int = SUMMARY_LIMIT) -> Dict[str, Any]:
+        """Heading outline in document order."""
+        return self._listing(self._indices(frozenset(("heading",))), limit)
+
+    def unnamed_controls(self, limit: int = SUMMARY_LIMIT) -> Dict[str, Any]:
+        return self._listing((i for i in self._indices(CONTROL_ROLES) if not self.name[i]), limit)
+
+    def focus_order(self, limit: int = SUMMARY_LIMIT) -> Dict[str, Any]:
+        """Enabled interactive controls in document order (tabindex reordering is not visible here)."""
+        return self._listing((i for i in self._indices(CONTROL_ROLES) if not self.flags[i] & DISABLED), limit)
+
+    def find(self, role: str = "", name: str = "", limit: int = SUMMARY_LIMIT) -> Dict[str, Any]:
+        """Nodes matching a role and/or a case-insensitive substring of the name (at least one is required)."""
+        if not role and not name:
+            raise ValueError("find needs a role or a name to match")
+        needle = name.lower()
+        return self._listing(
+            (
+                i
+                for i in range(len(self))
+                if (not role or self.role_of(i) == role) and (not needle or needle in self.name_of(i).lower())
+            ),
+            limit,
+        )
+
+    def _visible_children(self, index: int) -> List[int]:
+        """Children of *index*, with unnamed structural nodes replaced by their own children."""
+        visible: List[int] = []
+        stack = list(reversed(self.children(index)))
+        while stack:
+            child = stack.pop()
+            if self.role_of(child) in _TRANSPARENT_ROLES and not self.name[child]:
+                stack.extend(reversed(self.children(child)))
+            else:
+                visible.append(child)
+        return visible
+
+    def subtree(self, index: int = 0, depth: int = 2, limit: int = SUBTREE_LIMIT) -> Dict[str, Any]:
+        """Nested view of one node, *depth* levels deep, with unnamed structural nodes flattened.
+
+        *depth* is capped at ``SUBTREE_MAX_DEPTH`` and at most *limit* nodes
+        are rendered; nodes whose children are left out report their number
+        as ``more``.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"node {index} does not exist (tree has {len(self)} nodes)")
+        budget = [limit - 1]
+
+        def render(i: int, remaining: int) -> Dict[str, Any]:
+            record = self.node(i)
+            kids = self._visible_children(i)
+            shown = kids[: max(budget[0], 0)] if remaining > 0 else []
+            budget[0] -= len(shown)
+            if shown:
+                record["children"] = [render(k, remaining - 1) for k in shown]
+            if len(kids) > len(shown):
+                record["more"] = len(kids) - len(shown)
+            return record
+
+        return render(index, min(depth, SUBTREE_MAX_DEPTH))
+
+    def summary(self, limit: int = SUMMARY_LIMIT) -> Dict[str, Any]:
+        """Pruned overview for the agent: counts plus the first *limit* entries of each query."""
+        role_counts = Counter(self.role_of(i) for i in range(len(self)))
+        for role in _TEXT_ROLES | _TRANSPARENT_ROLES:
+            role_counts.pop(role, None)
+        return {
+            "nodes": len(self),
+            "role_counts": dict(role_counts.most_common(limit)),
+            "landmarks": self.landmarks(limit),
+            "headings": self.headings(limit),
+            "unnamed_controls": self.unnamed_controls(limit),
+            "focus_order": self.focus_order(limit),
+        }
+
+    def query(self, query: str = "summary", node: int = 0, depth: int = 2, role: str = "", name: str = "") -> Any:
+        """Dispatch a drill-down query by name (used by the agent-facing tools)."""
+        handlers = {
+            "summary": lambda: self.summary(),
+            "landmarks": self.landmarks,
+            "headings": self.headings,
+            "unnamed_controls": self.unnamed_controls,
+            "focus_order": self.focus_order,
+            "subtree": lambda: self.subtree(node, depth),
+            "find": lambda: self.find(role, name),
+        }
+        if query not in handlers:
+            raise ValueError(f"unknown query '{query}' (expected one of: {', '.join(handlers)})")
+        return handlers[query]()
+
+    # ---- Serialization ----
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "roles": self.roles,
+            "names": self.names,
+            "role": self.role.tolist(),
+            "name": self.name.tolist(),
+            "parent": self.parent.tolist(),
+            "level": self.level.tolist(),
+            "flags": self.flags.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompactAXTree":
+        tree = cls()
+        tree.roles = list(data["roles"])
+        tree.names = list(data["names"])
+        tree._role_ids = {r: i for i, r in enumerate(tree.roles)}
+        tree._name_ids = {n: i for i, n in enumerate(tree.names)}
+        tree.role = array("H", data["role"])
+        tree.name = array("I", data["name"])
+        tree.parent = array("i", data["parent"])
+        tree.level = array("B", data["level"])
+        tree.flags = array("B", data["flags"])
+        return tree
+
+
+# ===================== Recent trees =====================
+
+_recent: "OrderedDict[str, Tuple[float, CompactAXTree]]" = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def remember_tree(url: str, tree: CompactAXTree) -> CompactAXTree:
+    with _recent_lock:
+        _recent[url] = (time.time(), tree)
+        _recent.move_to_end(url)
+        while len(_recent) > TREE_LIMIT:
+            _recent.popitem(last=False)
+    return tree
+
+
+def lookup_tree(url: str) -> Optional[CompactAXTree]:
+    """The tree captured for *url* within the last ``TREE_TTL`` seconds, if any."""
+    with _recent_lock:
+        entry = _recent.get(url)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > TREE_TTL:
+            del _recent[url]
+            return None
+        _recent.move_to_end(url)
+        return entry[1]
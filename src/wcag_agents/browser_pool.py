@@ -0,0 +1,320 @@
+"""Persistent headless browser pool for the browser-driven WCAG tools.
+
+One Chromium process is launched on first use and kept alive in a dedicated
+thread with its own event loop, so both the sync tools and the async tools on
+the ADK event loop can borrow pages from it. Pages live in reusable, isolated
+browser contexts: a context is handed out to one caller at a time, and between
+uses its cookies and permissions are cleared along with everything the visited
+origins stored (local storage, IndexedDB, Cache Storage, service workers;
+session storage goes with the page). A context is replaced after a fixed
+number of pages. The browser itself is health-checked on every acquire and
+relaunched after a configurable page count, draining in-flight work first.
+
+Configuration (environment variables)::
+
+    WCAG_BROWSER_POOL_SIZE            concurrent pages (default 4)
+    WCAG_BROWSER_CONTEXT_MAX_PAGES    pages per context before it is recycled (default 25)
+    WCAG_BROWSER_MAX_PAGES            pages per browser before it is relaunched (default 500)
+    WCAG_BROWSER_TIMEOUT              seconds a single pooled job may take (default 90)
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+from urllib.parse import urlsplit
+
+from . import offline
+from .metrics import get_metrics, timed
+
+POOL_SIZE = int(os.getenv("WCAG_BROWSER_POOL_SIZE", "4"))
+CONTEXT_MAX_PAGES = int(os.getenv("WCAG_BROWSER_CONTEXT_MAX_PAGES", "25"))
+BROWSER_MAX_PAGES = int(os.getenv("WCAG_BROWSER_MAX_PAGES", "500"))
+JOB_TIMEOUT = float(os.getenv("WCAG_BROWSER_TIMEOUT", "90"))
+
+PLAYWRIGHT_MISSING = "playwright not installed. Run: pip install playwright && playwright install chromium"
+
+
+class _Browser:
+    __slots__ = ("browser", "pages_served", "active", "retired")
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages_served = 0
+        self.active = 0
+        self.retired = False
+
+    def healthy(self) -> bool:
+        return not self.retired and self.browser.is_connected()
+
+
+class _Context:
+    __slots__ = ("context", "owner", "pages_served", "origins")
+
+    def __init__(self, context, owner: _Browser):
+        self.context = context
+        self.owner = owner
+        self.pages_served = 0
+        # Origins loaded in the context's frames since its storage was last cleared.
+        self.origins: Set[str] = set()
+
+    def visited(self, frame) -> None:
+        parts = urlsplit(frame.url)
+        if parts.scheme in ("http", "https"):
+            self.origins.add(f"{parts.scheme}://{parts.netloc}")
+
+
+class BrowserPool:
+    """Pool of isolated Chromium contexts served from one long-lived browser."""
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        context_max_pages: int = CONTEXT_MAX_PAGES,
+        browser_max_pages: int = BROWSER_MAX_PAGES,
+        launch_options: Optional[dict] = None,
+    ):
+        self.size = max(1, size)
+        self.context_max_pages = max(1, context_max_pages)
+        self.browser_max_pages = max(1, browser_max_pages)
+        self.launch_options = {"headless": True, **(launch_options or {})}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Keyed jobs in progress; callers submitting the same key share the job.
+        self._inflight: Dict[Hashable, Future] = {}
+        self._inflight_lock = threading.RLock()
+        # Everything below is only touched from the pool's own event loop.
+        self._playwright = None
+        self._current: Optional[_Browser] = None
+        self._idle: List[_Context] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+
+    # ---- Loop thread ----
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def serve() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=serve, name="wcag-browser-pool", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+        return self._loop
+
+    def _submit(self, coro: Awaitable[Any]) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def _submit_job(self, fn: Callable[..., Awaitable[Any]], args: tuple, key: Optional[Hashable]) -> Future:
+        if key is None:
+            return self._submit(self._run_job(fn, args))
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = self._submit(self._run_job(fn, args))
+                future.add_done_callback(lambda done: self._forget(key, done))
+            return future
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._inflight_lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    # ---- Browser and context lifecycle (pool loop only) ----
+
+    async def _browser(self) -> _Browser:
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._launch_lock:
+            current = self._current
+            if current is not None and current.pages_served >= self.browser_max_pages:
+                current.retired = True
+            if current is None or not current.healthy():
+                if current is not None:
+                    current.retired = True
+                    await self._close_if_drained(current)
+                if self._playwright is None:
+                    from playwright.async_api import async_playwright  # type: ignore
+
+                    self._playwright = await async_playwright().start()
+                with timed(get_metrics().browser_launch, "browser.launch"):
+                    browser = await self._playwright.chromium.launch(**self.launch_options)
+                self._current = _Browser(browser)
+            return self._current
+
+    async def _close_if_drained(self, slot: _Browser) -> None:
+        if slot.retired and slot.active == 0 and slot.browser.is_connected():
+            self._idle = [ctx for ctx in self._idle if ctx.owner is not slot]
+            try:
+                await slot.browser.close()
+            except Exception:
+                pass
+
+    async def _acquire(self) -> _Context:
+        owner = await self._browser()
+        while self._idle:
+            ctx = self._idle.pop()
+            if ctx.owner is owner and owner.healthy():
+                break
+            await self._discard(ctx)
+        else:
+            ctx = _Context(await owner.browser.new_context(), owner)
+        owner.active += 1
+        return ctx
+
+    async def _discard(self, ctx: _Context) -> None:
+        try:
+            await ctx.context.close()
+        except Exception:
+            pass
+
+    async def _clear_storage(self, ctx: _Context, page) -> None:
+        """Delete what the visited origins stored in *ctx*, through a CDP session on its open *page*."""
+        if not ctx.origins:
+            return
+        session = await ctx.context.new_cdp_session(page)
+        try:
+            for origin in sorted(ctx.origins):
+                await session.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        finally:
+            await session.detach()
+        ctx.origins.clear()
+
+    async def _release(self, ctx: _Context, broken: bool) -> None:
+        owner = ctx.owner
+        owner.active -= 1
+        ctx.pages_served += 1
+        owner.pages_served += 1
+        if broken or ctx.pages_served >= self.context_max_pages or not owner.healthy():
+            await self._discard(ctx)
+        else:
+            try:
+                await ctx.context.clear_cookies()
+                await ctx.context.clear_permissions()
+                self._idle.append(ctx)
+            except Exception:
+                await self._discard(ctx)
+        if owner.pages_served >= self.browser_max_pages:
+            owner.retired = True
+        await self._close_if_drained(owner)
+
+    async def _run_job(self, fn: Callable[..., Awaitable[Any]], args: tuple) -> Any:
+        await self._browser()  # creates the semaphore on first use
+        async with self._slots:
+            ctx = await self._acquire()
+            broken = False
+            page = None
+            try:
+                page = await ctx.context.new_page()
+                page.on("framenavigated", ctx.visited)
+                if offline.mounted():
+                    # Mounted sites and archives are answered from disk (see ``offline``).
+                    await page.route("**/*", offline.route)
+                return await fn(page, *args)
+            except Exception:
+                broken = page is None or page.is_closed() or not ctx.owner.browser.is_connected()
+                raise
+            finally:
+                if page is not None and not page.is_closed():
+                    try:
+                        if not broken:
+                            await self._clear_storage(ctx, page)
+                        await page.close()
+                    except Exception:
+                        broken = True
+                elif page is not None:
+                    broken = True  # closed by the job: the context's storage cannot be cleared
+                await self._release(ctx, broken)
+
+    # ---- Public API ----
+
+    def run(
+        self, fn: Callable[..., Awaitable[Any]], *args: Any, timeout: float = JOB_TIMEOUT, key: Optional[Hashable] = None
+    ) -> Any:
+        """Run ``await fn(page, *args)`` on a pooled page and return its result (blocking).
+
+        While a job submitted with *key* runs, later calls with the same key
+        wait for its result instead of starting another page.
+        """
+        future = self._submit_job(fn, args, key)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    async def run_async(
+        self, fn: Callable[..., Awaitable[Any]], *args: Any, timeout: float = JOB_TIMEOUT, key: Optional[Hashable] = None
+    ) -> Any:
+        """Awaitable form of ``run`` for callers on another event loop."""
+        future = self._submit_job(fn, args, key)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise
+
+    async def _shutdown(self) -> None:
+        for ctx in self._idle:
+            await self._discard(ctx)
+        self._idle = []
+        if self._current is not None:
+            try:
+                await self._current.browser.close()
+            except Exception:
+                pass
+            self._current = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self) -> None:
+        """Close the browser and stop the pool thread."""
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(30)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        if not thread.is_alive():
+            loop.close()
+        self._launch_lock = self._slots = None
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def playwright_available() -> bool:
+    try:
+        import playwright.async_api  # type: ignore  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,356 @@
+"""Bulk site audits without an LLM turn per page.
+
+Takes a sitemap, a URL list or a seed URL with a crawl depth and runs the
+deterministic checks from ``tools`` on every page through a bounded pool of
+concurrent workers. Each page yields one result record as soon as it is done
+(so thousands of pages can be streamed to disk) and an ``AuditSummary``
+aggregates the whole run.
+
+Usage::
+
+    python -m wcag_agents.bulk_audit --sitemap https://example.com/sitemap.xml --out pages.jsonl
+    python -m wcag_agents.bulk_audit --seed https://example.com --depth 2 --concurrency 32
+    python -m wcag_agents.bulk_audit --offline crawl.wacz --out pages.jsonl
+    python -m wcag_agents.bulk_audit --offline build/ --base-url https://www.example.com/
+    python -m wcag_agents.bulk_audit --urls urls.txt --history audits.sqlite3 --label nightly
+
+The static checks run by default. The browser checks (tab walk, screencast,
+focus screenshots, target measurement) cost several Chromium jobs per page and
+only run with ``--browser`` (``include_browser=True``) or when named in
+``--checks``.
+
+With ``--history`` (or ``WCAG_HISTORY``) the run and every page's results are
+also stored in the audit history database (see ``history``).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gzip
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from . import offline, tools
+from .history import get_history, site_of
+from .results import iter_findings, render
+from .cli import BROWSER_CHECKS, CHECKS
+from .http_pool import close_session, fetch_snapshot_async, get_session
+from .metrics import profile_audit
+from .process_pool import CPU_CHECKS, CheckPool, get_check_pool, page_task
+from .snapshot import PageSnapshot, audit_scope, remember_snapshot
+
+DEFAULT_CONCURRENCY = 16
+
+# Checks that need neither an external CLI nor an LLM.
+DETERMINISTIC_CHECKS: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    name: getattr(tools, function) for name, function in CHECKS.items()
+}
+# The default: the deterministic checks that read only the downloaded page.
+STATIC_CHECKS: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    name: check for name, check in DETERMINISTIC_CHECKS.items() if name not in BROWSER_CHECKS
+}
+
+_SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+# ===================== URL sources =====================
+
+async def _read_source(location: str) -> bytes:
+    if urlparse(location).scheme in ("http", "https"):
+        async with get_session().get(location) as resp:
+            resp.raise_for_status()
+            return await resp.read()
+    with open(location, "rb") as fh:
+        return fh.read()
+
+
+async def load_sitemap(location: str, _seen: Optional[set] = None) -> List[str]:
+    """Return every page URL in a sitemap (or sitemap index), following nested sitemaps."""
+    seen = _seen if _seen is not None else set()
+    if location in seen:
+        return []
+    seen.add(location)
+
+    data = await _read_source(location)
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    root = ET.fromstring(data)
+
+    urls: List[str] = []
+    if root.tag == f"{_SITEMAP_NS}sitemapindex" or root.tag == "sitemapindex":
+        for loc in root.iter():
+            if loc.tag in (f"{_SITEMAP_NS}loc", "loc") and loc.text:
+                urls.extend(await load_sitemap(loc.text.strip(), seen))
+    else:
+        urls.extend(loc.text.strip() for loc in root.iter() if loc.tag in (f"{_SITEMAP_NS}loc", "loc") and loc.text)
+    return urls
+
+
+def load_url_list(path: str) -> List[str]:
+    """Read one URL per line, ignoring blanks and ``#`` comments."""
+    with open(path, "r", encoding="utf-8") as fh:
+        return [line.strip() for line in fh if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _same_site_links(page_url: str, hrefs: Iterable[str]) -> Iterable[str]:
+    base_host = urlparse(page_url).netloc
+    for href in hrefs:
+        link, _ = urldefrag(urljoin(page_url, href))
+        parsed = urlparse(link)
+        if parsed.scheme == "file":
+            # file: URLs have no host; the mounted directory of the page is the site.
+            if page_url.startswith("file:") and offline.same_mount(page_url, link):
+                yield link
+        elif parsed.scheme in ("http", "https") and parsed.netloc == base_host:
+            yield link
+
+# ===================== Auditing =====================
+
+def run_checks(url: str, checks: Optional[Dict[str, Callable[[str], Dict[str, Any]]]] = None) -> Dict[str, Dict[str, Any]]:
+    """Run *checks* (default: the static checks) against one URL."""
+    checks = checks or STATIC_CHECKS
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, check in checks.items():
+        try:
+            results[name] = check(url)
+        except Exception as exc:
+            results[name] = {"url": url, "status": "ERROR", "error": str(exc)}
+    return results
+
+
+class AuditSummary:
+    """Aggregates page records into per-check status and finding counts."""
+
+    def __init__(self):
+        self.pages = 0
+        self.failed_pages = 0
+        self.check_status: Dict[str, Counter] = defaultdict(Counter)
+        self.findings: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, page: Dict[str, Any]) -> None:
+        self.pages += 1
+        if page["status"] != "AUDITED":
+            self.failed_pages += 1
+            return
+        for name, result in page["checks"].items():
+            self.check_status[name][result.get("status", "UNKNOWN")] += 1
+            for finding in iter_findings(result):
+                self.findings[f"{name}.{finding.key}"][finding.outcome.label] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pages": self.pages,
+            "failed_pages": self.failed_pages,
+            "check_status": {name: dict(counts) for name, counts in sorted(self.check_status.items())},
+            "findings": {key: dict(counts) for key, counts in sorted(self.findings.items())},
+        }
+
+
+def _evaluate_page(url: str, snap: PageSnapshot, checks, follow_links: bool) -> tuple:
+    results = run_checks(url, checks)
+    links = list(_same_site_links(snap.final_url, snap.index.links)) if follow_links else []
+    return results, links
+
+
+async def _evaluate_in_process(url: str, snap: PageSnapshot, checks, follow_links: bool, pool: CheckPool) -> tuple:
+    """Run the CPU-bound checks in *pool* and the rest (browser-driven or constant) in a thread."""
+    offloaded = {name: check.__name__ for name, check in checks.items() if check.__name__ in CPU_CHECKS}
+    local = {name: check for name, check in checks.items() if name not in offloaded}
+    remote = asyncio.ensure_future(pool.run(page_task(snap, list(offloaded.values()), follow_links)))
+    results = await asyncio.to_thread(run_checks, url, local) if local else {}
+    try:
+        by_function, hrefs = await remote
+    except Exception as exc:
+        error = {"url": url, "status": "ERROR", "error": str(exc)}
+        by_function, hrefs = {function: error for function in offloaded.values()}, []
+    results.update({name: by_function[function] for name, function in offloaded.items()})
+    return {name: results[name] for name in checks}, list(_same_site_links(snap.final_url, hrefs))
+
+
+async def _audit_page(url: str, checks, follow_links: bool, pool: Optional[CheckPool] = None) -> tuple:
+    checks = checks or STATIC_CHECKS
+    with audit_scope():
+        try:
+            # With a process pool the page is parsed in the worker, not here.
+            snap = remember_snapshot(await fetch_snapshot_async(url, parse=pool is None))
+        except Exception as exc:
+            return {"url": url, "status": "ERROR", "error": str(exc)}, []
+        if pool is not None:
+            results, links = await _evaluate_in_process(url, snap, checks, follow_links, pool)
+        else:
+            # Checks and link extraction are CPU-bound; the worker thread finds the
+            # snapshot through the copied audit scope.
+            results, links = await asyncio.to_thread(_evaluate_page, url, snap, checks, follow_links)
+    return {"url": url, "status": "AUDITED", "http_status": snap.status_code, "checks": results}, links
+
+
+async def audit_site(
+    urls: Iterable[str],
+    depth: int = 0,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_pages: Optional[int] = None,
+    checks: Optional[Dict[str, Callable[[str], Dict[str, Any]]]] = None,
+    on_page: Optional[Callable[[Dict[str, Any]], None]] = None,
+    processes: Optional[int] = None,
+    include_browser: bool = False,
+) -> Dict[str, Any]:
+    """Audit *urls* (and, with ``depth > 0``, same-site pages linked from them).
+
+    At most *concurrency* pages are in flight at once. With *processes* (default
+    ``WCAG_PROCESS_WORKERS``) above 0, the CPU-bound checks run in that many
+    worker processes (see ``process_pool``). Every finished page record is
+    passed to *on_page*; the aggregated summary is returned. A page whose audit
+    raises is recorded as an error; an exception from *on_page* ends the audit.
+    Without *checks*, the static checks run, plus the browser checks with
+    *include_browser*.
+    """
+    if checks is None:
+        checks = DETERMINISTIC_CHECKS if include_browser else STATIC_CHECKS
+    pool = get_check_pool(processes)
+    summary = AuditSummary()
+    queue: "asyncio.Queue[tuple]" = asyncio.Queue()
+    seen = set()
+
+    def enqueue(url: str, level: int) -> None:
+        url = tools._normalize_url(url)
+        if url in seen or (max_pages is not None and len(seen) >= max_pages):
+            return
+        seen.add(url)
+        queue.put_nowait((url, level))
+
+    for url in urls:
+        enqueue(url, 0)
+
+    async def worker() -> None:
+        while True:
+            url, level = await queue.get()
+            try:
+                try:
+                    page, links = await _audit_page(url, checks, level < depth, pool)
+                except Exception as exc:
+                    page, links = {"url": url, "status": "ERROR", "error": str(exc)}, []
+                page["depth"] = level
+                for link in links:
+                    enqueue(link, level + 1)
+                summary.add(page)
+                if on_page is not None:
+                    on_page(page)
+            finally:
+                queue.task_done()
+
+    with profile_audit("bulk_audit"):
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+        joined = asyncio.ensure_future(queue.join())
+        try:
+            await asyncio.wait([joined, *workers], return_when=asyncio.FIRST_COMPLETED)
+            for task in workers:
+                # Workers only stop on an error outside the page audit (a failing on_page,
+                # a broken output pipe); surface it instead of waiting on the queue forever.
+                if task.done():
+                    task.result()
+        finally:
+            joined.cancel()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    return summary.to_dict()
+
+# ===================== Command line =====================
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Audit many pages with the deterministic WCAG checks.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--sitemap", help="sitemap.xml URL or path (sitemap indexes and .gz are followed)")
+    source.add_argument("--urls", help="file with one URL per line")
+    source.add_argument("--seed", help="start URL for a same-site crawl")
+    source.add_argument("--offline", help="HTML file, directory or WARC/WACZ archive to audit from disk")
+    parser.add_argument("--base-url", default="", help="with --offline DIRECTORY: the site URL the directory is served at")
+    parser.add_argument("--depth", type=int, default=0, help="link depth to crawl from each start URL")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--processes",
+        type=lambda value: (os.cpu_count() or 1) if value == "auto" else int(value),
+        default=None,
+        help='worker processes for the CPU-bound checks ("auto": one per core; default WCAG_PROCESS_WORKERS, 0: threads only)',
+    )
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--checks", help="comma-separated subset of: " + ", ".join(DETERMINISTIC_CHECKS))
+    parser.add_argument(
+        "--browser", action="store_true", help="with the default checks: also run the browser checks (several Chromium jobs per page)"
+    )
+    parser.add_argument("--out", help="write one JSON record per page to this file (default: stdout)")
+    parser.add_argument("--summary", help="write the aggregated summary JSON to this file (default: stderr)")
+    parser.add_argument("--history", help="also store the run in this audit history database (default: WCAG_HISTORY)")
+    parser.add_argument("--label", default="", help="name of the run in the audit history (e.g. a release or commit)")
+    parser.add_argument("--prose", action="store_true", help="render findings and recommendations as sentences in --out records")
+    return parser
+
+
+async def _main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    checks = None
+    if args.checks:
+        names = [name.strip() for name in args.checks.split(",") if name.strip()]
+        unknown = [name for name in names if name not in DETERMINISTIC_CHECKS]
+        if unknown:
+            raise SystemExit(f"Unknown checks: {', '.join(unknown)}")
+        checks = {name: DETERMINISTIC_CHECKS[name] for name in names}
+
+    try:
+        if args.sitemap:
+            urls = await load_sitemap(args.sitemap)
+        elif args.urls:
+            urls = load_url_list(args.urls)
+        elif args.offline:
+            urls = await asyncio.to_thread(offline.mount, args.offline, args.base_url)
+        else:
+            urls = [args.seed]
+
+        history = get_history(args.history)
+        sites = {site_of(url) for url in urls}
+        recording = history.record_run(sites.pop() if len(sites) == 1 else "", args.label) if history else contextlib.nullcontext()
+        out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+        try:
+            with recording as run:
+
+                def write_page(page: Dict[str, Any]) -> None:
+                    if run is not None:
+                        run.add(page)
+                    if args.prose and "checks" in page:
+                        page = {**page, "checks": {name: render(result) for name, result in page["checks"].items()}}
+                    out.write(json.dumps(page, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+                return await audit_site(
+                    urls,
+                    depth=args.depth,
+                    concurrency=args.concurrency,
+                    max_pages=args.max_pages,
+                    checks=checks,
+                    on_page=write_page,
+                    processes=args.processes,
+                    include_browser=args.browser,
+                )
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    finally:
+        await close_session()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    summary = asyncio.run(_main_async(args))
+    text = json.dumps(summary, indent=2, ensure_ascii=False)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as fh:
+            fh.write(text)
+    else:
+        print(text, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
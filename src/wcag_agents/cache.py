@@ -0,0 +1,411 @@
+"""Persistent on-disk cache of page snapshots and per-check results.
+
+Pages are stored with their ETag / Last-Modified validators so a re-audit can
+revalidate them with a conditional GET (a 304 costs no body transfer), and
+check results are stored under the normalised URL, the check name and the
+check's version, together with the digest of the input they were computed
+from, so unchanged pages skip the check entirely. Checks listed in
+``regions.CHECK_REGIONS`` are keyed by the hashes of the page regions they
+read, so a change elsewhere on the page reuses their previous verdict. Entries expire after a TTL
+and the least recently used ones are evicted once the cache exceeds its size
+budget. Hit / miss counters are available from ``AuditCache.stats()``.
+
+Configuration (environment variables)::
+
+    WCAG_CACHE=0                 disable the cache
+    WCAG_CACHE_DIR               cache directory (default ~/.cache/wcag-agents)
+    WCAG_CACHE_TTL               seconds before an entry expires (default 7 days)
+    WCAG_CACHE_FRESH             seconds a page is served without revalidation (default 0)
+    WCAG_CACHE_MAX_MB            size budget before LRU eviction (default 512)
+"""
+
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urldefrag, urlsplit, urlunsplit
+
+from .metrics import get_metrics
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "wcag-agents")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_MB = 512
+# Expiry and the size budget are enforced every this many writes.
+EVICT_EVERY = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    status_code INTEGER,
+    final_url TEXT,
+    headers TEXT,
+    encoding TEXT,
+    content BLOB,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL,
+    accessed_at REAL,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT,
+    check_name TEXT,
+    version INTEGER,
+    digest TEXT,
+    payload BLOB,
+    stored_at REAL,
+    accessed_at REAL,
+    size INTEGER,
+    PRIMARY KEY (url, check_name, version)
+);
+CREATE TABLE IF NOT EXISTS regions (
+    url TEXT PRIMARY KEY,
+    digest TEXT,
+    hashes TEXT,
+    stored_at REAL
+);
+CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at);
+CREATE INDEX IF NOT EXISTS pages_stored ON pages (stored_at);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at);
+CREATE INDEX IF NOT EXISTS results_stored ON results (stored_at);
+"""
+
+
+def cache_key(url: str) -> str:
+    """Canonical cache key: lower-cased scheme and host, no fragment."""
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+class CachedPage(NamedTuple):
+    url: str
+    status_code: int
+    final_url: str
+    headers: Dict[str, str]
+    encoding: str
+    content: bytes
+    etag: str
+    last_modified: str
+    stored_at: float
+
+
+class AuditCache:
+    """SQLite-backed snapshot and result cache with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, directory: str, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_MB << 20, fresh_for: float = 0):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "audit-cache.sqlite3")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    # ---- Pages ----
+
+    def get_page(self, url: str) -> Optional[CachedPage]:
+        key = cache_key(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status_code, final_url, headers, encoding, content, etag, last_modified, stored_at "
+                "FROM pages WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None or now - row[7] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM pages WHERE url = ?", (key,))
+                self.counters["page_misses"] += 1
+                get_metrics().cache.labels("page", "miss").inc()
+                return None
+            self._db.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, key))
+        status_code, final_url, headers, encoding, content, etag, last_modified, stored_at = row
+        return CachedPage(
+            url, status_code, final_url, json.loads(headers), encoding, zlib.decompress(content), etag, last_modified, stored_at
+        )
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """Whether *page* may be served without revalidating it first."""
+        fresh = time.time() - page.stored_at < self.fresh_for
+        if fresh:
+            self.counters["page_hits"] += 1
+            get_metrics().cache.labels("page", "hit").inc()
+        return fresh
+
+    @staticmethod
+    def conditional_headers(page: Optional[CachedPage]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if page is not None:
+            if page.etag:
+                headers["If-None-Match"] = page.etag
+            if page.last_modified:
+                headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def revalidated(self, page: CachedPage) -> CachedPage:
+        """Record a 304 for *page*: it counts as a hit and its TTL restarts."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE pages SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, cache_key(page.url)))
+            self.counters["page_hits"] += 1
+            self.counters["page_revalidations"] += 1
+            get_metrics().cache.labels("page", "revalidated").inc()
+        return page._replace(stored_at=now)
+
+    def put_page(
+        self, url: str, status_code: int, final_url: str, headers: Dict[str, str], encoding: str, content: bytes
+    ) -> None:
+        lowered = {k.lower(): v for k, v in headers.items()}
+        if status_code != 200 or "no-store" in lowered.get("cache-control", ""):
+            return
+        blob = zlib.compress(content, 6)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cache_key(url),
+                    status_code,
+                    final_url,
+                    json.dumps(lowered),
+                    encoding,
+                    blob,
+                    lowered.get("etag", ""),
+                    lowered.get("last-modified", ""),
+                    now,
+                    now,
+                    len(blob),
+                ),
+            )
+            self._maybe_evict()
+
+    # ---- Check results ----
+
+    def get_result(self, url: str, check: str, version: int, digest: str) -> Optional[Dict[str, Any]]:
+        key = cache_key(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, payload, stored_at FROM results WHERE url = ? AND check_name = ? AND version = ?",
+                (key, check, version),
+            ).fetchone()
+            if row is None or row[0] != digest or now - row[2] > self.ttl:
+                self.counters["result_misses"] += 1
+                get_metrics().cache.labels("result", "miss").inc()
+                return None
+            self._db.execute(
+                "UPDATE results SET accessed_at = ? WHERE url = ? AND check_name = ? AND version = ?",
+                (now, key, check, version),
+            )
+            self.counters["result_hits"] += 1
+            get_metrics().cache.labels("result", "hit").inc()
+        return json.loads(zlib.decompress(row[1]))
+
+    def put_result(self, url: str, check: str, version: int, digest: str, result: Dict[str, Any]) -> None:
+        blob = zlib.compress(json.dumps(result, ensure_ascii=False).encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(url), check, version, digest, blob, now, now, len(blob)),
+            )
+            self._maybe_evict()
+
+    # ---- Region hashes ----
+
+    def get_regions(self, url: str, digest: str) -> Optional[Dict[str, str]]:
+        """Region hashes stored for the page body with *digest*, if any."""
+        with self._lock:
+            row = self._db.execute("SELECT digest, hashes FROM regions WHERE url = ?", (cache_key(url),)).fetchone()
+        if row is None or row[0] != digest:
+            return None
+        return json.loads(row[1])
+
+    def put_regions(self, url: str, digest: str, hashes: Dict[str, str]) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO regions VALUES (?, ?, ?, ?)", (cache_key(url), digest, json.dumps(hashes), time.time())
+            )
+
+    # ---- Housekeeping ----
+
+    def _maybe_evict(self) -> None:
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 1:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under budget (lock held)."""
+        cutoff = time.time() - self.ttl
+        for table in ("pages", "results", "regions"):
+            self.counters["evictions"] += self._db.execute(f"DELETE FROM {table} WHERE stored_at < ?", (cutoff,)).rowcount
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        rows = self._db.execute(
+            "SELECT 'pages', url, '', 0, size, accessed_at FROM pages "
+            "UNION ALL SELECT 'results', url, check_name, version, size, accessed_at FROM results "
+            "ORDER BY accessed_at"
+        )
+        doomed = []
+        for table, url, check, version, size, _ in rows:
+            if total <= target:
+                break
+            doomed.append((table, url, check, version))
+            total -= size
+        for table, url, check, version in doomed:
+            if table == "pages":
+                self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._db.execute("DELETE FROM regions WHERE url = ?", (url,))
+            else:
+                self._db.execute(
+                    "DELETE FROM results WHERE url = ? AND check_name = ? AND version = ?", (url, check, version)
+                )
+        self.counters["evictions"] += len(doomed)
+
+    def _total_bytes(self) -> int:
+        pages = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        results = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        return pages + results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pages = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            results = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            size = self._total_bytes()
+        return {**dict(self.counters), "pages": pages, "results": results, "bytes": size}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.execute("DELETE FROM results")
+            self._db.execute("DELETE FROM regions")
+            self.counters.clear()
+
+
+_cache: Optional[AuditCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[AuditCache]:
+    """Return the process-wide cache, or None when disabled or unusable."""
+    global _cache
+    if os.getenv("WCAG_CACHE", "1").lower() in ("0", "false", "no"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = AuditCache(
+                    os.getenv("WCAG_CACHE_DIR", DEFAULT_CACHE_DIR),
+                    ttl=float(os.getenv("WCAG_CACHE_TTL", DEFAULT_TTL)),
+                    max_bytes=int(float(os.getenv("WCAG_CACHE_MAX_MB", DEFAULT_MAX_MB)) * (1 << 20)),
+                    fresh_for=float(os.getenv("WCAG_CACHE_FRESH", "0")),
+                )
+            except (OSError, sqlite3.Error):
+                return None
+        return _cache
+
+
+def _is_error(result: Any) -> bool:
+    if not isinstance(result, dict) or result.get("status") == "ERROR" or "error" in result:
+        return True
+    # External scanner tools nest the scanner output under "result".
+    nested = result.get("result")
+    return isinstance(nested, dict) and "error" in nested
+
+
+def _input_digest(store: AuditCache, url: str, snap, regions) -> str:
+    """Fingerprint of the *regions* of *snap*, parsing the page only if its hashes are not stored yet."""
+    from .regions import REGIONS, regions_digest
+
+    hashes = store.get_regions(url, snap.digest)
+    if hashes is None or not hashes.keys() >= set(REGIONS):  # stored before a region was added
+        hashes = snap.regions
+        store.put_regions(url, snap.digest, hashes)
+    else:
+        snap.regions = hashes
+    return regions_digest(hashes, regions)
+
+
+def cached_check(version: int) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Cache a ``(url) -> dict`` tool's result per page content and check *version*.
+
+    Bump *version* whenever the check's logic or output changes. The page is
+    (re)validated through the snapshot layer first, so a changed page re-runs
+    the check unless the check is listed in ``regions.CHECK_REGIONS`` and none
+    of the regions it reads changed. Error results are never stored.
+    """
+
+    def decorate(check: Callable[..., Any]) -> Callable[..., Any]:
+        from .regions import CHECK_REGIONS
+
+        name = check.__name__
+        regions = CHECK_REGIONS.get(name)
+
+        def lookup(store: AuditCache, url: str, snap) -> Tuple[str, Optional[Dict[str, Any]]]:
+            digest = _input_digest(store, url, snap, regions) if regions else snap.digest
+            return digest, store.get_result(url, name, version, digest)
+
+        def store_result(store: AuditCache, url: str, digest: str, result: Dict[str, Any]) -> None:
+            if not _is_error(result):
+                store.put_result(url, name, version, digest, result)
+
+        if asyncio.iscoroutinefunction(check):
+
+            @functools.wraps(check)
+            async def async_wrapper(url: str) -> Dict[str, Any]:
+                from .http_pool import get_snapshot_async
+                from .tools import _normalize_url
+
+                url = _normalize_url(url)
+                store = get_cache()
+                if store is None:
+                    return await check(url)
+                try:
+                    snap = await get_snapshot_async(url)
+                except Exception:
+                    return await check(url)
+                digest, hit = await asyncio.to_thread(lookup, store, url, snap)
+                if hit is not None:
+                    return hit
+                result = await check(url)
+                await asyncio.to_thread(store_result, store, url, digest, result)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(check)
+        def wrapper(url: str) -> Dict[str, Any]:
+            from .snapshot import get_snapshot
+            from .tools import _normalize_url
+
+            url = _normalize_url(url)
+            store = get_cache()
+            if store is None:
+                return check(url)
+            try:
+                snap = get_snapshot(url)
+            except Exception:
+                return check(url)
+            digest, hit = lookup(store, url, snap)
+            if hit is not None:
+                return hit
+            result = check(url)
+            store_result(store, url, digest, result)
+            return result
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,224 @@
+"""Command line entry point (``agents-km-accessibility`` / ``wcag-validator``).
+
+Runs the WCAG checks directly, without the ADK agents or an LLM turn, for CI
+pipelines and quick local audits. Startup imports only this module; ``tools``
+is imported when a check runs, and each check imports its own heavy
+dependencies (Playwright, NumPy, textstat, langdetect) on first use. ADK is
+never imported.
+
+Usage::
+
+    agents-km-accessibility check https://example.com --checks readability,timing
+    agents-km-accessibility check build/index.html --prose --fail-on warn
+    agents-km-accessibility check https://example.com --browser
+    agents-km-accessibility audit --sitemap https://example.com/sitemap.xml --out pages.jsonl
+    agents-km-accessibility list
+    agents-km-accessibility history trend 3.3.2 --db audits.sqlite3
+    agents-km-accessibility history regressions 41 --db audits.sqlite3
+
+``check`` prints one JSON record per URL and exits with status 1 when a
+finding reaches the ``--fail-on`` level (default: ``fail``). By default it runs
+the static checks; ``--browser`` adds the ones that render the page in
+Chromium. ``audit`` is
+``bulk_audit`` for whole sites. ``history`` queries the audit history database
+that ``--history`` runs are stored in (see ``history``).
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Check name -> ``tools`` function, resolved only when the check runs.
+CHECKS: Dict[str, str] = {
+    "keyboard": "test_keyboard_accessibility",
+    "timing": "test_timing_controls",
+    "seizure": "test_seizure_prevention",
+    "navigation": "test_navigation_structure",
+    "input_modalities": "test_input_modalities",
+    "focus_not_obscured": "test_focus_not_obscured",
+    "focus_appearance": "test_focus_appearance",
+    "dragging_movements": "test_dragging_movements",
+    "target_size": "test_target_size_minimum",
+    "readability": "test_readability",
+    "predictability": "test_predictability",
+    "input_assistance": "test_input_assistance",
+}
+# Checks that render the page in Chromium (tab walks, screencasts, screenshots, target
+# measurement); only run with --browser or when asked for by name.
+BROWSER_CHECKS = frozenset(("keyboard", "seizure", "input_modalities", "focus_not_obscured", "focus_appearance", "target_size"))
+# Checks that drive a Node.js CLI; only run when asked for by name.
+EXTERNAL_CHECKS: Dict[str, str] = {
+    "pa11y": "run_pa11y",
+    "axe": "run_axe_devtools",
+    "lighthouse": "run_lighthouse_accessibility",
+}
+FAIL_LEVELS = ("pass", "info", "warn", "fail", "error", "never")
+
+
+def load_check(name: str) -> Callable[[str], Dict[str, Any]]:
+    """The ``tools`` function behind check *name* (importing ``tools`` on first use)."""
+    tools = importlib.import_module(".tools", __package__)
+    return getattr(tools, CHECKS.get(name) or EXTERNAL_CHECKS[name])
+
+
+def _selected(spec: Optional[str], browser: bool = False) -> List[str]:
+    if not spec:
+        return [name for name in CHECKS if browser or name not in BROWSER_CHECKS]
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CHECKS and name not in EXTERNAL_CHECKS]
+    if unknown:
+        raise SystemExit(f"Unknown checks: {', '.join(unknown)} (see `list`)")
+    return names
+
+
+def _worst_outcome(results: Dict[str, Dict[str, Any]]) -> int:
+    from .results import Outcome, iter_findings
+
+    worst = -1
+    for result in results.values():
+        if result.get("status") == "ERROR" or "error" in result:
+            worst = max(worst, Outcome.ERROR)
+        for finding in iter_findings(result):
+            worst = max(worst, finding.outcome)
+    return worst
+
+
+@contextlib.contextmanager
+def _recording(path: Optional[str], urls: List[str], label: str) -> Iterator[Any]:
+    """A ``history.RunWriter`` for *urls* when a history database is configured, else None."""
+    if not path and not os.getenv("WCAG_HISTORY"):
+        yield None
+        return
+    from .history import get_history, site_of
+
+    sites = {site_of(url) for url in urls}
+    with get_history(path).record_run(sites.pop() if len(sites) == 1 else "", label) as run:
+        yield run
+
+
+def _check(args: argparse.Namespace) -> int:
+    from .results import Outcome, render
+    from .snapshot import audit_scope
+
+    names = _selected(args.checks, args.browser)
+    checks = {name: load_check(name) for name in names}
+    threshold = FAIL_LEVELS.index(args.fail_on)
+    normalize = importlib.import_module(".tools", __package__)._normalize_url
+    offline = importlib.import_module(".offline", __package__)
+    # Paths given on the command line are mounted, which is what lets the checks read them.
+    urls = [offline.mount_file(url) if offline.is_local(url) else normalize(url) for url in args.urls]
+    status = 0
+    with _recording(args.history, urls, args.label) as run:
+        for url in urls:
+            results: Dict[str, Dict[str, Any]] = {}
+            with audit_scope():
+                for name, check in checks.items():
+                    try:
+                        results[name] = check(url)
+                    except Exception as exc:
+                        results[name] = {"url": url, "status": "ERROR", "error": str(exc)}
+            if run is not None:
+                run.add({"url": url, "status": "AUDITED", "checks": results})
+            if args.fail_on != "never" and _worst_outcome(results) >= Outcome(threshold):
+                status = 1
+            if args.prose:
+                results = {name: render(result) for name, result in results.items()}
+            record = {"url": url, "checks": results}
+            sys.stdout.write(json.dumps(record, ensure_ascii=False, indent=2 if args.pretty else None) + "\n")
+    return status
+
+
+def _list(args: argparse.Namespace) -> int:
+    for name, function in CHECKS.items():
+        print(f"{name:20} {function}" + (" (browser)" if name in BROWSER_CHECKS else ""))
+    for name, function in EXTERNAL_CHECKS.items():
+        print(f"{name:20} {function} (Node.js)")
+    return 0
+
+
+def _history(args: argparse.Namespace) -> int:
+    from .history import WEEK, get_history
+    from .results import Outcome
+
+    history = get_history(args.db)
+    if history is None:
+        raise SystemExit("No history database: pass --db or set WCAG_HISTORY")
+    outcome = Outcome[(args.outcome or ("warn" if args.query == "regressions" else "fail")).upper()]
+    if args.query == "runs":
+        report: Any = [run._asdict() for run in history.runs(args.site, args.limit)]
+    elif args.query == "trend":
+        points = history.trend(args.criterion, args.days * 86400 if args.days else WEEK, args.periods, site=args.site, outcome=outcome)
+        report = {"criterion": args.criterion, "periods": [point._asdict() for point in points]}
+    elif args.query == "regressions":
+        found = history.regressions(args.since, args.run_id, outcome)
+        report = [
+            {**item._asdict(), "outcome": item.outcome.label, "previous": item.previous.label if item.previous is not None else None}
+            for item in found
+        ]
+    else:
+        run = args.run_id if args.run_id is not None else history.latest_run(args.site)
+        if run is None:
+            raise SystemExit("The history has no runs yet")
+        report = history.run_summary(run, outcome)
+    sys.stdout.write(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+    return 0
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="agents-km-accessibility", description="Run WCAG checks without the agents.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check = commands.add_parser("check", help="run checks on URLs, local HTML files or directories")
+    check.add_argument("urls", nargs="+", metavar="URL")
+    check.add_argument("--checks", help="comma-separated checks (default: every static check; see `list`)")
+    check.add_argument("--browser", action="store_true", help="with the default checks: also run the browser checks")
+    check.add_argument("--prose", action="store_true", help="render findings and recommendations as sentences")
+    check.add_argument("--pretty", action="store_true", help="indent the JSON output")
+    check.add_argument(
+        "--fail-on", choices=FAIL_LEVELS, default="fail", help="exit 1 when a finding reaches this outcome (default: fail)"
+    )
+    check.add_argument("--history", help="also store the results in this audit history database (default: WCAG_HISTORY)")
+    check.add_argument("--label", default="", help="name of the run in the audit history")
+    check.set_defaults(run=_check)
+
+    commands.add_parser("audit", help="bulk site audit (sitemap, URL list, crawl or archive); see `audit --help`", add_help=False)
+    commands.add_parser("list", help="list the available checks").set_defaults(run=_list)
+
+    history = commands.add_parser("history", help="query the audit history database")
+    history.add_argument("--db", help="history database (default: WCAG_HISTORY)")
+    history.add_argument("--site", help="only runs / pages of this host")
+    history.add_argument(
+        "--outcome", choices=FAIL_LEVELS[:-2], help="severity that counts as failing (default: fail; warn for regressions)"
+    )
+    queries = history.add_subparsers(dest="query", required=True)
+    runs = queries.add_parser("runs", help="the most recent runs")
+    runs.add_argument("--limit", type=int, default=20)
+    trend = queries.add_parser("trend", help="pages failing a criterion per period (default: this week vs last)")
+    trend.add_argument("criterion", help='success criterion, e.g. "3.3.2"')
+    trend.add_argument("--days", type=float, default=0, help="period length in days (default 7)")
+    trend.add_argument("--periods", type=int, default=2)
+    regressions = queries.add_parser("regressions", help="findings new or worse since a run")
+    regressions.add_argument("since", type=int, metavar="RUN")
+    regressions.add_argument("--run", type=int, dest="run_id", help="run to compare (default: the latest run of the same site)")
+    summary = queries.add_parser("summary", help="status counts and failing pages per criterion for one run")
+    summary.add_argument("--run", type=int, dest="run_id", help="run id (default: the latest run)")
+    history.set_defaults(run=_history)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["audit"]:
+        from . import bulk_audit
+
+        return bulk_audit.main(argv[1:])
+    args = _build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,364 @@
+"""Single-pass DOM feature index for the static WCAG checks.
+
+Instead of every check calling ``find_all`` several times, one traversal feeds
+start / text / end events through a small visitor table and records every
+feature the Operable and Understandable checks read into a compact
+``DomIndex``. The builder only sees events; lxml's streaming parser in
+``ingest`` produces them while the page downloads.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+_HIDDEN_TAGS = frozenset(("script", "style", "noscript", "template"))
+# Elements whose text content is needed by a check once the element closes.
+_CAPTURE_TAGS = frozenset(("a", "button", "label", "title"))
+_FORM_CONTROL_TAGS = frozenset(("input", "textarea", "select"))
+# Elements whose own text forms one block for per-block scoring (readability, language of parts).
+_BLOCK_TAGS = frozenset(
+    (
+        "address", "article", "aside", "blockquote", "body", "caption", "dd", "div", "dt", "figcaption",
+        "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "li", "main", "nav", "p", "pre",
+        "section", "summary", "td", "th",
+    )
+)
+_HELP_LINK_TEXT = re.compile(r"help|faq|support", re.I)
+_TIMER_CALL = re.compile(r"set(Timeout|Interval)\s*\(", re.I)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class FormControl(NamedTuple):
+    tag: str
+    type: str
+    id: str
+    name: str
+    autocomplete: str
+    aria_invalid: str
+    aria_label: str
+    aria_labelledby: str
+    in_label: bool
+
+
+class TextBlock(NamedTuple):
+    tag: str
+    lang: str  # effective language: nearest lang attribute, or the <html lang>
+    text: str
+    template: str = ""  # fingerprint of the shared template region it belongs to (see ``templates``)
+
+
+class DomIndex:
+    """Features of one document, collected in a single traversal."""
+
+    __slots__ = (
+        "html_lang",
+        "title",
+        "element_count",
+        "meta_refresh",
+        "autoplay_media",
+        "marquee_count",
+        "timer_scripts",
+        "lang_elements",
+        "focus_handlers",
+        "input_handlers",
+        "form_controls",
+        "labels",
+        "form_onsubmit",
+        "nav_landmarks",
+        "button_labels",
+        "help_links",
+        "described_by_count",
+        "error_hints",
+        "has_ruby",
+        "has_phoneme",
+        "links",
+        "visible_text",
+        "text_blocks",
+        "templates",
+    )
+
+    def __init__(self):
+        self.html_lang = ""
+        self.title = ""
+        self.element_count = 0
+        self.meta_refresh = 0
+        self.autoplay_media = 0
+        self.marquee_count = 0
+        self.timer_scripts = 0
+        self.lang_elements: List[Tuple[str, str]] = []
+        self.focus_handlers: List[str] = []
+        self.input_handlers: List[str] = []
+        self.form_controls: List[FormControl] = []
+        self.labels: Dict[str, str] = {}
+        self.form_onsubmit: List[str] = []
+        self.nav_landmarks = 0
+        self.button_labels: List[str] = []
+        self.help_links: List[str] = []
+        self.described_by_count = 0
+        self.error_hints = 0
+        self.has_ruby = False
+        self.has_phoneme = False
+        self.links: List[str] = []
+        self.visible_text = ""
+        self.text_blocks: List[TextBlock] = []
+        # Fingerprint -> kind of every shared template region merged in (see ``templates``).
+        self.templates: Dict[str, str] = {}
+
+    @property
+    def password_inputs(self) -> List[FormControl]:
+        return [c for c in self.form_controls if c.type == "password"]
+
+    def merge(self, other: "DomIndex", lang: str = "", template: str = "") -> "DomIndex":
+        """Add the features of *other*, the index of a later part of the same document.
+
+        *other* is not modified, so a cached fragment index can be merged into
+        many pages. Its text blocks without a language of their own take
+        *lang* (the language inherited at the merge point) and are tagged with
+        *template* when given.
+        """
+        self.html_lang = self.html_lang or other.html_lang
+        self.title = self.title or other.title
+        self.element_count += other.element_count
+        self.meta_refresh += other.meta_refresh
+        self.autoplay_media += other.autoplay_media
+        self.marquee_count += other.marquee_count
+        self.timer_scripts += other.timer_scripts
+        self.nav_landmarks += other.nav_landmarks
+        self.described_by_count += other.described_by_count
+        self.error_hints += other.error_hints
+        self.has_ruby = self.has_ruby or other.has_ruby
+        self.has_phoneme = self.has_phoneme or other.has_phoneme
+        self.lang_elements.extend(other.lang_elements)
+        self.focus_handlers.extend(other.focus_handlers)
+        self.input_handlers.extend(other.input_handlers)
+        self.form_controls.extend(other.form_controls)
+        self.labels.update(other.labels)
+        self.form_onsubmit.extend(other.form_onsubmit)
+        self.button_labels.extend(other.button_labels)
+        self.help_links.extend(other.help_links)
+        self.links.extend(other.links)
+        self.visible_text = " ".join(filter(None, (self.visible_text, other.visible_text)))
+        self.text_blocks.extend(
+            block._replace(lang=block.lang or lang, template=block.template or template) if lang or template else block
+            for block in other.text_blocks
+        )
+        self.templates.update(other.templates)
+        return self
+
+
+def _attr(attrs: Mapping[str, Any], name: str) -> str:
+    return attrs.get(name) or ""
+
+
+# ===================== Visitors =====================
+# Start visitors run when an element opens; end visitors receive the element's
+# stripped text content once it closes (only for tags in _CAPTURE_TAGS).
+
+def _visit_html(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+    if not builder.index.html_lang:
+        builder.index.html_lang = _attr(attrs, "lang").lower()
+
+
+def _visit_meta(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+    if _attr(attrs, "http-equiv").lower() == "refresh":
+        builder.index.meta_refresh += 1
+
+
+def _visit_media(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+    if "autoplay" in attrs:
+        builder.index.autoplay_media += 1
+
+
+def _visit_marquee(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+    builder.index.marquee_count += 1
+
+
+def _visit_nav(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+    builder.index.nav_landmarks += 1
+
+
+def _visit_ruby(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+    builder.index.has_ruby = True
+
+
+def _visit_phoneme(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+    builder.index.has_phoneme = True
+
+
+def _visit_link(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+    href = _attr(attrs, "href").strip()
+    if href:
+        builder.index.links.append(href)
+
+
+def _visit_form(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+    builder.index.form_onsubmit.append(_attr(attrs, "onsubmit"))
+
+
+def _visit_form_control(tag: str) -> Callable[["DomIndexBuilder", Mapping[str, Any]], None]:
+    def visit(builder: "DomIndexBuilder", attrs: Mapping[str, Any]) -> None:
+        builder.index.form_controls.append(
+            FormControl(
+                tag,
+                _attr(attrs, "type").lower(),
+                _attr(attrs, "id"),
+                _attr(attrs, "name"),
+                _attr(attrs, "autocomplete").lower(),
+                _attr(attrs, "aria-invalid").lower(),
+                _attr(attrs, "aria-label"),
+                _attr(attrs, "aria-labelledby"),
+                builder.inside("label"),
+            )
+        )
+
+    return visit
+
+
+def _end_label(builder: "DomIndexBuilder", attrs: Mapping[str, Any], text: str) -> None:
+    target = _attr(attrs, "for")
+    if target:
+        builder.index.labels[target] = text
+
+
+def _end_button(builder: "DomIndexBuilder", attrs: Mapping[str, Any], text: str) -> None:
+    builder.index.button_labels.append(text.lower())
+
+
+def _end_link(builder: "DomIndexBuilder", attrs: Mapping[str, Any], text: str) -> None:
+    if _HELP_LINK_TEXT.search(text):
+        builder.index.help_links.append(text)
+
+
+def _end_title(builder: "DomIndexBuilder", attrs: Mapping[str, Any], text: str) -> None:
+    if not builder.index.title:
+        builder.index.title = text
+
+
+_START_VISITORS: Dict[str, Callable[["DomIndexBuilder", Mapping[str, Any]], None]] = {
+    "html": _visit_html,
+    "meta": _visit_meta,
+    "video": _visit_media,
+    "audio": _visit_media,
+    "marquee": _visit_marquee,
+    "nav": _visit_nav,
+    "ruby": _visit_ruby,
+    "phoneme": _visit_phoneme,
+    "a": _visit_link,
+    "form": _visit_form,
+    **{tag: _visit_form_control(tag) for tag in _FORM_CONTROL_TAGS},
+}
+
+_END_VISITORS: Dict[str, Callable[["DomIndexBuilder", Mapping[str, Any], str], None]] = {
+    "a": _end_link,
+    "button": _end_button,
+    "label": _end_label,
+    "title": _end_title,
+}
+
+
+class DomIndexBuilder:
+    """Consumes start / data / end events and fills a ``DomIndex``."""
+
+    def __init__(self):
+        self.index = DomIndex()
+        self._captures: List[Tuple[str, Mapping[str, Any], List[str]]] = []
+        self._hidden_depth = 0
+        self._text: List[str] = []
+        self._langs: List[str] = [""]
+        # Text of the open inline <script>, scanned for timers when it closes.
+        self._script: Optional[List[str]] = None
+        self._blocks: List[Tuple[str, str, List[str]]] = []
+
+    def inside(self, tag: str) -> bool:
+        """Whether an element of *tag* that captures text is currently open."""
+        return any(open_tag == tag for open_tag, _, _ in self._captures)
+
+    @property
+    def splittable(self) -> bool:
+        """Whether a subtree starting here can be indexed on its own and merged back (``adopt``).
+
+        A fragment is indexed by a fresh builder, so nothing may be open whose
+        context changes what its elements record (captured text or hidden
+        content).
+        """
+        return not self._captures and not self._hidden_depth
+
+    def adopt(self, fragment: DomIndex, fingerprint: str, kind: str) -> None:
+        """Merge the index of a complete block-level subtree that closes here instead of visiting it."""
+        self.index.merge(fragment, lang=self._langs[-1], template=fingerprint)
+        self.index.templates[fingerprint] = kind
+        self._text.append(fragment.visible_text)
+
+    def start(self, tag: str, attrs: Mapping[str, Any]) -> None:
+        index = self.index
+        index.element_count += 1
+        visitor = _START_VISITORS.get(tag)
+        if visitor is not None:
+            visitor(self, attrs)
+
+        # Attribute-driven features apply to any element.
+        if tag != "html" and "lang" in attrs:
+            index.lang_elements.append((tag, _attr(attrs, "lang").lower()))
+        if "onfocus" in attrs:
+            index.focus_handlers.append(_attr(attrs, "onfocus"))
+        if "oninput" in attrs or "onchange" in attrs:
+            index.input_handlers.append(" ".join(filter(None, (_attr(attrs, "oninput"), _attr(attrs, "onchange")))))
+        if any(name.startswith("on") and _TIMER_CALL.search(value or "") for name, value in attrs.items()):
+            index.timer_scripts += 1
+        if "aria-describedby" in attrs:
+            index.described_by_count += 1
+        if any("error" in (value or "").lower() for value in attrs.values()):
+            index.error_hints += 1
+        if tag != "nav" and _attr(attrs, "role").lower() == "navigation":
+            index.nav_landmarks += 1
+
+        lang = _attr(attrs, "lang").lower() if "lang" in attrs else self._langs[-1]
+        self._langs.append(lang)
+        if tag in _BLOCK_TAGS:
+            self._blocks.append((tag, lang, []))
+
+        if tag in _HIDDEN_TAGS:
+            self._hidden_depth += 1
+        if tag == "script":
+            self._script = []
+        if tag in _CAPTURE_TAGS:
+            self._captures.append((tag, attrs, []))
+
+    def data(self, text: str) -> None:
+        # Error messages are often kept in scripts or hidden templates until shown.
+        if "error" in text.lower():
+            self.index.error_hints += 1
+        if self._hidden_depth:
+            if self._script is not None:
+                self._script.append(text)
+            return
+        self._text.append(text)
+        if self._blocks:
+            self._blocks[-1][2].append(text)
+        if self._captures:
+            stripped = text.strip()
+            if stripped:
+                for _, _, pieces in self._captures:
+                    pieces.append(stripped)
+
+    def end(self, tag: str) -> None:
+        if len(self._langs) > 1:
+            self._langs.pop()
+        if tag == "script" and self._script is not None:
+            if _TIMER_CALL.search("".join(self._script)):
+                self.index.timer_scripts += 1
+            self._script = None
+        if tag in _BLOCK_TAGS and self._blocks and self._blocks[-1][0] == tag:
+            _, lang, pieces = self._blocks.pop()
+            text = _WHITESPACE.sub(" ", " ".join(pieces)).strip()
+            if text:
+                self.index.text_blocks.append(TextBlock(tag, lang, text))
+        if tag in _HIDDEN_TAGS and self._hidden_depth:
+            self._hidden_depth -= 1
+        if tag in _CAPTURE_TAGS and self._captures and self._captures[-1][0] == tag:
+            _, attrs, pieces = self._captures.pop()
+            _END_VISITORS[tag](self, attrs, "".join(pieces))
+
+    def finish(self) -> DomIndex:
+        self.index.visible_text = _WHITESPACE.sub(" ", " ".join(self._text)).strip()
+        self._text = []
+        return self.index
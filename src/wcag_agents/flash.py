@@ -0,0 +1,302 @@
+"""Photosensitive flash analysis for 2.3.1 Three Flashes or Below Threshold and 2.3.2 Three Flashes.
+
+The page is recorded through the Chrome DevTools screencast (Chromium only
+sends a frame when the rendering changes, each with its own timestamp) in a
+1024×768 viewport, which is the viewing geometry WCAG's "341 × 256 pixel"
+10-degree area is defined for. Frames are analysed in stacks:
+
+* every frame becomes relative luminance (and a saturated-red value,
+  ``(R − G − B) × 320`` where ``R / (R + G + B) ≥ 0.8``) through lookup tables;
+* consecutive-frame differences are reduced to per-cell counts and sums of the
+  pixels getting brighter or darker, and a summed-area table gives the same
+  numbers for every 341×256 area on the cell grid in one pass;
+* per area, the signed change is accumulated across frames until it reaches
+  the transition threshold (10 % luminance where the darker frame is below
+  0.80, or 20 on the red scale) while at least 25 % of the area takes part;
+  a flash is a pair of opposing transitions.
+
+A failure is more than three flashes in any one second, in any one area
+(2.3.1 general and red flash) or anywhere at all regardless of size (2.3.2).
+
+Configuration (environment variables)::
+
+    WCAG_FLASH_SECONDS    seconds of rendering recorded per page (default 5)
+"""
+
+import asyncio
+import base64
+import io
+import os
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+RECORD_SECONDS = float(os.getenv("WCAG_FLASH_SECONDS", "5"))
+VIEWPORT = (1024, 768)
+# Frames are scaled down by Chromium before they are sent; flashes are area
+# effects, so half resolution loses nothing that matters here.
+FRAME_SIZE = (512, 384)
+FRAME_QUALITY = 80
+
+# WCAG 2.3.1 thresholds.
+MAX_FLASHES_PER_SECOND = 3
+LUMINANCE_TRANSITION = 0.10
+DARK_LIMIT = 0.80
+RED_TRANSITION = 20.0
+RED_SATURATION = 0.8
+AREA_FRACTION = 0.25
+# 341×256 px of a 1024×768 viewport.
+AREA_SIZE = (341 / 1024, 256 / 768)
+
+# Per-frame changes smaller than this are encoding noise, not motion.
+LUMINANCE_NOISE = 0.01
+RED_NOISE = 2.0
+CELL = 8
+# Frames analysed per stack; bounds the working set (about 40 MB at 512×384).
+STACK_FRAMES = 16
+
+
+def _srgb_table() -> np.ndarray:
+    c = np.arange(256, dtype=np.float64) / 255.0
+    return np.where(c <= 0.03928, c / 12.92, ((c + 0.055) / 1.055) ** 2.4).astype(np.float32)
+
+
+_LINEAR = _srgb_table()
+_LUMA = (0.2126 * _LINEAR, 0.7152 * _LINEAR, 0.0722 * _LINEAR)
+
+
+def relative_luminance(rgb: np.ndarray) -> np.ndarray:
+    """WCAG relative luminance of (..., 3) uint8 sRGB pixels, as float32."""
+    return np.take(_LUMA[0], rgb[..., 0]) + np.take(_LUMA[1], rgb[..., 1]) + np.take(_LUMA[2], rgb[..., 2])
+
+
+class FlashReport(NamedTuple):
+    frames: int
+    seconds: float
+    general_flashes: float  # most general flashes in any one second, in any one 341×256 area
+    red_flashes: float  # most red flashes in any one second, in any one 341×256 area
+    any_flashes: float  # most flashes in any one second at any size (2.3.2)
+    first_failure: Optional[float]  # seconds into the recording of the first 2.3.1 failure
+
+    @property
+    def general_fail(self) -> bool:
+        return self.general_flashes > MAX_FLASHES_PER_SECOND
+
+    @property
+    def red_fail(self) -> bool:
+        return self.red_flashes > MAX_FLASHES_PER_SECOND
+
+    @property
+    def any_fail(self) -> bool:
+        return self.any_flashes > MAX_FLASHES_PER_SECOND
+
+
+class _Transitions:
+    """Transition state of every area for one signal, advanced one frame pair at a time."""
+
+    def __init__(self, areas: int, threshold: float):
+        self.threshold = threshold
+        self.accumulated = np.zeros(areas, dtype=np.float32)
+        self.direction = np.zeros(areas, dtype=np.int8)
+        self.hits: List[np.ndarray] = []
+
+    def advance(self, changes: np.ndarray) -> None:
+        """*changes* is (pairs, areas): the signed change of each area per frame pair (0 when too small)."""
+        for change in changes:
+            reversed_ = (change != 0) & (np.sign(change) != np.sign(self.accumulated)) & (self.accumulated != 0)
+            self.accumulated = np.where(reversed_, change, self.accumulated + change)
+            sign = np.sign(self.accumulated).astype(np.int8)
+            hit = (np.abs(self.accumulated) >= self.threshold) & (sign != self.direction)
+            self.direction = np.where(hit, sign, self.direction)
+            self.hits.append(hit)
+
+    def max_flashes(self, times: np.ndarray) -> Tuple[float, Optional[float]]:
+        """Most flashes in any one-second span of any area, and when the first failing span starts."""
+        if not self.hits:
+            return 0.0, None
+        hits = np.stack(self.hits)
+        counts = np.zeros((hits.shape[0] + 1, hits.shape[1]), dtype=np.int32)
+        np.cumsum(hits, axis=0, out=counts[1:])
+        end = np.searchsorted(times, times + 1.0, side="left")
+        per_second = (counts[end] - counts[:-1]).max(axis=1)
+        failing = np.flatnonzero(per_second > 2 * MAX_FLASHES_PER_SECOND)
+        first = float(times[failing[0]]) if failing.size else None
+        return int(per_second.max()) / 2.0, first
+
+
+def _cells(values: np.ndarray, gh: int, gw: int) -> np.ndarray:
+    # Two single-axis reductions are several times faster than one over (2, 4).
+    n = values.shape[0]
+    dtype = np.int32 if values.dtype == np.bool_ else np.float32
+    rows = values[:, : gh * CELL, : gw * CELL].reshape(n, gh, CELL, gw * CELL).sum(axis=2, dtype=dtype)
+    return rows.reshape(n, gh, gw, CELL).sum(axis=3, dtype=np.float64)
+
+
+def _areas(cells: np.ndarray, ah: int, aw: int) -> np.ndarray:
+    """Sums over every ah×aw block of cells (stride one cell), flattened to (n, areas)."""
+    n, gh, gw = cells.shape
+    table = np.zeros((n, gh + 1, gw + 1), dtype=np.float64)
+    table[:, 1:, 1:] = cells.cumsum(axis=1).cumsum(axis=2)
+    sums = table[:, ah:, aw:] - table[:, :-ah, aw:] - table[:, ah:, :-aw] + table[:, :-ah, :-aw]
+    return sums.reshape(n, -1)
+
+
+class _Signal:
+    """Per-cell brightening / darkening statistics of one signal for a stack of frame pairs."""
+
+    def __init__(self, delta: np.ndarray, noise: float, gate: Optional[np.ndarray], gh: int, gw: int):
+        up = delta > noise
+        down = delta < -noise
+        if gate is not None:
+            up &= gate
+            down &= gate
+        self.up_count = _cells(up, gh, gw)
+        self.up_sum = _cells(delta * up, gh, gw)
+        self.down_count = _cells(down, gh, gw)
+        self.down_sum = _cells(delta * down, gh, gw)
+
+    def changes(self, ah: int, aw: int) -> np.ndarray:
+        """Signed mean change of each area, where at least ``AREA_FRACTION`` of it changes one way."""
+        minimum = AREA_FRACTION * ah * aw * CELL * CELL
+        up_count, down_count = _areas(self.up_count, ah, aw), _areas(self.down_count, ah, aw)
+        up = _areas(self.up_sum, ah, aw) / np.maximum(up_count, 1)
+        down = _areas(self.down_sum, ah, aw) / np.maximum(down_count, 1)
+        rising = (up_count >= minimum) & (up_count >= down_count)
+        falling = (down_count >= minimum) & ~rising
+        return np.where(rising, up, np.where(falling, down, 0)).astype(np.float32)
+
+
+class FlashAnalyzer:
+    """Streams RGB frame stacks through the 2.3.1 / 2.3.2 flash measurements."""
+
+    def __init__(self, height: int, width: int):
+        self.gh, self.gw = height // CELL, width // CELL
+        if not self.gh or not self.gw:
+            raise ValueError(f"frames of {width}x{height} px are too small to analyse")
+        self.ah = min(self.gh, max(1, round(height * AREA_SIZE[1] / CELL)))
+        self.aw = min(self.gw, max(1, round(width * AREA_SIZE[0] / CELL)))
+        areas = (self.gh - self.ah + 1) * (self.gw - self.aw + 1)
+        self.general = _Transitions(areas, LUMINANCE_TRANSITION)
+        self.red = _Transitions(areas, RED_TRANSITION)
+        self.anywhere = _Transitions(self.gh * self.gw, LUMINANCE_TRANSITION)
+        self._previous: Optional[Tuple[np.ndarray, Optional[np.ndarray]]] = None
+        self._times: List[float] = []
+        self.frames = 0
+
+    @staticmethod
+    def _signals(rgb: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Relative luminance and saturated-red value per pixel (red is None when a stack has none)."""
+        r, g, b = (np.ascontiguousarray(rgb[..., channel]) for channel in range(3))
+        weighted = [np.take(table, channel) for table, channel in zip(_LUMA, (r, g, b))]
+        luminance = weighted[0] + weighted[1] + weighted[2]
+        # A saturated red needs R well above G and B; most frames have no such pixel at all.
+        if not ((r > g) & (r > b)).any():
+            return luminance, None
+        lr, lg, lb = weighted[0] / 0.2126, weighted[1] / 0.7152, weighted[2] / 0.0722
+        saturated = lr >= RED_SATURATION * (lr + lg + lb + 1e-6)
+        red = np.where(saturated, np.maximum(lr - lg - lb, 0) * 320, 0).astype(np.float32)
+        return luminance, red
+
+    def feed(self, frames: np.ndarray, times: Sequence[float]) -> None:
+        """Add a stack of frames, (n, height, width, 3) uint8, shown at *times* seconds."""
+        if not len(frames):
+            return
+        luminance, red = self._signals(frames)
+        if self._previous is not None:
+            previous_luminance, previous_red = self._previous
+            luminance = np.concatenate([previous_luminance, luminance])
+            if red is not None or previous_red is not None:
+                red = np.concatenate([
+                    previous_red if previous_red is not None else np.zeros_like(previous_luminance),
+                    red if red is not None else np.zeros_like(luminance[1:]),
+                ])
+        self._previous = (luminance[-1:], red[-1:] if red is not None else None)
+        self._times.extend(float(t) for t in times)
+        self.frames += len(frames)
+        if len(luminance) < 2:
+            return
+
+        delta = np.diff(luminance, axis=0)
+        darker = np.minimum(luminance[1:], luminance[:-1]) < DARK_LIMIT
+        general = _Signal(delta, LUMINANCE_NOISE, darker, self.gh, self.gw)
+        self.general.advance(general.changes(self.ah, self.aw))
+        self.anywhere.advance(general.changes(1, 1))
+        if red is None:
+            self.red.advance(np.zeros((len(delta), self.red.accumulated.size), dtype=np.float32))
+        else:
+            self.red.advance(_Signal(np.diff(red, axis=0), RED_NOISE, None, self.gh, self.gw).changes(self.ah, self.aw))
+
+    def finish(self) -> FlashReport:
+        times = np.asarray(self._times[1:], dtype=np.float64)
+        start = self._times[0] if self._times else 0.0
+        general, first_general = self.general.max_flashes(times)
+        red, first_red = self.red.max_flashes(times)
+        anywhere, _ = self.anywhere.max_flashes(times)
+        failures = [t - start for t in (first_general, first_red) if t is not None]
+        seconds = self._times[-1] - start if self._times else 0.0
+        return FlashReport(self.frames, round(seconds, 3), general, red, anywhere, min(failures, default=None))
+
+
+def analyze(frames: Iterable[Tuple[float, np.ndarray]]) -> FlashReport:
+    """Measure a sequence of ``(timestamp, frame)`` pairs, frames as (height, width, 3) uint8."""
+    analyzer: Optional[FlashAnalyzer] = None
+    stack: List[np.ndarray] = []
+    times: List[float] = []
+    for timestamp, frame in frames:
+        if analyzer is None:
+            analyzer = FlashAnalyzer(*frame.shape[:2])
+            shape = frame.shape
+        elif frame.shape != shape:
+            continue  # a resize mid-recording; the areas no longer line up
+        stack.append(frame)
+        times.append(timestamp)
+        if len(stack) == STACK_FRAMES:
+            analyzer.feed(np.stack(stack), times)
+            stack, times = [], []
+    if analyzer is None:
+        return FlashReport(0, 0.0, 0.0, 0.0, 0.0, None)
+    analyzer.feed(np.stack(stack) if stack else np.empty((0,)), times)
+    return analyzer.finish()
+
+# ===================== Recording =====================
+
+class Recording(NamedTuple):
+    viewport: Tuple[int, int]
+    frames: List[Tuple[float, bytes]]  # (timestamp in seconds, JPEG bytes), in display order
+
+
+async def record(page, url: str, seconds: float = RECORD_SECONDS) -> Recording:
+    """Load *url* in a 1024×768 viewport and screencast its rendering for *seconds*."""
+    await page.set_viewport_size({"width": VIEWPORT[0], "height": VIEWPORT[1]})
+    cdp = await page.context.new_cdp_session(page)
+    frames: List[Tuple[float, bytes]] = []
+    acks = set()
+
+    def on_frame(event) -> None:
+        frames.append((event["metadata"]["timestamp"], base64.b64decode(event["data"])))
+        ack = asyncio.ensure_future(cdp.send("Page.screencastFrameAck", {"sessionId": event["sessionId"]}))
+        acks.add(ack)
+        ack.add_done_callback(acks.discard)
+
+    cdp.on("Page.screencastFrame", on_frame)
+    await cdp.send(
+        "Page.startScreencast",
+        {"format": "jpeg", "quality": FRAME_QUALITY, "maxWidth": FRAME_SIZE[0], "maxHeight": FRAME_SIZE[1]},
+    )
+    try:
+        await page.goto(url, wait_until="load")
+        await asyncio.sleep(seconds)
+    finally:
+        await cdp.send("Page.stopScreencast")
+        await asyncio.gather(*acks, return_exceptions=True)
+        await cdp.detach()
+    return Recording(VIEWPORT, frames)
+
+
+def decode(recording: Recording) -> Iterable[Tuple[float, np.ndarray]]:
+    """Decode the recorded JPEG frames lazily, one at a time."""
+    from PIL import Image  # type: ignore
+
+    for timestamp, data in recording.frames:
+        with Image.open(io.BytesIO(data)) as image:
+            yield timestamp, np.asarray(image.convert("RGB"))
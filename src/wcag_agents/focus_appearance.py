@@ -0,0 +1,206 @@
+"""Focus indicator measurement for 2.4.7 Focus Visible and 2.4.13 Focus Appearance.
+
+Every visible tab stop (up to ``MAX_ELEMENTS``) is photographed twice in one
+browser session: the same clip around the element, once unfocused and once
+focused. The clip extends a few pixels past the element so outlines and
+offset rings are included. The two screenshots are then compared as NumPy
+arrays:
+
+* the *indicator* is the set of pixels that changed between the two states and
+  whose relative luminance changed by a contrast ratio of at least 3:1;
+* 2.4.13 needs the indicator to be at least as large as a 2 CSS px thick
+  perimeter of the unfocused element;
+* the indicator should also contrast 3:1 with the unchanged colors adjacent to
+  it (the colors it is seen against).
+
+Elements with no changed pixel at all have no visible focus indicator (2.4.7).
+
+Configuration (environment variables)::
+
+    WCAG_FOCUS_MAX_ELEMENTS    tab stops photographed per page (default 100)
+    WCAG_FOCUS_BUDGET          seconds per page for the captures (default 20)
+"""
+
+import io
+import os
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .flash import relative_luminance
+
+MAX_ELEMENTS = int(os.getenv("WCAG_FOCUS_MAX_ELEMENTS", "100"))
+FOCUS_BUDGET = float(os.getenv("WCAG_FOCUS_BUDGET", "20"))
+# CSS px captured around each element for outlines drawn outside its box.
+MARGIN = 6
+MIN_CONTRAST = 3.0
+# Channel differences up to this are rendering noise (anti-aliasing, subpixel text).
+CHANGE_NOISE = 4
+# Anti-aliased ring edges fall just short of the exact perimeter area.
+AREA_TOLERANCE = 0.9
+# Unchanged pixels within this distance of the indicator are its adjacent colors.
+ADJACENT_PX = 2
+EXAMPLE_LIMIT = 10
+
+_COLLECT_SCRIPT = r"""
+(limit) => {
+  const found = [...document.querySelectorAll(
+    'a[href], area[href], button, input:not([type=hidden]), select, textarea, summary, [contenteditable=""], [contenteditable=true], [tabindex]'
+  )].filter((el) => el.tabIndex >= 0 && !el.disabled && el.getClientRects().length
+    && getComputedStyle(el).visibility === 'visible');
+  window.__wcagFocusTargets = found.slice(0, limit);
+  return found.length;
+}
+"""
+
+# Blur whatever has focus and bring target *i* into view; returns its viewport rect.
+_PREPARE_SCRIPT = r"""
+(i) => {
+  if (document.activeElement && document.activeElement.blur) document.activeElement.blur();
+  const el = window.__wcagFocusTargets[i];
+  el.scrollIntoView({ block: 'center', inline: 'center' });
+  const r = el.getBoundingClientRect();
+  return [r.left, r.top, r.width, r.height, innerWidth, innerHeight];
+}
+"""
+
+_FOCUS_SCRIPT = r"""
+(i) => {
+  const el = window.__wcagFocusTargets[i];
+  el.focus({ preventScroll: true, focusVisible: true });
+  return document.activeElement === el;
+}
+"""
+
+_DESCRIBE_SCRIPT = r"""
+(indices) => indices.map((i) => {
+  const el = window.__wcagFocusTargets[i];
+  let text = el.tagName.toLowerCase();
+  if (el.id) text += '#' + el.id;
+  const label = (el.getAttribute('aria-label') || el.textContent || el.value || '').trim().replace(/\s+/g, ' ');
+  return label ? `${text} "${label.slice(0, 40)}"` : text;
+})
+"""
+
+
+class Shot(NamedTuple):
+    index: int  # position among the collected tab stops
+    size: Tuple[float, float]  # the element's CSS width and height
+    unfocused: bytes  # PNG of the clip before focus
+    focused: bytes  # PNG of the same clip with the element focused
+
+
+class FocusCapture(NamedTuple):
+    tabbable: int  # tab stops in the page
+    shots: List[Shot]
+    descriptions: List[str]  # per collected tab stop, for examples
+    complete: bool  # every tab stop was photographed within the limit and budget
+
+
+class ElementMetrics(NamedTuple):
+    changed: int  # pixels that differ between the states
+    indicator: int  # changed pixels whose luminance changed by >= 3:1
+    required: float  # area of a 2 CSS px perimeter of the element
+    adjacent_contrast: Optional[float]  # indicator vs its unchanged surroundings
+
+
+class FocusReport(NamedTuple):
+    tabbable: int
+    measured: int
+    invisible: List[str]  # no focus indicator at all (2.4.7)
+    insufficient: List[str]  # indicator too small or too little change of contrast (2.4.13)
+    low_adjacent: List[str]  # indicator under 3:1 against adjacent colors
+    complete: bool
+
+
+async def capture(page, url: str, limit: int = MAX_ELEMENTS, budget: float = FOCUS_BUDGET) -> FocusCapture:
+    """Photograph each tab stop of *url* unfocused and focused, all in this one page."""
+    deadline = time.monotonic() + budget
+    await page.goto(url, wait_until="load")
+    # A key press first, so later script focus is treated as keyboard focus (:focus-visible).
+    await page.keyboard.press("Shift")
+    tabbable = await page.evaluate(_COLLECT_SCRIPT, limit)
+    collected = min(tabbable, limit)
+    shots: List[Shot] = []
+    options = {"type": "png", "animations": "disabled", "caret": "hide", "scale": "css"}
+    complete = collected == tabbable
+    for i in range(collected):
+        if time.monotonic() > deadline:
+            complete = False
+            break
+        left, top, width, height, view_w, view_h = await page.evaluate(_PREPARE_SCRIPT, i)
+        x0, y0 = max(0.0, left - MARGIN), max(0.0, top - MARGIN)
+        x1, y1 = min(view_w, left + width + MARGIN), min(view_h, top + height + MARGIN)
+        if x1 - x0 < 1 or y1 - y0 < 1:
+            continue
+        clip = {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0}
+        unfocused = await page.screenshot(clip=clip, **options)
+        if not await page.evaluate(_FOCUS_SCRIPT, i):
+            continue
+        focused = await page.screenshot(clip=clip, **options)
+        shots.append(Shot(i, (width, height), unfocused, focused))
+    descriptions = await page.evaluate(_DESCRIBE_SCRIPT, list(range(collected))) if collected else []
+    return FocusCapture(tabbable, shots, descriptions, complete)
+
+
+def _decode(data: bytes) -> np.ndarray:
+    from PIL import Image  # type: ignore
+
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def _contrast(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (np.maximum(a, b) + 0.05) / (np.minimum(a, b) + 0.05)
+
+
+def _dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    grown = mask.copy()
+    for _ in range(radius):
+        step = grown.copy()
+        step[1:, :] |= grown[:-1, :]
+        step[:-1, :] |= grown[1:, :]
+        step[:, 1:] |= grown[:, :-1]
+        step[:, :-1] |= grown[:, 1:]
+        grown = step
+    return grown
+
+
+def measure(unfocused: np.ndarray, focused: np.ndarray, size: Tuple[float, float]) -> ElementMetrics:
+    """Compare the two states of one element's clip (both (h, w, 3) uint8)."""
+    h = min(unfocused.shape[0], focused.shape[0])
+    w = min(unfocused.shape[1], focused.shape[1])
+    before, after = unfocused[:h, :w], focused[:h, :w]
+    changed = (np.abs(after.astype(np.int16) - before.astype(np.int16)).max(axis=2)) > CHANGE_NOISE
+    lum_before, lum_after = relative_luminance(before), relative_luminance(after)
+    indicator = changed & (_contrast(lum_after, lum_before) >= MIN_CONTRAST)
+    width, height = size
+    # Area of a 2 px thick perimeter: the box minus the box inset by 2 px on every side.
+    required = width * height - max(width - 4, 0) * max(height - 4, 0)
+
+    adjacent_contrast = None
+    if indicator.any():
+        adjacent = _dilate(indicator, ADJACENT_PX) & ~changed
+        if adjacent.any():
+            adjacent_contrast = float(
+                _contrast(np.median(lum_after[indicator]), np.median(lum_after[adjacent]))
+            )
+    return ElementMetrics(int(changed.sum()), int(indicator.sum()), float(required), adjacent_contrast)
+
+
+def analyze(captured: FocusCapture) -> FocusReport:
+    """Measure every captured element; lists hold the descriptions of the failing ones."""
+    invisible: List[str] = []
+    insufficient: List[str] = []
+    low_adjacent: List[str] = []
+    for shot in captured.shots:
+        metrics = measure(_decode(shot.unfocused), _decode(shot.focused), shot.size)
+        label = captured.descriptions[shot.index] if shot.index < len(captured.descriptions) else str(shot.index)
+        if not metrics.changed:
+            invisible.append(label)
+        elif metrics.indicator < AREA_TOLERANCE * metrics.required:
+            insufficient.append(label)
+        elif metrics.adjacent_contrast is not None and metrics.adjacent_contrast < MIN_CONTRAST:
+            low_adjacent.append(label)
+    return FocusReport(captured.tabbable, len(captured.shots), invisible, insufficient, low_adjacent, captured.complete)
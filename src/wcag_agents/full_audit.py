@@ -0,0 +1,84 @@
+"""Deterministic full audit: every specialist check at once, one merged result.
+
+Routing a bare URL through the coordinators costs one LLM round trip per
+specialist hop. ``run_full_audit`` instead fetches the page once, runs the
+checks of all eight specialist agents concurrently and returns a single merged
+result, so the root agent only has to summarise once.
+"""
+
+import asyncio
+from collections import Counter
+from typing import Any, Callable, Dict, Tuple
+
+from . import async_tools, tools
+from .results import issues as result_issues
+from .http_pool import get_snapshot_async
+from .metrics import profile_audit
+from .snapshot import audit_scope
+
+# The default tools of each specialist agent, grouped by WCAG principle.
+SPECIALIST_CHECKS: Dict[str, Dict[str, Tuple[Callable[[str], Any], ...]]] = {
+    "operable": {
+        "KeyboardAccessibilityAgent": (async_tools.test_keyboard_accessibility,),
+        "TimingControlsAgent": (async_tools.test_timing_controls,),
+        "SeizurePreventionAgent": (async_tools.test_seizure_prevention,),
+        "NavigationStructureAgent": (
+            tools.test_navigation_structure,
+            async_tools.test_focus_not_obscured,
+            async_tools.test_focus_appearance,
+        ),
+        "InputModalitiesAgent": (
+            async_tools.test_input_modalities,
+            tools.test_dragging_movements,
+            async_tools.test_target_size_minimum,
+        ),
+    },
+    "understandable": {
+        "ReadableAgent": (async_tools.test_readability,),
+        "PredictableAgent": (async_tools.test_predictability,),
+        "InputAssistanceAgent": (async_tools.test_input_assistance,),
+    },
+}
+
+async def _run_check(check: Callable[[str], Any], url: str) -> Dict[str, Any]:
+    try:
+        if asyncio.iscoroutinefunction(check):
+            return await check(url)
+        return await asyncio.to_thread(check, url)
+    except Exception as exc:
+        return {"url": url, "status": "ERROR", "error": str(exc)}
+
+
+async def run_full_audit(url: str) -> Dict[str, Any]:
+    """Run every WCAG 2.x (Operable) and 3.x (Understandable) specialist check concurrently
+    and return one merged result grouped by principle and specialist agent, with a summary
+    of statuses and the issues found.
+    """
+    url = tools._normalize_url(url)
+    with audit_scope(), profile_audit(f"full_audit-{url}"):
+        try:
+            await get_snapshot_async(url)
+        except Exception:
+            # Each check reports the fetch failure in its own result.
+            pass
+        jobs = [
+            (principle, agent, check)
+            for principle, agents in SPECIALIST_CHECKS.items()
+            for agent, checks in agents.items()
+            for check in checks
+        ]
+        results = await asyncio.gather(*(_run_check(check, url) for _, _, check in jobs))
+
+    merged: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    statuses: Counter = Counter()
+    issues = []
+    for (principle, agent, check), result in zip(jobs, results):
+        merged.setdefault(principle, {}).setdefault(agent, {})[check.__name__] = result
+        statuses[result.get("status", "UNKNOWN")] += 1
+        issues.extend(result_issues(result, prefix=f"{check.__name__}."))
+
+    return {
+        "url": url,
+        "results": merged,
+        "summary": {"checks_run": len(jobs), "status_counts": dict(statuses), "issues": issues},
+    }
@@ -0,0 +1,210 @@
+"""Rendered geometry of interactive targets for 2.5.8 Target Size (Minimum) and 2.5.5 Target Size (Enhanced).
+
+One in-page script call collects the bounding box of every visible
+interactive element as a flat array (``x, y, width, height, flags`` per
+target, in page coordinates). Targets nested inside another target are left
+out, since the outer element is what the pointer hits. Evaluation is
+vectorised:
+
+* undersized targets are the ones under 24×24 CSS px, except inline links in
+  running text (the "Inline" exception);
+* the spacing exception draws a 24 px circle on each undersized target's
+  centre; it fails if the circle intersects another target or the circle of
+  another undersized target. Candidate neighbours come from ``GridIndex``, a
+  uniform grid over the boxes, so each target is compared with the few boxes
+  near it rather than with all of them.
+
+Measurements are kept per URL for a few minutes, so the 2.5.5 part of
+``test_input_modalities`` and ``test_target_size_minimum`` share one render.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+MIN_TARGET = 24.0
+ENHANCED_TARGET = 44.0
+# Grid cell edge in CSS px; a 2.5.8 neighbourhood query then touches at most 2×2 cells.
+GRID_CELL = 64.0
+# Rectangles covering more cells than this (page-sized click handlers) are
+# paired with everything directly instead of being spread over the grid.
+GRID_MAX_CELLS = 1024
+EXAMPLE_LIMIT = 10
+GEOMETRY_TTL = 300
+GEOMETRY_LIMIT = 16
+
+# Target flags.
+INLINE = 1
+
+_TARGETS_SCRIPT = r"""
+() => {
+  const selector = [
+    'a[href]', 'area[href]', 'button', 'input:not([type=hidden])', 'select', 'textarea', 'summary',
+    '[tabindex]:not([tabindex="-1"])', '[onclick]', '[contenteditable=""]', '[contenteditable=true]',
+    '[role=button]', '[role=link]', '[role=checkbox]', '[role=radio]', '[role=switch]', '[role=tab]',
+    '[role=menuitem]', '[role=menuitemcheckbox]', '[role=menuitemradio]', '[role=option]',
+    '[role=slider]', '[role=spinbutton]', '[role=treeitem]',
+  ].join(',');
+  const sx = window.scrollX, sy = window.scrollY;
+  const kept = [], boxes = [];
+  for (const el of document.querySelectorAll(selector)) {
+    if (el.parentElement && el.parentElement.closest(selector)) continue;
+    const r = el.getBoundingClientRect();
+    if (!r.width || !r.height) continue;
+    const style = getComputedStyle(el);
+    if (style.visibility !== 'visible' || style.pointerEvents === 'none') continue;
+    let flags = 0;
+    if (style.display === 'inline') {
+      for (let node = el.parentNode.firstChild; node; node = node.nextSibling) {
+        if (node.nodeType === 3 && node.data.trim()) { flags |= 1; break; }
+      }
+    }
+    kept.push(el);
+    boxes.push(r.left + sx, r.top + sy, r.width, r.height, flags);
+  }
+  window.__wcagTargets = kept;
+  return boxes;
+}
+"""
+
+_DESCRIBE_SCRIPT = r"""
+(indices) => indices.map((i) => {
+  const el = window.__wcagTargets[i];
+  let text = el.tagName.toLowerCase();
+  if (el.id) text += '#' + el.id;
+  const label = (el.getAttribute('aria-label') || el.textContent || el.value || '').trim().replace(/\s+/g, ' ');
+  return label ? `${text} "${label.slice(0, 40)}"` : text;
+})
+"""
+
+
+class GridIndex:
+    """Uniform grid over axis-aligned boxes answering "which boxes overlap this rectangle"."""
+
+    def __init__(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray, cell: float = GRID_CELL):
+        self.cell = cell
+        self.size = len(x0)
+        owner, keys, self.large = self._cells(x0, y0, x1, y1)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._owners = owner[order]
+
+    def _cells(self, x0, y0, x1, y1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Expand every rectangle into the cells it covers: (rectangle, cell key) pairs plus oversized rectangles."""
+        gx0, gy0 = np.floor(x0 / self.cell).astype(np.int64), np.floor(y0 / self.cell).astype(np.int64)
+        gx1, gy1 = np.floor(x1 / self.cell).astype(np.int64), np.floor(y1 / self.cell).astype(np.int64)
+        nx, ny = gx1 - gx0 + 1, gy1 - gy0 + 1
+        spans = nx * ny
+        large = np.flatnonzero(spans > GRID_MAX_CELLS)
+        spans[large] = 0
+        owner = np.repeat(np.arange(len(x0)), spans)
+        local = np.arange(owner.size) - np.repeat(np.cumsum(spans) - spans, spans)
+        # Cell coordinates fit in 31 bits each; shift to non-negative and pack into one int64.
+        cx = gx0[owner] + local % nx[owner] + (1 << 30)
+        cy = gy0[owner] + local // nx[owner] + (1 << 30)
+        return owner, (cx << 31) | cy, large
+
+    def query(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Candidate ``(query, box)`` index pairs whose rectangles may overlap (a pair may repeat)."""
+        queries, keys, large_queries = self._cells(x0, y0, x1, y1)
+        lo = np.searchsorted(self._keys, keys, side="left")
+        counts = np.searchsorted(self._keys, keys, side="right") - lo
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        found_q = [np.repeat(queries, counts)]
+        found_b = [self._owners[starts + np.arange(counts.sum())]]
+        # Oversized rectangles on either side are paired with everything on the other.
+        for box in self.large:
+            found_q.append(np.arange(len(x0)))
+            found_b.append(np.full(len(x0), box))
+        for query in large_queries:
+            found_q.append(np.full(self.size, query))
+            found_b.append(np.arange(self.size))
+        return np.concatenate(found_q), np.concatenate(found_b)
+
+
+class TargetReport(NamedTuple):
+    total: int
+    undersized: int  # under 24×24 and not inline
+    spaced: int  # undersized but passing on the spacing exception
+    inline: int  # exempt as inline targets in text
+    failing: List[int]  # indices failing 2.5.8
+    enhanced_failing: int  # non-inline targets under 44×44 (2.5.5)
+    examples: List[str]  # short descriptions of some failing targets
+
+
+def evaluate(boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Evaluate (n, 5) target boxes; returns the undersized, inline and 2.5.8-failing masks."""
+    x, y, w, h, flags = (boxes[:, i] for i in range(5))
+    inline = (flags.astype(np.int64) & INLINE) != 0
+    small = (w < MIN_TARGET) | (h < MIN_TARGET)
+    undersized = small & ~inline
+    failing = np.zeros(len(boxes), dtype=bool)
+    candidates = np.flatnonzero(undersized)
+    if not candidates.size:
+        return undersized, inline, failing
+
+    radius = MIN_TARGET / 2
+    cx, cy = x + w / 2, y + h / 2
+    index = GridIndex(x, y, x + w, y + h)
+    # Reach far enough to see the circle of an undersized neighbour (two radii away).
+    qx, qy = cx[candidates], cy[candidates]
+    q, j = index.query(qx - 2 * radius, qy - 2 * radius, qx + 2 * radius, qy + 2 * radius)
+    i = candidates[q]
+    other = i != j
+    i, j = i[other], j[other]
+    dx = np.maximum(np.maximum(x[j] - cx[i], cx[i] - (x[j] + w[j])), 0)
+    dy = np.maximum(np.maximum(y[j] - cy[i], cy[i] - (y[j] + h[j])), 0)
+    hits_target = dx * dx + dy * dy < radius * radius
+    hits_circle = undersized[j] & ((cx[i] - cx[j]) ** 2 + (cy[i] - cy[j]) ** 2 < (2 * radius) ** 2)
+    failing[i[hits_target | hits_circle]] = True
+    return undersized, inline, failing
+
+
+async def measure_targets(page, url: str) -> TargetReport:
+    """Load *url*, collect every target's box in one script call and evaluate 2.5.8 / 2.5.5."""
+    await page.goto(url, wait_until="load")
+    flat = await page.evaluate(_TARGETS_SCRIPT)
+    boxes = np.asarray(flat, dtype=np.float64).reshape(-1, 5)
+    undersized, inline, failing = evaluate(boxes)
+    enhanced = ((boxes[:, 2] < ENHANCED_TARGET) | (boxes[:, 3] < ENHANCED_TARGET)) & ~inline
+    failing_indices = np.flatnonzero(failing).tolist()
+    examples = await page.evaluate(_DESCRIBE_SCRIPT, failing_indices[:EXAMPLE_LIMIT]) if failing_indices else []
+    return TargetReport(
+        total=len(boxes),
+        undersized=int(undersized.sum()),
+        spaced=int(undersized.sum()) - len(failing_indices),
+        inline=int(inline.sum()),
+        failing=failing_indices,
+        enhanced_failing=int(enhanced.sum()),
+        examples=examples,
+    )
+
+# ===================== Recent measurements =====================
+
+_recent: "OrderedDict[str, Tuple[float, TargetReport]]" = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def remember_targets(url: str, report: TargetReport) -> TargetReport:
+    with _recent_lock:
+        _recent[url] = (time.time(), report)
+        _recent.move_to_end(url)
+        while len(_recent) > GEOMETRY_LIMIT:
+            _recent.popitem(last=False)
+    return report
+
+
+def lookup_targets(url: str) -> Optional[TargetReport]:
+    """The targets measured for *url* within the last ``GEOMETRY_TTL`` seconds, if any."""
+    with _recent_lock:
+        entry = _recent.get(url)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > GEOMETRY_TTL:
+            del _recent[url]
+            return None
+        _recent.move_to_end(url)
+        return entry[1]
@@ -0,0 +1,405 @@
+"""Persistent audit history: every run's results in an indexed SQLite store.
+
+Bulk audits (and ``check --history``) write one run per invocation. Each
+page's check results are stored as rows: the check's status and worst
+outcome, one row per WCAG criterion it covers, and one row per finding. Rows
+are written in batches of ``BATCH_PAGES`` pages per transaction. Trend and
+regression questions are then answered by SQL over the indexes (site, URL,
+criterion, status, timestamp) instead of by rescanning JSON dumps:
+
+* ``trend("3.3.2", periods=2)``: pages failing 3.3.2 this week vs last week;
+* ``regressions(since_run)``: findings that are new or worse since a run;
+* ``run_summary(run)``: status counts per check and failing pages per criterion.
+
+A page counts as failing a criterion when a finding about that criterion
+reached ``fail`` (or the requested outcome) or worse. Each criterion of a
+check takes the worst outcome of its own findings
+(``results.FINDING_CRITERIA``); findings that name no criterion, and a
+check that errored, count for all of them.
+
+Configuration (environment variables)::
+
+    WCAG_HISTORY                 path of the history database (unset: no history is written)
+    WCAG_HISTORY_BATCH           pages per insert transaction (default 500)
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .results import Outcome, Status, finding_criteria, iter_findings
+
+BATCH_PAGES = int(os.getenv("WCAG_HISTORY_BATCH", "500"))
+WEEK = 7 * 24 * 3600
+# Worst outcome of a result without coded findings (external scanners, failed pages).
+NO_OUTCOME = -1
+# SQLite's default limit on host parameters per statement is 999.
+_MAX_PARAMS = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    site TEXT,
+    label TEXT,
+    started_at REAL,
+    finished_at REAL,
+    pages INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL,
+    url_id INTEGER NOT NULL,
+    check_name TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    outcome INTEGER NOT NULL,
+    at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS result_criteria (
+    criterion TEXT NOT NULL,
+    at REAL NOT NULL,
+    result_id INTEGER NOT NULL,
+    outcome INTEGER NOT NULL,
+    url_id INTEGER NOT NULL,
+    PRIMARY KEY (criterion, at, result_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS findings (
+    result_id INTEGER NOT NULL,
+    finding_key TEXT NOT NULL,
+    outcome INTEGER NOT NULL,
+    code TEXT NOT NULL,
+    params TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_site ON runs (site, started_at);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS urls_site ON urls (site);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id, url_id, check_name);
+CREATE INDEX IF NOT EXISTS results_url ON results (url_id, check_name, at);
+CREATE INDEX IF NOT EXISTS results_status ON results (status, at);
+CREATE INDEX IF NOT EXISTS results_at ON results (at);
+CREATE INDEX IF NOT EXISTS result_criteria_result ON result_criteria (result_id);
+CREATE INDEX IF NOT EXISTS findings_result ON findings (result_id);
+CREATE INDEX IF NOT EXISTS findings_code ON findings (code, outcome);
+"""
+
+
+def site_of(url: str) -> str:
+    """The lower-cased host of *url* (the scheme for host-less URLs such as ``file:``)."""
+    parts = urlsplit(url)
+    return parts.netloc.lower() or parts.scheme.lower()
+
+
+def _status(result: Dict[str, Any]) -> Status:
+    if "error" in result:
+        return Status.ERROR
+    try:
+        return Status[result.get("status", "TESTED")]
+    except KeyError:
+        return Status.TESTED
+
+
+class RunInfo(NamedTuple):
+    id: int
+    site: str
+    label: str
+    started_at: float
+    finished_at: Optional[float]
+    pages: int
+
+
+class TrendPoint(NamedTuple):
+    start: float  # period start (Unix time)
+    failing_pages: int  # distinct pages with a failing result in the period
+    audited_pages: int  # distinct pages audited for the criterion in the period
+
+
+class Regression(NamedTuple):
+    url: str
+    check: str
+    key: str
+    code: str
+    outcome: Outcome
+    previous: Optional[Outcome]  # None: the finding is new
+
+
+class AuditHistory:
+    """SQLite store of audit runs, their check results and findings."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._url_ids: Dict[str, int] = {}
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps the database consistent after a crash without syncing every commit.
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so ids read inside stay ours.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                # URL ids inserted in this transaction are gone again.
+                self._url_ids.clear()
+                raise
+            self._db.execute("COMMIT")
+
+    # ---- Writing ----
+
+    def start_run(self, site: str = "", label: str = "", started_at: Optional[float] = None) -> int:
+        with self._transaction() as db:
+            cursor = db.execute(
+                "INSERT INTO runs (site, label, started_at) VALUES (?, ?, ?)",
+                (site, label, time.time() if started_at is None else started_at),
+            )
+        return cursor.lastrowid
+
+    def finish_run(self, run_id: int) -> None:
+        with self._transaction() as db:
+            db.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), run_id))
+
+    def _url_id_map(self, db: sqlite3.Connection, urls: Iterable[str]) -> Dict[str, int]:
+        missing = sorted({url for url in urls if url not in self._url_ids})
+        if missing:
+            db.executemany("INSERT OR IGNORE INTO urls (site, url) VALUES (?, ?)", [(site_of(url), url) for url in missing])
+            for start in range(0, len(missing), _MAX_PARAMS):
+                chunk = missing[start : start + _MAX_PARAMS]
+                marks = ",".join("?" * len(chunk))
+                self._url_ids.update(
+                    (url, url_id) for url_id, url in db.execute(f"SELECT id, url FROM urls WHERE url IN ({marks})", chunk)
+                )
+        return self._url_ids
+
+    def add_pages(self, run_id: int, pages: Iterable[Dict[str, Any]], at: Optional[float] = None) -> int:
+        """Store bulk-audit page records (``{"url", "status", "checks"}``) in one transaction.
+
+        A page that could not be audited is stored as a single ERROR result
+        with an empty check name. Returns the number of pages stored.
+        """
+        pages = list(pages)
+        if not pages:
+            return 0
+        at = time.time() if at is None else at
+        results: List[Tuple[Any, ...]] = []
+        criteria: List[Tuple[Any, ...]] = []
+        findings: List[Tuple[Any, ...]] = []
+        with self._transaction() as db:
+            url_ids = self._url_id_map(db, (page["url"] for page in pages))
+            next_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM results").fetchone()[0] + 1
+            for page in pages:
+                url_id = url_ids[page["url"]]
+                checks = page.get("checks") if page.get("status") == "AUDITED" else None
+                if checks is None:
+                    results.append((next_id, run_id, url_id, "", int(Status.ERROR), int(Outcome.ERROR), at))
+                    next_id += 1
+                    continue
+                for name, result in checks.items():
+                    covered = result.get("wcag_criteria") or ()
+                    worst = NO_OUTCOME
+                    by_criterion = dict.fromkeys(covered, NO_OUTCOME)
+                    for finding in iter_findings(result):
+                        outcome = int(finding.outcome)
+                        worst = max(worst, outcome)
+                        for criterion in finding_criteria(finding.key, covered):
+                            by_criterion[criterion] = max(by_criterion[criterion], outcome)
+                        params = json.dumps(finding.params, ensure_ascii=False) if finding.params else None
+                        findings.append((next_id, finding.key, outcome, finding.code, params))
+                    status = _status(result)
+                    if status == Status.ERROR:
+                        worst = max(worst, int(Outcome.ERROR))
+                        by_criterion = {criterion: max(value, int(Outcome.ERROR)) for criterion, value in by_criterion.items()}
+                    results.append((next_id, run_id, url_id, name, int(status), worst, at))
+                    criteria.extend((criterion, at, next_id, value, url_id) for criterion, value in by_criterion.items())
+                    next_id += 1
+            db.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", results)
+            db.executemany("INSERT OR IGNORE INTO result_criteria VALUES (?, ?, ?, ?, ?)", criteria)
+            db.executemany("INSERT INTO findings VALUES (?, ?, ?, ?, ?)", findings)
+            db.execute("UPDATE runs SET pages = pages + ? WHERE id = ?", (len(pages), run_id))
+        return len(pages)
+
+    @contextlib.contextmanager
+    def record_run(self, site: str = "", label: str = "", batch: int = BATCH_PAGES) -> Iterator["RunWriter"]:
+        """Start a run and yield a ``RunWriter`` for its pages; the run is finished on exit."""
+        writer = RunWriter(self, self.start_run(site, label), batch)
+        try:
+            yield writer
+        finally:
+            writer.flush()
+            self.finish_run(writer.run_id)
+
+    # ---- Queries ----
+
+    def runs(self, site: Optional[str] = None, limit: int = 20) -> List[RunInfo]:
+        """The most recent runs first, optionally only those of *site*."""
+        where, params = ("WHERE site = ?", [site]) if site is not None else ("", [])
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, site, label, started_at, finished_at, pages FROM runs {where} "
+                "ORDER BY started_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [RunInfo(*row) for row in rows]
+
+    def trend(
+        self,
+        criterion: str,
+        period: float = WEEK,
+        periods: int = 2,
+        until: Optional[float] = None,
+        site: Optional[str] = None,
+        outcome: Outcome = Outcome.FAIL,
+    ) -> List[TrendPoint]:
+        """Pages failing *criterion* per *period*, oldest first, for the *periods* ending at *until*.
+
+        The default is "this week vs last week". A page counts once per period
+        if any of its results in that period reached *outcome*.
+        """
+        until = time.time() if until is None else until
+        origin = until - period * periods
+        sql = (
+            "SELECT CAST((at - ?) / ? AS INTEGER) AS bucket, "
+            "COUNT(DISTINCT CASE WHEN outcome >= ? THEN url_id END), COUNT(DISTINCT url_id) "
+            "FROM result_criteria WHERE criterion = ? AND at >= ? AND at < ?"
+        )
+        params: List[Any] = [origin, period, int(outcome), criterion, origin, until]
+        if site is not None:
+            sql += " AND url_id IN (SELECT id FROM urls WHERE site = ?)"
+            params.append(site)
+        with self._lock:
+            counts = {row[0]: row[1:] for row in self._db.execute(sql + " GROUP BY bucket", params)}
+        return [TrendPoint(origin + i * period, *counts.get(i, (0, 0))) for i in range(periods)]
+
+    def latest_run(self, site: Optional[str] = None) -> Optional[int]:
+        found = self.runs(site, limit=1)
+        return found[0].id if found else None
+
+    def regressions(self, since_run: int, run: Optional[int] = None, outcome: Outcome = Outcome.WARN) -> List[Regression]:
+        """Findings at *outcome* or worse in *run* (default: the latest run of the same site) that
+        *since_run* did not have at that severity.
+
+        Only pages and checks present in both runs are compared, so a page
+        audited for the first time yields no regressions.
+        """
+        if run is None:
+            with self._lock:
+                row = self._db.execute("SELECT site FROM runs WHERE id = ?", (since_run,)).fetchone()
+            if row is None:
+                raise ValueError(f"unknown run {since_run}")
+            run = self.latest_run(row[0])
+        with self._lock:
+            rows = self._db.execute(
+                """
+                SELECT url, check_name, finding_key, code, outcome, previous FROM (
+                    SELECT u.url, r.check_name, f.finding_key, f.code, f.outcome, (
+                        SELECT MAX(g.outcome) FROM results b JOIN findings g ON g.result_id = b.id
+                        WHERE b.run_id = :old AND b.url_id = r.url_id AND b.check_name = r.check_name
+                          AND g.finding_key = f.finding_key
+                    ) AS previous
+                    FROM results r
+                    JOIN findings f ON f.result_id = r.id
+                    JOIN urls u ON u.id = r.url_id
+                    WHERE r.run_id = :new AND f.outcome >= :level AND EXISTS (
+                        SELECT 1 FROM results b
+                        WHERE b.run_id = :old AND b.url_id = r.url_id AND b.check_name = r.check_name
+                    )
+                ) WHERE previous IS NULL OR previous < outcome
+                ORDER BY url, check_name, finding_key
+                """,
+                {"old": since_run, "new": run, "level": int(outcome)},
+            ).fetchall()
+        return [
+            Regression(url, check, key, code, Outcome(level), None if previous is None else Outcome(previous))
+            for url, check, key, code, level, previous in rows
+        ]
+
+    def run_summary(self, run_id: int, outcome: Outcome = Outcome.FAIL) -> Dict[str, Any]:
+        """Status counts per check and failing / audited pages per criterion for one run."""
+        with self._lock:
+            pages = self._db.execute("SELECT COUNT(DISTINCT url_id) FROM results WHERE run_id = ?", (run_id,)).fetchone()[0]
+            statuses = self._db.execute(
+                "SELECT check_name, status, COUNT(*) FROM results WHERE run_id = ? GROUP BY check_name, status",
+                (run_id,),
+            ).fetchall()
+            criteria = self._db.execute(
+                "SELECT c.criterion, COUNT(DISTINCT CASE WHEN c.outcome >= ? THEN c.url_id END), COUNT(DISTINCT c.url_id) "
+                "FROM results r JOIN result_criteria c ON c.result_id = r.id WHERE r.run_id = ? GROUP BY c.criterion",
+                (int(outcome), run_id),
+            ).fetchall()
+        check_status: Dict[str, Dict[str, int]] = {}
+        for name, status, count in statuses:
+            check_status.setdefault(name or "page", {})[Status(status).name] = count
+        return {
+            "run": run_id,
+            "pages": pages,
+            "check_status": check_status,
+            "criteria": {
+                criterion: {"failing_pages": failing, "pages": audited}
+                for criterion, failing, audited in sorted(criteria, key=_criterion_order)
+            },
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("runs", "urls", "results", "findings")
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _criterion_order(row: Tuple[Any, ...]) -> Tuple[int, ...]:
+    return tuple(int(part) if part.isdigit() else 0 for part in row[0].split("."))
+
+
+class RunWriter:
+    """Buffers one run's page records and stores them ``batch`` pages per transaction."""
+
+    def __init__(self, history: AuditHistory, run_id: int, batch: int = BATCH_PAGES):
+        self.history = history
+        self.run_id = run_id
+        self.batch = max(1, batch)
+        self._pending: List[Dict[str, Any]] = []
+
+    def add(self, page: Dict[str, Any]) -> None:
+        self._pending.append(page)
+        if len(self._pending) >= self.batch:
+            self.flush()
+
+    def flush(self) -> None:
+        pages, self._pending = self._pending, []
+        self.history.add_pages(self.run_id, pages)
+
+
+_histories: Dict[str, AuditHistory] = {}
+_history_lock = threading.Lock()
+
+
+def get_history(path: Optional[str] = None) -> Optional[AuditHistory]:
+    """The process-wide history at *path* (default ``WCAG_HISTORY``), or None when neither is set."""
+    path = path or os.getenv("WCAG_HISTORY", "")
+    if not path:
+        return None
+    path = os.path.abspath(os.path.expanduser(path))
+    with _history_lock:
+        if path not in _histories:
+            _histories[path] = AuditHistory(path)
+        return _histories[path]
@@ -0,0 +1,158 @@
+"""Shared aiohttp connection pool for the async WCAG tools.
+
+One keep-alive ``ClientSession`` is kept per event loop, with a global and a
+per-host connection limit, a DNS cache and compressed transfers, so concurrent
+agent sessions in one process reuse connections instead of opening new ones.
+A session is closed when its loop shuts down (``asyncio.run`` finalises async
+generators before closing the loop), or at exit for loops that never do.
+"""
+
+import asyncio
+import atexit
+import os
+import weakref
+
+from . import offline
+from .cache import get_cache
+from .ingest import CHUNK_SIZE, PageIngest, RawIngest
+from .metrics import get_metrics, timed
+from .snapshot import (
+    FETCH_TIMEOUT,
+    USER_AGENT,
+    PageSnapshot,
+    lookup_snapshot,
+    remember_snapshot,
+    snapshot_from_cache,
+    snapshot_from_ingest,
+)
+
+POOL_LIMIT = int(os.getenv("WCAG_HTTP_POOL_LIMIT", "100"))
+POOL_LIMIT_PER_HOST = int(os.getenv("WCAG_HTTP_POOL_LIMIT_PER_HOST", "8"))
+DNS_CACHE_TTL = int(os.getenv("WCAG_HTTP_DNS_CACHE_TTL", "300"))
+KEEPALIVE_TIMEOUT = 30
+
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+# Per loop, a suspended async generator that closes the session when the loop finalises it.
+_closers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+
+
+def _accept_encoding() -> str:
+    # aiohttp only decodes brotli when a brotli package is importable.
+    try:
+        import brotli  # type: ignore  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # type: ignore  # noqa: F401
+        except ImportError:
+            return "gzip, deflate"
+    return "gzip, deflate, br"
+
+
+def get_session():
+    """Return the pooled ``aiohttp.ClientSession`` of the running event loop."""
+    import aiohttp  # type: ignore
+
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_LIMIT,
+            limit_per_host=POOL_LIMIT_PER_HOST,
+            use_dns_cache=True,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT),
+            headers={"User-Agent": USER_AGENT, "Accept-Encoding": _accept_encoding()},
+            auto_decompress=True,
+        )
+        _sessions[loop] = session
+        closer = _closers[loop] = _close_on_shutdown(session)
+        asyncio.ensure_future(closer.__anext__())  # the loop now tracks it for shutdown_asyncgens()
+    return session
+
+
+async def _close_on_shutdown(session):
+    try:
+        yield
+    finally:
+        if not session.closed:
+            await session.close()
+
+
+async def close_session() -> None:
+    """Close the running loop's pooled session, if any."""
+    loop = asyncio.get_running_loop()
+    _closers.pop(loop, None)
+    session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+@atexit.register
+def close_sessions() -> None:
+    """Close the pooled sessions of loops that are still open (registered to run at exit)."""
+    for loop, session in list(_sessions.items()):
+        if session.closed or loop.is_closed():
+            continue
+        try:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(session.close(), loop).result(5)
+            else:
+                loop.run_until_complete(session.close())
+        except Exception:
+            pass
+    _sessions.clear()
+    _closers.clear()
+
+
+async def fetch_snapshot_async(url: str, parse: bool = True) -> PageSnapshot:
+    """Download *url* through the pool, revalidating any on-disk copy (see ``fetch_snapshot``).
+
+    With ``parse=False`` the body is only collected (up to the byte limit) and
+    left unparsed, for callers that hand the raw bytes to another process.
+    """
+    if offline.serves(url):
+        snap = await asyncio.to_thread(offline.open_snapshot, url, parse)
+        if snap is not None:
+            return snap
+
+    store = get_cache()
+    cached = await asyncio.to_thread(store.get_page, url) if store is not None else None
+    if cached is not None and store.is_fresh(cached):
+        return snapshot_from_cache(cached)
+
+    headers = store.conditional_headers(cached) if store is not None else {}
+    with timed(get_metrics().fetch.labels("aiohttp"), "fetch", url=url):
+        async with get_session().get(url, headers=headers) as resp:
+            if resp.status == 304 and cached is not None:
+                return snapshot_from_cache(await asyncio.to_thread(store.revalidated, cached))
+            # Parse while downloading; leaving the block early drops the rest of the body.
+            ingest = PageIngest(resp.charset) if parse else RawIngest()
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                if not ingest.feed(chunk):
+                    break
+            snap = snapshot_from_ingest(url, ingest, resp.headers, resp.status, str(resp.url), resp.charset)
+            response_headers = dict(resp.headers)
+    if store is not None and not snap.truncated:
+        await asyncio.to_thread(
+            store.put_page, url, snap.status_code, snap.final_url, response_headers, snap.encoding, snap.content
+        )
+    return snap
+
+
+async def get_snapshot_async(url: str) -> PageSnapshot:
+    """Async counterpart of ``snapshot.get_snapshot`` sharing the same cache."""
+    snap = lookup_snapshot(url)
+    if snap is not None:
+        return snap
+    inflight = _inflight.setdefault(asyncio.get_running_loop(), {})
+    future = inflight.get(url)
+    if future is None:
+        future = asyncio.ensure_future(fetch_snapshot_async(url))
+        inflight[url] = future
+        future.add_done_callback(lambda _: inflight.pop(url, None))
+    return remember_snapshot(await asyncio.shield(future))
@@ -0,0 +1,197 @@
+"""Streaming, memory-bounded HTML ingestion.
+
+Pages are parsed while they download: every chunk goes straight into lxml's
+HTML parser in *target* mode, which emits start / data / end events without
+building a document tree. The events feed the ``DomIndexBuilder`` and the
+``RegionHasher`` directly, so a page costs its raw bytes plus the extracted
+features, never a full object tree. Header, navigation, footer and cookie
+regions go through ``templates.TemplateSplitter`` and are indexed once per
+site-wide fingerprint. Byte and element caps bound the work on
+giant pages; a page that hits one is marked truncated and its check results
+say so.
+
+Configuration (environment variables)::
+
+    WCAG_MAX_PAGE_BYTES    bytes of a page downloaded and parsed (default 16 MiB)
+    WCAG_MAX_PAGE_NODES    elements indexed per page (default 200000)
+"""
+
+import os
+import re
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .dom_index import DomIndex, DomIndexBuilder
+from .metrics import get_metrics
+from .regions import RegionHasher
+from .templates import TemplateSplitter
+
+MAX_PAGE_BYTES = int(os.getenv("WCAG_MAX_PAGE_BYTES", str(16 << 20)))
+MAX_PAGE_NODES = int(os.getenv("WCAG_MAX_PAGE_NODES", "200000"))
+CHUNK_SIZE = 64 * 1024
+
+_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset", re.I)
+_BOMS = (b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")
+
+
+def declared_charset(content_type: Optional[str]) -> Optional[str]:
+    """Charset from a Content-Type header, or None to let the parser sniff ``<meta charset>``."""
+    match = _CHARSET.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def _sniff_encoding(head: bytes) -> Optional[str]:
+    # libxml2 honours a BOM or <meta charset> itself but otherwise assumes Latin-1;
+    # undeclared pages on today's web are overwhelmingly UTF-8.
+    if head.startswith(_BOMS) or _META_CHARSET.search(head[:4096]):
+        return None
+    return "utf-8"
+
+
+class _Target:
+    """lxml parser target forwarding events to the ingest (no tree is built)."""
+
+    def __init__(self, ingest: "PageIngest"):
+        self._ingest = ingest
+
+    def start(self, tag: str, attrib: Mapping[str, Any]) -> None:
+        self._ingest._start(tag, attrib)
+
+    def end(self, tag: str) -> None:
+        self._ingest._end(tag)
+
+    def data(self, text: str) -> None:
+        self._ingest._data(text)
+
+    def comment(self, text: str) -> None:
+        self._ingest._comment(text)
+
+    def doctype(self, name: str, pubid: str, system: str) -> None:
+        self._ingest._comment(f"<!DOCTYPE {name} {pubid or ''} {system or ''}>")
+
+    def close(self) -> None:
+        return None
+
+
+class PageIngest:
+    """Incrementally parses one page into its ``DomIndex`` and region hashes."""
+
+    def __init__(self, encoding: Optional[str] = None, max_bytes: int = MAX_PAGE_BYTES, max_nodes: int = MAX_PAGE_NODES):
+        self.max_bytes = max_bytes
+        self.max_nodes = max_nodes
+        self.size = 0
+        self.nodes = 0
+        self.truncated = ""
+        self.parse_seconds = 0.0
+        self._chunks = []
+        self._events = TemplateSplitter(DomIndexBuilder(), RegionHasher())
+        self._stopped = False
+        self.encoding = encoding
+        self._parser = None
+
+    def _make_parser(self, head: bytes):
+        from lxml import etree  # type: ignore
+
+        encoding = self.encoding or _sniff_encoding(head)
+        try:
+            return etree.HTMLParser(target=_Target(self), encoding=encoding, recover=True, no_network=True)
+        except LookupError:
+            # Unknown charset in the Content-Type header: let libxml2 sniff it.
+            return etree.HTMLParser(target=_Target(self), recover=True, no_network=True)
+
+    # ---- Parser events ----
+
+    def _start(self, tag: str, attrs: Mapping[str, Any]) -> None:
+        if self._stopped:
+            return
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            # Ignore the rest of the document so both consumers stay balanced.
+            self._stopped = True
+            self.truncated = f"element limit reached ({self.max_nodes} elements)"
+            return
+        attrs = dict(attrs)  # lxml's attribute proxy is slow to query repeatedly
+        self._events.start(tag, attrs)
+
+    def _end(self, tag: str) -> None:
+        if not self._stopped:
+            self._events.end(tag)
+
+    def _data(self, text: str) -> None:
+        if not self._stopped:
+            self._events.data(text)
+
+    def _comment(self, text: str) -> None:
+        if not self._stopped:
+            self._events.comment(text)
+
+    # ---- Feeding ----
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse the next downloaded chunk; returns False once a cap is hit and reading should stop."""
+        if self.truncated:
+            return False
+        room = self.max_bytes - self.size
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = f"byte limit reached ({self.max_bytes} bytes)"
+        if chunk:
+            if self._parser is None:
+                self._parser = self._make_parser(chunk)
+            self._chunks.append(chunk)
+            self.size += len(chunk)
+            start = time.perf_counter()
+            self._parser.feed(chunk)
+            self.parse_seconds += time.perf_counter() - start
+        return not self.truncated
+
+    def close(self) -> Tuple[bytes, DomIndex, Dict[str, str]]:
+        """Finish parsing and return the kept bytes, the index and the region hashes."""
+        from lxml import etree  # type: ignore
+
+        start = time.perf_counter()
+        try:
+            if self._parser is not None:
+                self._parser.close()
+        except etree.XMLSyntaxError:
+            pass  # empty or undecodable document: keep whatever was indexed
+        self.parse_seconds += time.perf_counter() - start
+        get_metrics().parse.observe(self.parse_seconds)
+        content = b"".join(self._chunks)
+        self._chunks = []
+        return content, *self._events.finish()
+
+
+class RawIngest:
+    """Collects a body within the byte limit without parsing it (the snapshot parses on demand)."""
+
+    def __init__(self, max_bytes: int = MAX_PAGE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.truncated = ""
+        self._chunks = []
+
+    def feed(self, chunk: bytes) -> bool:
+        room = self.max_bytes - self.size
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = f"byte limit reached ({self.max_bytes} bytes)"
+        self._chunks.append(bytes(chunk))
+        self.size += len(chunk)
+        return not self.truncated
+
+    def close(self) -> Tuple[bytes, None, None]:
+        content = b"".join(self._chunks)
+        self._chunks = []
+        return content, None, None
+
+
+def ingest_bytes(content: bytes, encoding: Optional[str] = None, parse: bool = True, **limits: int):
+    """Run an already downloaded body through a ``PageIngest`` (or a ``RawIngest``) in chunks."""
+    ingest = PageIngest(encoding, **limits) if parse else RawIngest(limits.get("max_bytes", MAX_PAGE_BYTES))
+    view = memoryview(content)
+    for offset in range(0, len(view), CHUNK_SIZE):
+        if not ingest.feed(bytes(view[offset : offset + CHUNK_SIZE])):
+            break
+    return ingest
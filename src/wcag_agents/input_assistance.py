@@ -1,5 +1,6 @@
 from google.adk.agents import LlmAgent
-from . import tools
+from . import async_tools
+from .metrics import agent_callbacks
 
 input_assistance_agent = LlmAgent(
     model="gemini-1.5-flash",
@@ -13,5 +14,6 @@ Process:
 1. Always call the `test_input_assistance` tool on the provided URL.
 2. Summarise form/input issues and provide actionable remediation steps.
 """,
-    tools=[tools.test_input_assistance],
+    tools=[async_tools.test_input_assistance],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
@@ -1,5 +1,6 @@
 from google.adk.agents import LlmAgent
-from . import tools
+from . import async_tools, tools
+from .metrics import agent_callbacks
 
 input_modalities_agent = LlmAgent(
     model="gemini-1.5-flash",
@@ -17,8 +18,9 @@ Process:
 2. Provide concrete remediation guidance.
 """,
     tools=[
-        tools.test_input_modalities,
+        async_tools.test_input_modalities,
         tools.test_dragging_movements,
-        tools.test_target_size_minimum,
+        async_tools.test_target_size_minimum,
     ],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
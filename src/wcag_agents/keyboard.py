@@ -1,5 +1,6 @@
 from google.adk.agents import LlmAgent
-from . import tools
+from . import async_tools
+from .metrics import agent_callbacks
 
 keyboard_accessibility_agent = LlmAgent(
     model="gemini-1.5-flash",
@@ -15,13 +16,16 @@ Your expertise covers the keyboard-related success criteria retained in WCAG 2.2
 
 Process:
 1. Always call the `test_keyboard_accessibility` tool
-2. Analyse results and explain issues clearly
-3. Give actionable recommendations
-4. Do NOT ask the user follow-up questions—run the tool and respond
+2. Use `get_accessibility_tree` for a summary of the page structure and `query_accessibility_tree` to inspect specific nodes
+3. Analyse results and explain issues clearly
+4. Give actionable recommendations
+5. Do NOT ask the user follow-up questions—run the tool and respond
 """,
     tools=[
-        tools.test_keyboard_accessibility,
-        tools.run_pa11y,
-        tools.get_accessibility_tree,
+        async_tools.test_keyboard_accessibility,
+        async_tools.run_pa11y,
+        async_tools.get_accessibility_tree,
+        async_tools.query_accessibility_tree,
     ],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""Batched language identification for 3.1.1 Language of Page and 3.1.2 Language of Parts.
+
+Uses the character n-gram profiles that ship with ``langdetect``, but instead of
+langdetect's randomised sampling (one detector object per text, different
+answers between runs) every block is scored deterministically with the full
+naive-Bayes likelihood, as a matrix product over a shared log-probability
+table. Words are turned into n-gram vectors once and reused across blocks, and
+blocks are processed in fixed-size batches so memory stays flat however long
+the document is.
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# langdetect smooths unseen n-grams with alpha / BASE_FREQ.
+SMOOTHING = 0.5 / 10000
+# Blocks with fewer letters than this are too short to identify reliably.
+MIN_LETTERS = 30
+# Posterior probability required before a block is reported as another language.
+MIN_CONFIDENCE = 0.99
+# Distinct words scored per batch; bounds the size of the gathered n-gram table.
+BATCH_WORDS = 2048
+WORD_CACHE_LIMIT = 50000
+
+_URL_OR_EMAIL = re.compile(r"https?://\S+|\S+@\S+\.\S+")
+# Codes that name the same language for the purposes of 3.1.x.
+_ALIASES = {"zh-cn": "zh", "zh-tw": "zh", "nb": "no", "nn": "no", "iw": "he", "in": "id", "fil": "tl"}
+
+
+class Detection(NamedTuple):
+    lang: str  # "" when the text has no known n-grams
+    confidence: float
+    letters: int
+
+
+def same_language(a: str, b: str) -> bool:
+    """Compare language tags by primary language (``en-GB`` matches ``en``)."""
+
+    def primary(tag: str) -> str:
+        tag = tag.strip().lower().replace("_", "-")
+        return _ALIASES.get(tag, _ALIASES.get(tag.split("-")[0], tag.split("-")[0]))
+
+    return primary(a) == primary(b)
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_char(ch: str) -> str:
+    from langdetect.utils.ngram import NGram  # type: ignore
+
+    return NGram.normalize(ch)
+
+
+def _ngrams(word: str) -> List[str]:
+    # The same 1-3 grams langdetect extracts from a space-delimited word.
+    padded = f" {word} "
+    grams = list(word)
+    grams += [padded[i : i + 2] for i in range(len(padded) - 1)]
+    grams += [padded[i : i + 3] for i in range(len(padded) - 2)]
+    return grams
+
+
+class LanguageModel:
+    """Log-probability table of every profile n-gram, one column per language."""
+
+    def __init__(self, profile_dir: Optional[str] = None):
+        if profile_dir is None:
+            import langdetect  # type: ignore
+
+            profile_dir = os.path.join(os.path.dirname(langdetect.__file__), "profiles")
+        profiles = []
+        for name in sorted(os.listdir(profile_dir)):
+            with open(os.path.join(profile_dir, name), encoding="utf-8") as fh:
+                profiles.append(json.load(fh))
+        self.languages: List[str] = [p["name"] for p in profiles]
+        self._rows: Dict[str, int] = {}
+        for profile in profiles:
+            for gram in profile["freq"]:
+                self._rows.setdefault(gram, len(self._rows))
+        probs = np.zeros((len(self._rows), len(profiles)), dtype=np.float32)
+        for col, profile in enumerate(profiles):
+            totals = profile["n_words"]
+            for gram, count in profile["freq"].items():
+                if 1 <= len(gram) <= 3:
+                    probs[self._rows[gram], col] = count / totals[len(gram) - 1]
+        # Scores are relative to "unseen in every language", which keeps the table mostly zero.
+        self._log = np.log1p(probs / SMOOTHING, dtype=np.float32)
+        self._word_ids: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _ids(self, word: str) -> np.ndarray:
+        ids = self._word_ids.get(word)
+        if ids is None:
+            ids = np.fromiter((self._rows[g] for g in _ngrams(word) if g in self._rows), dtype=np.int64)
+            with self._lock:
+                if len(self._word_ids) >= WORD_CACHE_LIMIT:
+                    self._word_ids.clear()
+                self._word_ids[word] = ids
+        return ids
+
+    def _word_vectors(self, words: Sequence[str]) -> np.ndarray:
+        """Summed n-gram log-probabilities of each word (one row per word)."""
+        id_lists = [self._ids(w) for w in words]
+        lengths = np.fromiter((len(ids) for ids in id_lists), dtype=np.int64, count=len(id_lists))
+        vectors = np.zeros((len(words), len(self.languages)), dtype=np.float64)
+        known = lengths > 0
+        if known.any():
+            gathered = self._log[np.concatenate([ids for ids in id_lists if len(ids)])]
+            starts = np.concatenate(([0], np.cumsum(lengths[known])[:-1]))
+            vectors[known] = np.add.reduceat(gathered, starts, axis=0)
+        return vectors
+
+    def score(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Log-likelihood of every text under every language, and the letters counted per text."""
+        scores = np.zeros((len(texts), len(self.languages)), dtype=np.float64)
+        letters = np.zeros(len(texts), dtype=np.int64)
+        rows: List[int] = []
+        words: List[str] = []
+        counts: List[int] = []
+
+        def flush() -> None:
+            if words:
+                weighted = self._word_vectors(words) * np.asarray(counts, dtype=np.float64)[:, None]
+                # Rows arrive in order, so each text's words form one contiguous run.
+                owners = np.asarray(rows)
+                starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+                scores[owners[starts]] += np.add.reduceat(weighted, starts, axis=0)
+                rows.clear()
+                words.clear()
+                counts.clear()
+
+        for i, text in enumerate(texts):
+            text = _URL_OR_EMAIL.sub(" ", text)
+            table = {ord(ch): _normalize_char(ch) for ch in set(text)}
+            tally = Counter(
+                # Runs of capitals (acronyms) carry no language signal; langdetect skips them too.
+                w for w in text.translate(table).split() if not (len(w) > 1 and w.isupper())
+            )
+            for word, count in tally.items():
+                rows.append(i)
+                words.append(word)
+                counts.append(count)
+                letters[i] += len(word) * count
+            if len(words) >= BATCH_WORDS:
+                flush()
+        flush()
+        return scores, letters
+
+    def _decide(self, scores: np.ndarray, letters: np.ndarray) -> List[Detection]:
+        detections = []
+        for row, count in zip(scores, letters):
+            if count == 0 or not row.any():
+                detections.append(Detection("", 0.0, int(count)))
+                continue
+            posterior = np.exp(row - row.max())
+            posterior /= posterior.sum()
+            best = int(posterior.argmax())
+            detections.append(Detection(self.languages[best], float(posterior[best]), int(count)))
+        return detections
+
+    def score_run(self, texts: Sequence[str]) -> "ScoredRun":
+        """Score and decide a run of consecutive texts, keeping their scores for the document."""
+        scores, letters = self.score(texts)
+        return ScoredRun(self._decide(scores, letters), scores, letters)
+
+    def detect_runs(
+        self, runs: Sequence["ScoredRun"], counted: Optional[Sequence[bool]] = None
+    ) -> Tuple[List[Detection], Detection]:
+        """``detect_blocks`` for a document made of runs scored with ``score_run``, in order.
+
+        A run shared by many documents (a template region) is scored once.
+        Only the texts flagged in *counted* (one flag per text, all by
+        default) take part in the document's detection.
+        """
+        blocks = [detection for run in runs for detection in run.detections]
+        if not runs:
+            return blocks, Detection("", 0.0, 0)
+        scores = np.concatenate([run.scores for run in runs])
+        letters = np.concatenate([run.letters for run in runs])
+        if counted is not None:
+            mask = np.asarray(counted, dtype=bool)
+            scores, letters = scores[mask], letters[mask]
+        document = self._decide(scores.sum(axis=0)[None, :], np.array([letters.sum()]))[0]
+        return blocks, document
+
+    def detect_blocks(self, texts: Sequence[str]) -> Tuple[List[Detection], Detection]:
+        """Detect the language of every text and of all of them together, in one pass."""
+        return self.detect_runs([self.score_run(texts)])
+
+
+class ScoredRun(NamedTuple):
+    detections: List[Detection]  # one per text
+    scores: np.ndarray  # log-likelihood of every text per language
+    letters: np.ndarray  # letters counted per text
+
+
+_model: Optional[LanguageModel] = None
+_model_lock = threading.Lock()
+
+
+def get_language_model() -> LanguageModel:
+    """Return the process-wide model (profiles are loaded on first use)."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = LanguageModel()
+        return _model
+
+
+def score_run(texts: Sequence[str]) -> ScoredRun:
+    """Shortcut for ``get_language_model().score_run``."""
+    return get_language_model().score_run(texts)
+
+
+def detect_runs(runs: Sequence[ScoredRun], counted: Optional[Sequence[bool]] = None) -> Tuple[List[Detection], Detection]:
+    """Shortcut for ``get_language_model().detect_runs``."""
+    return get_language_model().detect_runs(runs, counted)
@@ -0,0 +1,196 @@
+"""English text for the finding and recommendation codes of the WCAG checks.
+
+Only ``results.render`` reads these; check results carry the codes. Templates
+are ``str.format`` strings over the finding's parameters. Codes are stable:
+add new ones rather than changing the meaning of an existing code.
+"""
+
+FINDINGS = {
+    # ---- Shared ----
+    "check_error": "Error: {error}",
+    "focus_contrast_unverified": "Focus indicators need contrast verification",
+    # ---- 2.1.x Keyboard ----
+    "tab_navigation_functional": "Tab/Shift+Tab navigation functional",
+    "no_traps_in_standard_elements": "No keyboard traps detected in standard elements",
+    "shortcuts_unidentified": "Single character shortcuts need identification",
+    "tab_walk_unavailable": "Keyboard navigation could not be exercised ({error}) – manual testing required",
+    "keyboard_traps_untested": "Keyboard traps were not tested because the tab walk was unavailable – manual testing required",
+    "tab_walk_reached": "Tab/Shift+Tab reached {reached} elements ({tabbable} tab stops in the page, {steps} key presses)",
+    "tab_reaches_nothing": "Tab reached none of the {tabbable} tab stops in the page",
+    "keyboard_trap": "Keyboard trap: focus cycles through {count} elements ({direction}) and Escape does not release it (e.g. {examples})",
+    "focus_loop_escapable": "Focus loops through {count} elements but Escape releases it (e.g. a modal dialog)",
+    "tab_walk_partial": "Tab walk stopped after {steps} key presses ({seconds:g} s budget reached) – the rest of the page was not walked",
+    "no_keyboard_traps": "No keyboard traps: focus moved through the whole page ({steps} key presses)",
+    # ---- 2.2.x Timing ----
+    "no_timeouts": "No automatic timeouts detected",
+    "js_timers": "Potential JavaScript timeouts present (setTimeout/setInterval detected)",
+    "no_autoplay": "No auto-playing media found",
+    "autoplay_media": "Auto-playing media detected (video/audio with autoplay)",
+    "no_timing_interactions": "No timing-dependent interactions detected",
+    "timing_interactions": "Possible timing-dependent interactions (meta refresh or JS timers)",
+    "no_interruptions": "No automatic interruptions detected",
+    "meta_refresh_interrupts": "Meta refresh tag may interrupt user flow",
+    "session_timeout_manual": "Session timeout behaviour not determinable via static scan – needs manual verification",
+    "no_timeout_warnings_needed": "No timeout warnings needed",
+    "timeout_warnings_needed": "Implement timeout warnings / extend option",
+    # ---- 2.3.x Seizures ----
+    "no_flashes": "No content flashes more than 3 times per second",
+    "flashes_below_threshold": "No flashing content exceeds safe thresholds",
+    "no_seizure_animations": "No seizure-inducing animations detected",
+    "no_flashes_any_size": "No content flashes more than 3 times per second (at most {flashes:g}/s over {seconds:g} s, {frames} frames)",
+    "flashes_any_size": "Content flashes {flashes:g} times per second (over {seconds:g} s, {frames} frames recorded)",
+    "general_flash_below_threshold": "General flashes stay within the 2.3.1 threshold (at most {flashes:g}/s in any 341×256 area)",
+    "general_flash_exceeds": "General flashes exceed the threshold: {flashes:g} per second in a 341×256 area (from {at:.1f} s)",
+    "red_flash_below_threshold": "Red flashes stay within the 2.3.1 threshold (at most {flashes:g}/s in any 341×256 area)",
+    "red_flash_exceeds": "Saturated red flashes exceed the threshold: {flashes:g} per second in a 341×256 area (from {at:.1f} s)",
+    "flash_capture_unavailable": "Flashing could not be measured ({error}) – manual testing required",
+    "animation_interactions_unverified": "Motion animation triggered by interaction needs manual verification",
+    # ---- 2.4.x Navigation ----
+    "skip_links_unverified": "Skip links need verification",
+    "title_unverified": "Page titles need descriptiveness check",
+    "focus_order_logical": "Logical focus order maintained",
+    "link_purpose_unverified": "Link purposes need clarity assessment",
+    "multiple_ways_available": "Multiple navigation methods available",
+    "heading_hierarchy_unverified": "Heading hierarchy requires validation",
+    "location_indicators": "User location indicators present",
+    "link_context_weak": "Link context needs improvement",
+    "section_headings_unverified": "Section headings need organization review",
+    "focus_obscured_heuristic": "Needs manual verification (heuristic only)",
+    "focus_obscured_unmeasured": "Focus visibility could not be measured ({error}) – needs manual verification",
+    "focus_fully_obscured": "{count} elements are completely hidden by fixed/sticky content when focused (e.g. {examples})",
+    "focus_never_fully_obscured": "None of the {reached} focused elements is completely hidden by fixed/sticky content",
+    "focus_partly_obscured": "{count} elements are partly covered by fixed/sticky content when focused (e.g. {examples})",
+    "focus_never_obscured": "None of the {reached} focused elements is covered by fixed/sticky content",
+    "focus_appearance_unverified": "Focus appearance needs size/contrast validation",
+    "focus_appearance_unmeasured": "Focus indicators could not be measured ({error}) – needs manual verification",
+    "focus_indicator_missing": "{count} of {measured} focusable elements show no visible change when focused (e.g. {examples})",
+    "focus_indicator_visible": "All {measured} measured focusable elements change visibly when focused",
+    "focus_indicator_insufficient": "{count} of {measured} focus indicators are smaller than a 2 CSS px perimeter or change contrast by less than 3:1 (e.g. {examples})",
+    "focus_indicator_low_adjacent": "{count} of {measured} focus indicators contrast less than 3:1 with adjacent colors (e.g. {examples})",
+    "focus_indicator_sufficient": "All {measured} measured focus indicators meet the 2.4.13 area and 3:1 contrast requirements",
+    "focus_appearance_partial": "Focus indicators were measured on {measured} of {tabbable} focusable elements (element limit or time budget reached)",
+    # ---- 2.5.x Input modalities ----
+    "gesture_alternatives_needed": "Multi-point gesture alternatives needed",
+    "pointer_cancellation_available": "Pointer cancellation available",
+    "label_in_name_unverified": "Label accessibility needs verification",
+    "motion_alternatives_needed": "Device motion alternatives needed",
+    "target_size_unverified": "Touch target size verification needed",
+    "concurrent_input_supported": "Multiple input methods supported",
+    "dragging_unverified": "Manual verification required – no automatic detection implemented",
+    "small_targets_suspected": "Automatic estimation suggests some targets < 24 px; manual audit advised",
+    "target_size_unmeasured": "Target sizes could not be measured ({error}) – manual audit required",
+    "targets_too_small": "{count} of {total} targets are under 24×24 CSS px without enough spacing (e.g. {examples})",
+    "targets_meet_minimum": "All {total} targets are at least 24×24 CSS px or sufficiently spaced ({spaced} via spacing, {inline} inline exempt)",
+    "targets_below_44": "{count} of {total} targets are smaller than 44×44 CSS px",
+    "targets_meet_44": "All {total} targets are at least 44×44 CSS px (inline targets exempt)",
+    # ---- 3.1.x Readable ----
+    "page_lang_set": "html lang attribute set to '{lang}'",
+    "page_lang_mismatch": "html lang attribute set to '{lang}' (Warning: detected '{detected}')",
+    "page_lang_missing": "Missing html lang attribute",
+    "page_lang_missing_detected": "Missing html lang attribute (Warning: detected '{detected}')",
+    "parts_lang_mismatch": (
+        "{count} text blocks appear to be in a different language than their lang attribute "
+        "(e.g. <{tag}> lang='{lang}' reads as '{detected}')"
+    ),
+    "parts_lang_match": "{count} elements have secondary lang attributes; all {checked} checked text blocks match their lang",
+    "no_foreign_passages": "No passages in another language detected ({checked} text blocks checked)",
+    "no_secondary_lang": "No secondary lang attributes detected (verify if needed)",
+    "difficult_ratio_ok": "Difficult-word ratio {pct:.1f}% (acceptable)",
+    "difficult_ratio_high": "Difficult-word ratio high ({pct:.1f}%)",
+    "few_abbreviations": "Few abbreviations detected ({count})",
+    "many_abbreviations": "Many abbreviations detected ({count})",
+    "readable": "Readability ≈ {grade} (Flesch {flesch:.0f})",
+    "readable_hard_blocks": "Readability ≈ {grade} (Flesch {flesch:.0f}); {hard} of {scored} text blocks below Flesch 60",
+    "hard_to_read": "Readability difficult – {grade} (Flesch {flesch:.0f})",
+    "hard_to_read_blocks": "Readability difficult – {grade} (Flesch {flesch:.0f}); {hard} of {scored} text blocks below Flesch 60",
+    "pronunciation_cues": "Pronunciation cues present (ruby/phoneme)",
+    "no_pronunciation_aids": "No pronunciation aids detected",
+    # ---- 3.2.x Predictable ----
+    "no_focus_navigation": "No focus-triggered navigation",
+    "focus_navigation": "{count} elements change context on focus",
+    "no_input_navigation": "No input-triggered context change",
+    "input_navigation": "{count} elements change context on input",
+    "nav_landmarks": "<nav> landmarks present",
+    "no_nav_landmarks": "No explicit <nav> landmarks detected",
+    "consistent_labels": "Component labelling appears consistent",
+    "duplicate_button_labels": "Duplicate button labels might cause confusion",
+    "no_unsolicited_changes": "No unsolicited context changes detected",
+    "auto_submit_forms": "{count} forms submit automatically without user confirmation",
+    "help_links": "Help links found",
+    "no_help_links": "No help links detected",
+    # ---- 3.3.x Input assistance ----
+    "no_inline_validation": "No inline validation attributes found",
+    "aria_invalid_present": "aria-invalid markers present",
+    "all_labelled": "All form controls have labels",
+    "missing_labels": "{count} controls missing labels",
+    "no_error_suggestion": "Could not detect automatic error suggestion patterns",
+    "error_messages_found": "Potential error message elements found",
+    "confirmation_prompts": "Confirmation prompts present",
+    "no_confirmation_prompts": "No confirmation prompts detected for critical forms",
+    "help_descriptors": "Help descriptors present",
+    "no_help_descriptors": "No help descriptors detected",
+    "autocomplete_disabled": "Some inputs disable autocomplete",
+    "autocomplete_available": "Autocomplete available on inputs",
+    "redundant_fields": "Possible redundant entry fields: {fields}",
+    "no_redundant_fields": "No obvious redundant fields",
+    "password_fields": "Password fields present – ensure alternative authentication methods",
+    "no_password_auth": "No password-only authentication detected",
+    "enhanced_auth_unverified": "Unable to verify enhanced authentication heuristics",
+}
+
+RECOMMENDATIONS = {
+    # ---- Shared ----
+    "review_truncated_page": "Raise WCAG_MAX_PAGE_BYTES / WCAG_MAX_PAGE_NODES or review the rest of the page manually.",
+    "focus_contrast": "Verify focus indicators meet a 3:1 contrast ratio against adjacent colors.",
+    "add_skip_links": "Add skip navigation links.",
+    # ---- 2.1.x Keyboard ----
+    "manual_keyboard_test": "Manually test all interactive elements with keyboard only",
+    "custom_widget_traps": "Test for keyboard traps in custom widgets",
+    # ---- 2.2.x Timing ----
+    "extend_meta_refresh": "Remove or extend any meta refresh to at least 20 hours OR provide a user-extendable control.",
+    "adjustable_timeouts": "Ensure JavaScript timeouts are adjustable, can be turned off, or extended by the user.",
+    "pause_moving_content": "Provide user controls to pause, stop or hide any auto-moving / autoplaying content that lasts more than 5 seconds.",
+    "monitor_timing": "No major timing-related issues detected – continue to monitor dynamic components.",
+    "check_fetch_environment": "Ensure the execution environment has internet access and the 'requests' & 'lxml' packages installed.",
+    "manual_timing_review": "Perform a manual review of timing controls on the target site.",
+    # ---- 2.3.x Seizures ----
+    "monitor_dynamic_content": "Continue monitoring for dynamic content",
+    "remove_flashing": "Remove or slow down content that flashes more than three times per second, or shrink it below the general and red flash thresholds.",
+    "reduce_small_flashes": "Small areas flash more than three times per second; remove the flashing to meet 2.3.2 (AAA).",
+    "test_video_flashing": "Test video content for flashing sequences",
+    "animation_controls": "Verify animation controls are available",
+    # ---- 2.4.x Navigation ----
+    "aria_landmarks": "Implement ARIA landmarks",
+    "heading_structure": "Ensure logical heading structure (H1-H6)",
+    "descriptive_links": "Improve link descriptiveness",
+    "sticky_overlap": "Check that sticky headers/footers do not cover the keyboard focus ring.",
+    "focus_partially_visible": "Ensure focused elements remain at least partially visible within the viewport.",
+    "focus_indicator_area": "Ensure focus indicator has minimum area ≥ 2 CSS px outline or 8 px thickness equivalent.",
+    # ---- 2.5.x Input modalities ----
+    "touch_target_44": "Ensure 44x44 pixel minimum touch targets",
+    "motion_alternatives": "Provide alternatives to motion-based controls",
+    "assistive_input_testing": "Test with assistive input devices",
+    "gesture_alternatives": "Verify pointer gesture alternatives",
+    "single_pointer_alternative": "Provide alternative controls (e.g., buttons) for functionality that currently relies on drag-and-drop.",
+    "target_size_24": "Increase touch target size to minimum 24×24 CSS px (or provide spacing).",
+    "target_spacing": "Ensure sufficient spacing between smaller targets to avoid activation errors.",
+    # ---- 3.1.x Readable ----
+    "set_page_lang": "Ensure <html lang> is set and matches detected language.",
+    "mark_language_parts": "Add lang attributes for passages in other languages.",
+    "explain_jargon": "Explain jargon/idioms & provide glossary for abbreviations.",
+    "target_flesch_60": "Target Flesch score ≥ 60 (about grade 8).",
+    "pronunciation_guides": "Provide pronunciation guides (e.g., ruby, phoneme).",
+    # ---- 3.2.x Predictable ----
+    "no_context_change_on_event": "Avoid changing pages automatically on focus or input events.",
+    "stable_navigation": "Use <nav> landmarks and keep navigation order stable.",
+    "consistent_labelling": "Label components consistently across the site.",
+    "explicit_context_change": "Ensure context changes occur only after explicit user action (e.g., button click).",
+    "persistent_help": "Provide a persistent Help / FAQ link on every page.",
+    # ---- 3.3.x Input assistance ----
+    "associate_labels": "Provide programmatically associated labels for every form control.",
+    "inline_validation": "Use inline validation (aria-invalid) and descriptive error messages.",
+    "confirm_transactions": "Confirm critical transactions before final submission.",
+    "help_text": "Offer help text via aria-describedby or visible instructions.",
+    "autocomplete_no_redundancy": "Enable autocomplete and avoid redundant data entry.",
+    "passwordless_auth": "Provide passkey / MFA / passwordless authentication options.",
+}
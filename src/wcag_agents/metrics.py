@@ -0,0 +1,279 @@
+"""Prometheus metrics, tracing spans and opt-in profiling.
+
+Every tool, page fetch, parse, CLI subprocess, browser launch, agent hop and
+LLM turn is timed into a Prometheus histogram, with counters for tool errors
+and cache hits. Metrics are collected in-process whenever ``prometheus_client``
+is installed (everything here degrades to no-ops when it is not); set
+``WCAG_METRICS_PORT`` to expose them over HTTP. When OpenTelemetry is
+installed, the same operations are also recorded as trace spans.
+
+Audits can additionally capture a cProfile and tracemalloc report each: set
+``WCAG_PROFILE_DIR`` and every ``profile_audit`` block writes
+``<label>-<timestamp>.prof`` (cProfile stats for the calling thread) and
+``.alloc.txt`` (top allocation sites) into that directory.
+
+Configuration (environment variables)::
+
+    WCAG_METRICS_PORT    serve /metrics on this port (default: not served)
+    WCAG_PROFILE_DIR     write per-audit cProfile / tracemalloc reports here
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+PROFILE_TOP_ALLOCATIONS = 50
+# Invocations whose agent hops are tracked at once (oldest are forgotten first).
+_TRACKED_INVOCATIONS = 1024
+
+_SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class _NoopMetric:
+    """Stands in for a metric when ``prometheus_client`` is not installed."""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+
+class _Metrics:
+    def __init__(self):
+        try:
+            from prometheus_client import Counter, Histogram  # type: ignore
+        except ImportError:
+            noop = _NoopMetric()
+            self.fetch = self.parse = self.tool = self.tool_errors = self.cache = noop
+            self.cli = self.browser_launch = self.agent = self.transfers = self.llm_turn = noop
+            return
+
+        def histogram(name: str, doc: str, labels: Tuple[str, ...] = ()) -> Any:
+            return Histogram(name, doc, labels, buckets=_SECONDS_BUCKETS)
+
+        self.fetch = histogram("wcag_fetch_seconds", "Page download (including streaming parse)", ("client",))
+        self.parse = histogram("wcag_parse_seconds", "Time spent in the HTML parser per page")
+        self.tool = histogram("wcag_tool_seconds", "Tool call duration", ("tool",))
+        self.tool_errors = Counter("wcag_tool_errors_total", "Tool calls that returned or raised an error", ("tool",))
+        self.cache = Counter("wcag_cache_events_total", "Disk cache lookups", ("kind", "outcome"))
+        self.cli = histogram("wcag_cli_seconds", "External CLI subprocess duration", ("command",))
+        self.browser_launch = histogram("wcag_browser_launch_seconds", "Chromium launch time")
+        self.agent = histogram("wcag_agent_seconds", "Time an agent is active per invocation", ("agent",))
+        self.transfers = Counter("wcag_agent_transfers_total", "Control transfers between agents", ("source", "target"))
+        self.llm_turn = histogram("wcag_llm_turn_seconds", "LLM request latency per agent (to first response)", ("agent",))
+
+        port = os.getenv("WCAG_METRICS_PORT")
+        if port:
+            from prometheus_client import start_http_server  # type: ignore
+
+            try:
+                start_http_server(int(port))
+            except OSError:
+                pass  # another process of this deployment already serves the port
+
+
+_metrics: Optional[_Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> _Metrics:
+    """Return the process-wide metric set (registered on first use)."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = _Metrics()
+    return _metrics
+
+# ===================== Tracing =====================
+
+@functools.lru_cache(maxsize=1)
+def _tracer():
+    try:
+        from opentelemetry import trace  # type: ignore
+    except ImportError:
+        return None
+    return trace.get_tracer("wcag_agents")
+
+
+def span(name: str, **attributes: Any):
+    """An OpenTelemetry span when OpenTelemetry is installed, otherwise a no-op context."""
+    tracer = _tracer()
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.start_as_current_span(name, attributes={k: str(v) for k, v in attributes.items()})
+
+
+@contextlib.contextmanager
+def timed(histogram: Any, name: str, **attributes: Any) -> Iterator[None]:
+    """Observe the duration of the block into *histogram* inside a span called *name*."""
+    start = time.perf_counter()
+    with span(name, **attributes):
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+# ===================== Tools =====================
+
+def _is_error(result: Any) -> bool:
+    from .cache import _is_error as cache_is_error
+
+    return cache_is_error(result)
+
+
+def instrumented(tool: Callable[..., Any]) -> Callable[..., Any]:
+    """Time a sync or async tool and count the calls that fail."""
+    name = tool.__name__
+
+    if asyncio.iscoroutinefunction(tool):
+
+        @functools.wraps(tool)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            metrics = get_metrics()
+            try:
+                with timed(metrics.tool.labels(name), f"tool.{name}"):
+                    result = await tool(*args, **kwargs)
+            except Exception:
+                metrics.tool_errors.labels(name).inc()
+                raise
+            if _is_error(result):
+                metrics.tool_errors.labels(name).inc()
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(tool)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        metrics = get_metrics()
+        try:
+            with timed(metrics.tool.labels(name), f"tool.{name}"):
+                result = tool(*args, **kwargs)
+        except Exception:
+            metrics.tool_errors.labels(name).inc()
+            raise
+        if _is_error(result):
+            metrics.tool_errors.labels(name).inc()
+        return result
+
+    return wrapper
+
+
+def cli_label(cmd: list) -> str:
+    """Low-cardinality label for a CLI command line (``npx pa11y …`` -> ``pa11y``)."""
+    if not cmd:
+        return "unknown"
+    program = cmd[1] if os.path.basename(cmd[0]) == "npx" and len(cmd) > 1 else cmd[0]
+    return re.sub(r"[^\w.-]", "_", os.path.basename(program))
+
+# ===================== Agent callbacks =====================
+
+_invocations: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_invocations_lock = threading.Lock()
+
+
+def _invocation(callback_context: Any) -> Tuple[Dict[str, Any], str]:
+    invocation_id = str(getattr(callback_context, "invocation_id", "") or "")
+    agent = str(getattr(callback_context, "agent_name", "") or "unknown")
+    with _invocations_lock:
+        state = _invocations.get(invocation_id)
+        if state is None:
+            state = _invocations[invocation_id] = {"last_agent": None, "agent_start": {}, "model_start": {}}
+            while len(_invocations) > _TRACKED_INVOCATIONS:
+                _invocations.popitem(last=False)
+        else:
+            _invocations.move_to_end(invocation_id)
+    return state, agent
+
+
+def _before_agent(callback_context: Any) -> None:
+    state, agent = _invocation(callback_context)
+    previous = state["last_agent"]
+    if previous is not None and previous != agent:
+        get_metrics().transfers.labels(previous, agent).inc()
+    state["last_agent"] = agent
+    state["agent_start"][agent] = time.perf_counter()
+    return None
+
+
+def _after_agent(callback_context: Any) -> None:
+    state, agent = _invocation(callback_context)
+    start = state["agent_start"].pop(agent, None)
+    if start is not None:
+        get_metrics().agent.labels(agent).observe(time.perf_counter() - start)
+    return None
+
+
+def _before_model(callback_context: Any, llm_request: Any) -> None:
+    state, agent = _invocation(callback_context)
+    state["model_start"][agent] = time.perf_counter()
+    return None
+
+
+def _after_model(callback_context: Any, llm_response: Any) -> None:
+    state, agent = _invocation(callback_context)
+    # Streaming responses call back per chunk; the first one ends the turn's latency.
+    start = state["model_start"].pop(agent, None)
+    if start is not None:
+        get_metrics().llm_turn.labels(agent).observe(time.perf_counter() - start)
+    return None
+
+
+def agent_callbacks() -> Dict[str, Callable[..., None]]:
+    """``LlmAgent`` keyword arguments recording agent time, transfers and LLM turn latency."""
+    return {
+        "before_agent_callback": _before_agent,
+        "after_agent_callback": _after_agent,
+        "before_model_callback": _before_model,
+        "after_model_callback": _after_model,
+    }
+
+# ===================== Profiling =====================
+
+@contextlib.contextmanager
+def profile_audit(label: str, directory: Optional[str] = None) -> Iterator[None]:
+    """Capture cProfile and tracemalloc reports for the block when profiling is enabled.
+
+    Enabled by *directory* or ``WCAG_PROFILE_DIR``; otherwise the block runs
+    unprofiled. cProfile only sees the calling thread, so work handed to
+    worker threads shows up as the time spent waiting for it.
+    """
+    directory = directory or os.getenv("WCAG_PROFILE_DIR")
+    if not directory:
+        yield
+        return
+
+    import cProfile
+    import tracemalloc
+
+    os.makedirs(directory, exist_ok=True)
+    safe_label = re.sub(r"[^\w.-]+", "_", label)[:80]
+    stem = os.path.join(directory, f"{safe_label}-{time.strftime('%Y%m%d-%H%M%S')}")
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{stem}.prof")
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        with open(f"{stem}.alloc.txt", "w", encoding="utf-8") as fh:
+            fh.write(f"peak traced memory: {peak / (1 << 20):.1f} MiB\n")
+            for stat in snapshot.statistics("lineno")[:PROFILE_TOP_ALLOCATIONS]:
+                fh.write(f"{stat}\n")
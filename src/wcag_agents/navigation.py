@@ -1,5 +1,6 @@
 from google.adk.agents import LlmAgent
-from . import tools
+from . import async_tools, tools
+from .metrics import agent_callbacks
 
 navigation_structure_agent = LlmAgent(
     model="gemini-1.5-flash",
@@ -20,9 +21,10 @@ Process:
 """,
     tools=[
         tools.test_navigation_structure,
-        tools.test_focus_not_obscured,
-        tools.test_focus_appearance,
-        tools.run_axe_devtools,
-        tools.run_lighthouse_accessibility,
+        async_tools.test_focus_not_obscured,
+        async_tools.test_focus_appearance,
+        async_tools.run_axe_devtools,
+        async_tools.run_lighthouse_accessibility,
     ],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
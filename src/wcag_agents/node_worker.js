@@ -0,0 +1,226 @@
+'use strict';
+// Persistent engine worker for the WCAG tools (see node_worker.py).
+//
+// Keeps Pa11y, axe-core and Lighthouse loaded next to one shared headless
+// Chrome and serves URL batches over stdin/stdout as newline-delimited JSON:
+//
+//   request   {"id": 1, "engine": "pa11y" | "axe" | "lighthouse", "urls": ["https://..."]}
+//   cancel    {"cancel": 1}   stop request 1: close its open pages and skip its remaining URLs
+//   response  {"id": 1, "url": "https://...", "result": {...}}   one line per URL, as it finishes
+//             {"id": 1, "url": "https://...", "error": "..."}
+//             {"id": 1, "done": true}
+//
+// Pa11y and axe share one headless Chrome. Lighthouse drives its whole browser
+// (emulation, throttling), so it gets a Chrome of its own and runs one at a
+// time across every request.
+//
+// On startup the worker prints {"ready": true, "engines": {...}} listing which
+// engines could be loaded, so the Python side can fall back to npx for the rest.
+
+const readline = require('readline');
+const { pathToFileURL } = require('url');
+
+const CONCURRENCY = Math.max(1, parseInt(process.env.WCAG_NODE_WORKER_CONCURRENCY || '4', 10));
+
+function tryRequire(name) {
+  try {
+    return require(name);
+  } catch (err) {
+    return null;
+  }
+}
+
+async function tryImport(name) {
+  // Dynamic import() ignores NODE_PATH, so resolve through require first.
+  let target = name;
+  try {
+    target = pathToFileURL(require.resolve(name)).href;
+  } catch (err) {
+    // Fall back to a bare specifier resolved from this file's location.
+  }
+  try {
+    return await import(target);
+  } catch (err) {
+    return null;
+  }
+}
+
+const puppeteer = tryRequire('puppeteer');
+const pa11y = tryRequire('pa11y');
+const axePuppeteer = tryRequire('@axe-core/puppeteer');
+let lighthouse = null;
+
+function launcher() {
+  let browserPromise = null;
+  const get = async () => {
+    if (browserPromise) {
+      const browser = await browserPromise.catch(() => null);
+      if (browser && browser.isConnected()) {
+        return browser;
+      }
+    }
+    browserPromise = puppeteer.launch({ headless: 'new', args: ['--no-sandbox', '--disable-dev-shm-usage'] });
+    return browserPromise;
+  };
+  get.close = async () => {
+    const pending = browserPromise;
+    browserPromise = null;
+    const browser = pending ? await pending.catch(() => null) : null;
+    if (browser) {
+      await browser.close().catch(() => {});
+    }
+  };
+  return get;
+}
+
+const getBrowser = launcher();
+const getLighthouseBrowser = launcher();
+let lighthouseTurn = Promise.resolve();
+
+// Every scan gets the job of its request: it registers how to abort itself
+// (closing its page or browser) and the cancel message runs those aborts.
+async function withPage(job, run) {
+  const page = await (await getBrowser()).newPage();
+  const abort = () => page.close().catch(() => {});
+  job.aborts.add(abort);
+  try {
+    return await run(page);
+  } finally {
+    job.aborts.delete(abort);
+    await abort();
+  }
+}
+
+async function runPa11y(url, job) {
+  const browser = await getBrowser();
+  // Same shape as `pa11y --reporter json`.
+  return withPage(job, async (page) => (await pa11y(url, { browser, page, standard: 'WCAG2AA' })).issues);
+}
+
+async function runAxe(url, job) {
+  return withPage(job, async (page) => {
+    await page.goto(url, { waitUntil: 'networkidle2' });
+    return new axePuppeteer.AxePuppeteer(page).withTags(['wcag2a', 'wcag2aa']).analyze();
+  });
+}
+
+async function runLighthouse(url, job) {
+  // Worker-wide mutex: each run waits for the previous one, whatever request it came from.
+  const previous = lighthouseTurn;
+  let release;
+  lighthouseTurn = new Promise((resolve) => {
+    release = resolve;
+  });
+  await previous;
+  // A cancelled run closes the Lighthouse browser; the next run launches a fresh one.
+  const abort = () => getLighthouseBrowser.close();
+  try {
+    if (job.cancelled) {
+      throw new Error('cancelled');
+    }
+    job.aborts.add(abort);
+    const browser = await getLighthouseBrowser();
+    const port = Number(new URL(browser.wsEndpoint()).port);
+    const runner = await lighthouse(url, {
+      port,
+      output: 'json',
+      logLevel: 'error',
+      onlyCategories: ['accessibility'],
+    });
+    return runner.lhr;
+  } finally {
+    job.aborts.delete(abort);
+    release();
+  }
+}
+
+const engines = {
+  pa11y: { available: () => Boolean(puppeteer && pa11y), run: runPa11y, concurrency: CONCURRENCY },
+  axe: { available: () => Boolean(puppeteer && axePuppeteer), run: runAxe, concurrency: CONCURRENCY },
+  // Runs are serialised worker-wide inside runLighthouse.
+  lighthouse: { available: () => Boolean(puppeteer && lighthouse), run: runLighthouse, concurrency: 1 },
+};
+
+const jobs = new Map();
+
+function cancel(id) {
+  const job = jobs.get(id);
+  if (job) {
+    job.cancelled = true;
+    for (const abort of job.aborts) {
+      abort();
+    }
+  }
+}
+
+function send(message) {
+  process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+async function handle(request) {
+  const { id, engine, urls } = request;
+  const spec = engines[engine];
+  if (!spec || !spec.available()) {
+    send({ id, unavailable: true, error: `engine '${engine}' is not available in the worker` });
+    send({ id, done: true });
+    return;
+  }
+  const queue = Array.isArray(urls) ? urls.slice() : [];
+  const job = { cancelled: false, aborts: new Set() };
+  jobs.set(id, job);
+  async function drain() {
+    while (queue.length && !job.cancelled) {
+      const url = queue.shift();
+      try {
+        send({ id, url, result: await spec.run(url, job) });
+      } catch (err) {
+        send({ id, url, error: job.cancelled ? 'cancelled' : String((err && err.message) || err) });
+      }
+    }
+  }
+  const lanes = Array.from({ length: Math.min(spec.concurrency, queue.length) || 1 }, drain);
+  try {
+    await Promise.all(lanes);
+  } finally {
+    jobs.delete(id);
+  }
+  send({ id, done: true });
+}
+
+async function main() {
+  const lighthouseModule = await tryImport('lighthouse');
+  lighthouse = lighthouseModule ? lighthouseModule.default || lighthouseModule : null;
+
+  send({
+    ready: true,
+    engines: Object.fromEntries(Object.entries(engines).map(([name, spec]) => [name, spec.available()])),
+  });
+
+  const input = readline.createInterface({ input: process.stdin });
+  input.on('line', (line) => {
+    if (!line.trim()) {
+      return;
+    }
+    let request;
+    try {
+      request = JSON.parse(line);
+    } catch (err) {
+      send({ error: `invalid request: ${err.message}` });
+      return;
+    }
+    if (request.cancel !== undefined) {
+      cancel(request.cancel);
+      return;
+    }
+    handle(request).catch((err) => {
+      send({ id: request.id, error: String(err) });
+      send({ id: request.id, done: true });
+    });
+  });
+  input.on('close', async () => {
+    await Promise.all([getBrowser.close(), getLighthouseBrowser.close()]);
+    process.exit(0);
+  });
+}
+
+main();
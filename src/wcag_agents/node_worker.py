@@ -0,0 +1,287 @@
+"""Warm Node.js worker for the Pa11y, axe and Lighthouse integrations.
+
+Spawning ``npx`` per scan pays package resolution, Node startup and a Chrome
+launch every time. ``node_worker.js`` instead keeps the engines loaded next to
+one shared headless Chrome; this module starts it lazily, sends URL batches
+over its stdin and streams the JSON results back as each URL finishes. A
+request the caller stops waiting for (timed out or abandoned) is cancelled in
+the worker, which closes its pages instead of scanning on.
+
+Engines the worker cannot load (missing npm packages) are reported as
+unavailable, and the tools in ``tools`` fall back to the ``npx`` CLIs for them.
+
+Configuration (environment variables)::
+
+    WCAG_NODE_WORKER=0                 disable the worker and always use npx
+    WCAG_NODE_MODULES                  extra node_modules directory to resolve engines from
+    WCAG_NODE_WORKER_CONCURRENCY       URLs scanned in parallel per batch (default 4)
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "node_worker.js")
+STARTUP_TIMEOUT = 30
+URL_TIMEOUT = 180
+
+_DONE = object()
+
+
+class WorkerUnavailable(RuntimeError):
+    """The worker (or the requested engine inside it) cannot serve requests."""
+
+
+class NodeWorker:
+    """One long-lived ``node node_worker.js`` process and its request routing."""
+
+    def __init__(self, script: str = WORKER_SCRIPT, node: Optional[str] = None):
+        self.script = script
+        self.node = node or shutil.which("node")
+        self.engines: Dict[str, bool] = {}
+        self._proc: Optional[subprocess.Popen] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Callable[[Optional[dict]], None]] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    # ---- Process lifecycle ----
+
+    def _env(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        paths = [os.path.join(os.getcwd(), "node_modules"), os.getenv("WCAG_NODE_MODULES", ""), env.get("NODE_PATH", "")]
+        env["NODE_PATH"] = os.pathsep.join(p for p in paths if p)
+        return env
+
+    def _ensure_started(self) -> subprocess.Popen:
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return self._proc
+            if not self.node:
+                raise WorkerUnavailable("node binary not found – Node.js is required for the engine worker.")
+            proc = subprocess.Popen(
+                [self.node, self.script],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+                env=self._env(),
+            )
+            ready: "queue.Queue[Optional[dict]]" = queue.Queue()
+            threading.Thread(target=self._read_loop, args=(proc, ready), name="wcag-node-worker", daemon=True).start()
+            try:
+                hello = ready.get(timeout=STARTUP_TIMEOUT)
+            except queue.Empty:
+                hello = None
+            if not hello or not hello.get("ready"):
+                proc.kill()
+                raise WorkerUnavailable("Node engine worker failed to start.")
+            self.engines = dict(hello.get("engines") or {})
+            self._proc = proc
+            return proc
+
+    def _read_loop(self, proc: subprocess.Popen, ready: "queue.Queue[Optional[dict]]") -> None:
+        for line in proc.stdout:
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if message.get("ready"):
+                ready.put(message)
+                continue
+            callback = self._pending.get(message.get("id"))
+            if callback is not None:
+                callback(message)
+        # The process exited: wake every waiter so it can report the failure.
+        ready.put(None)
+        for request_id in list(self._pending):
+            callback = self._pending.pop(request_id, None)
+            if callback is not None:
+                callback(None)
+
+    def close(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.stdin.close()
+                proc.wait(10)
+            except Exception:
+                proc.kill()
+
+    def available(self, engine: str) -> bool:
+        try:
+            self._ensure_started()
+        except WorkerUnavailable:
+            return False
+        return bool(self.engines.get(engine))
+
+    # ---- Requests ----
+
+    def _send(self, engine: str, urls: List[str], callback: Callable[[Optional[dict]], None]) -> int:
+        proc = self._ensure_started()
+        if not self.engines.get(engine):
+            raise WorkerUnavailable(f"engine '{engine}' is not available in the worker")
+        request_id = next(self._ids)
+        self._pending[request_id] = callback
+        try:
+            with self._write_lock:
+                proc.stdin.write(json.dumps({"id": request_id, "engine": engine, "urls": urls}) + "\n")
+                proc.stdin.flush()
+        except (BrokenPipeError, OSError) as exc:
+            self._pending.pop(request_id, None)
+            raise WorkerUnavailable(f"Node engine worker is not accepting requests: {exc}")
+        return request_id
+
+    def _cancel(self, request_id: int) -> None:
+        """Tell the worker to stop a request nobody waits for any more (it closes the request's pages)."""
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            with self._write_lock:
+                proc.stdin.write(json.dumps({"cancel": request_id}) + "\n")
+                proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            pass
+
+    def stream(self, engine: str, urls: Iterable[str], timeout: float = URL_TIMEOUT) -> Iterator[Tuple[str, dict]]:
+        """Yield ``(url, result)`` pairs for a batch as the worker finishes each URL."""
+        urls = list(urls)
+        inbox: "queue.Queue[object]" = queue.Queue()
+        request_id = self._send(engine, urls, lambda message: inbox.put(_DONE if message is None else message))
+        remaining = set(urls)
+        failure = f"Engine '{engine}' finished without a result"
+        finished = False
+        try:
+            while True:
+                try:
+                    message = inbox.get(timeout=timeout)
+                except queue.Empty:
+                    for url in remaining:
+                        yield url, {"error": f"Engine '{engine}' timed out after {timeout} seconds"}
+                    return
+                if message is _DONE:
+                    finished = True
+                    for url in remaining:
+                        yield url, {"error": "Node engine worker exited unexpectedly"}
+                    return
+                if message.get("done"):
+                    finished = True
+                    # A request-level failure (no url) answers every URL it left unscanned.
+                    for url in remaining:
+                        yield url, {"error": failure}
+                    return
+                url = message.get("url")
+                if url is None:
+                    failure = message.get("error", failure)
+                    continue
+                remaining.discard(url)
+                yield url, message["result"] if "result" in message else {"error": message.get("error", "unknown error")}
+        finally:
+            self._pending.pop(request_id, None)
+            if not finished:
+                # Timed out or abandoned: stop the scans still running in the worker.
+                self._cancel(request_id)
+
+    async def stream_async(
+        self, engine: str, urls: Iterable[str], timeout: float = URL_TIMEOUT
+    ):
+        """Async iterator form of ``stream`` for callers on an event loop."""
+        urls = list(urls)
+        loop = asyncio.get_running_loop()
+        inbox: "asyncio.Queue[object]" = asyncio.Queue()
+
+        def deliver(message: Optional[dict]) -> None:
+            loop.call_soon_threadsafe(inbox.put_nowait, _DONE if message is None else message)
+
+        # Starting the process may block for a moment; keep it off the event loop.
+        request_id = await asyncio.to_thread(self._send, engine, urls, deliver)
+        remaining = set(urls)
+        failure = f"Engine '{engine}' finished without a result"
+        finished = False
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(inbox.get(), timeout)
+                except asyncio.TimeoutError:
+                    for url in remaining:
+                        yield url, {"error": f"Engine '{engine}' timed out after {timeout} seconds"}
+                    return
+                if message is _DONE:
+                    finished = True
+                    for url in remaining:
+                        yield url, {"error": "Node engine worker exited unexpectedly"}
+                    return
+                if message.get("done"):
+                    finished = True
+                    # A request-level failure (no url) answers every URL it left unscanned.
+                    for url in remaining:
+                        yield url, {"error": failure}
+                    return
+                url = message.get("url")
+                if url is None:
+                    failure = message.get("error", failure)
+                    continue
+                remaining.discard(url)
+                yield url, message["result"] if "result" in message else {"error": message.get("error", "unknown error")}
+        finally:
+            self._pending.pop(request_id, None)
+            if not finished:
+                # Timed out or abandoned: stop the scans still running in the worker.
+                self._cancel(request_id)
+
+    def run_batch(self, engine: str, urls: Iterable[str], timeout: float = URL_TIMEOUT) -> Dict[str, dict]:
+        """Scan every URL with one engine, sharing the worker's browser across the batch."""
+        return dict(self.stream(engine, urls, timeout))
+
+    async def run_batch_async(self, engine: str, urls: Iterable[str], timeout: float = URL_TIMEOUT) -> Dict[str, dict]:
+        return {url: result async for url, result in self.stream_async(engine, urls, timeout)}
+
+
+_worker: Optional[NodeWorker] = None
+_worker_lock = threading.Lock()
+
+
+def worker_enabled() -> bool:
+    return os.getenv("WCAG_NODE_WORKER", "1").lower() not in ("0", "false", "no")
+
+
+def get_node_worker() -> NodeWorker:
+    """Return the process-wide worker (started on first request)."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            import atexit
+
+            _worker = NodeWorker()
+            atexit.register(_worker.close)
+        return _worker
+
+
+def run_engine(engine: str, url: str) -> Optional[dict]:
+    """Scan one URL through the worker, or return None if it cannot serve *engine*."""
+    if not worker_enabled():
+        return None
+    try:
+        return get_node_worker().run_batch(engine, [url])[url]
+    except WorkerUnavailable:
+        return None
+
+
+async def run_engine_async(engine: str, url: str) -> Optional[dict]:
+    """Async form of ``run_engine``."""
+    if not worker_enabled():
+        return None
+    try:
+        return (await get_node_worker().run_batch_async(engine, [url]))[url]
+    except WorkerUnavailable:
+        return None
@@ -0,0 +1,503 @@
+"""Offline audit input: saved HTML files, directory trees and WARC / WACZ archives.
+
+Every check takes a URL; offline pages get one too. Nothing on disk is read
+unless it was mounted first (by ``bulk_audit --offline``, the CLI, or
+``WCAG_OFFLINE``), so the agent tools cannot be pointed at arbitrary files:
+
+* a *mounted* directory without a base URL serves its files as ``file://``
+  URLs; mounting a single file mounts the directory it is in. ``file://`` URLs
+  outside every mounted directory are never served, and
+  ``tools._normalize_url`` only keeps ``file://`` URLs that a mount serves;
+* a *mounted* directory with a base URL serves that site from disk, e.g. a
+  pre-production build mounted at ``https://www.example.com/``;
+* a *mounted* WARC (``.warc`` / ``.warc.gz``) or WACZ archive serves the HTTP
+  responses it recorded under their original URLs.
+
+A directory URL stands for its ``index.html``.
+
+Archives are memory-mapped, never read into memory. The record index
+(offsets only) is built on first use: from the CDXJ index a WACZ ships with,
+or else by one sequential scan that keeps nothing but each record's header.
+A record's body is sliced from the mapping (``.warc``) or decompressed from
+its own gzip member (``.warc.gz``, one member per record as the WARC spec
+recommends) only when that URL is audited. WARCs inside a WACZ must be
+stored uncompressed in the zip, which is what WACZ writers do.
+
+Mounted pages bypass the network and the on-disk page cache. Browser checks
+load ``file://`` pages directly and have requests to mounted URLs answered from
+disk (see ``route``); anything not mounted still goes to the network.
+
+Configuration (environment variables)::
+
+    WCAG_OFFLINE    comma-separated mounts made on first use; each is an
+                    archive path, or ``DIRECTORY=BASE_URL``
+"""
+
+import gzip
+import json
+import mmap
+import os
+import threading
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+from urllib.parse import unquote, urldefrag, urlsplit
+
+from .cache import cache_key
+from .ingest import CHUNK_SIZE, MAX_PAGE_BYTES, declared_charset, ingest_bytes
+from .metrics import get_metrics, timed
+from .snapshot import PageSnapshot, snapshot_from_ingest
+
+HTML_SUFFIXES = (".html", ".htm", ".xhtml")
+ARCHIVE_SUFFIXES = (".warc", ".warc.gz", ".wacz")
+# Decompressed bytes of a record kept while scanning: enough for the WARC and HTTP headers.
+HEAD_LIMIT = 64 * 1024
+# Headers describing the archived transfer rather than the decoded body handed out.
+_TRANSFER_HEADERS = ("transfer-encoding", "content-encoding", "content-length")
+
+Buffer = Union[bytes, memoryview]
+
+
+class Response(NamedTuple):
+    url: str
+    status_code: int
+    headers: Dict[str, str]  # lower-cased names
+    body: Buffer
+
+
+def is_local(location: str) -> bool:
+    """Whether *location* names a local file or directory rather than a web address."""
+    if location.startswith("file:"):
+        return True
+    return "://" not in location and os.path.exists(location)
+
+
+def file_url(location: str) -> str:
+    """``file://`` URL for a local path (a directory stands for its ``index.html``)."""
+    if location.startswith("file:"):
+        return location
+    path = Path(location).resolve()
+    if path.is_dir():
+        path = path / "index.html"
+    return path.as_uri()
+
+
+def _read_file(path: str) -> Buffer:
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if not size:
+            return b""
+        # The mapping outlives the file object; it is released with the last view of it.
+        return memoryview(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _file_response(url: str, path: str) -> Response:
+    content_type = "text/html" if path.lower().endswith(HTML_SUFFIXES) else "application/octet-stream"
+    return Response(url, 200, {"content-type": content_type}, _read_file(path))
+
+# ===================== HTTP payloads =====================
+
+def _headers(block: bytes) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    for line in block.decode("latin-1").split("\r\n")[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _dechunk(body: Buffer) -> bytes:
+    data = bytes(body)
+    out = bytearray()
+    pos = 0
+    while pos < len(data):
+        line_end = data.find(b"\r\n", pos)
+        if line_end < 0:
+            break
+        try:
+            size = int(data[pos:line_end].split(b";", 1)[0], 16)
+        except ValueError:
+            break
+        if size == 0:
+            break
+        out += data[line_end + 2 : line_end + 2 + size]
+        pos = line_end + 4 + size
+    return bytes(out)
+
+
+def _decode_body(body: Buffer, headers: Mapping[str, str]) -> Buffer:
+    """Undo the transfer and content encodings an archived response was recorded with."""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = _dechunk(body)
+    coding = headers.get("content-encoding", "").lower()
+    if coding in ("gzip", "x-gzip", "deflate"):
+        # 47 accepts gzip and zlib framing; a raw deflate stream needs negative window bits.
+        for wbits in (47, -zlib.MAX_WBITS):
+            try:
+                return zlib.decompressobj(wbits).decompress(body, MAX_PAGE_BYTES)
+            except zlib.error:
+                continue
+    return body
+
+
+def _http_response(url: str, block: Buffer) -> Response:
+    """Split an ``application/http`` response block into status, headers and decoded body."""
+    head = bytes(block[:HEAD_LIMIT])
+    end = head.find(b"\r\n\r\n")
+    if end < 0:
+        return Response(url, 200, {}, block)
+    status_line = head[: head.find(b"\r\n")].split()
+    status = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else 200
+    headers = _headers(head[:end])
+    body = _decode_body(block[end + 4 :], headers)
+    return Response(url, status, {k: v for k, v in headers.items() if k not in _TRANSFER_HEADERS}, body)
+
+# ===================== WARC / WACZ archives =====================
+
+class _Entry(NamedTuple):
+    offset: int  # first byte of the record (its gzip member when compressed) in the mapping
+    length: int  # bytes of the record in the mapping
+    gzipped: bool
+    mime: str
+    status: int
+
+
+def _gunzip(data: Buffer, limit: int) -> bytes:
+    """Decompress one gzip member, keeping at most *limit* bytes of output."""
+    return zlib.decompressobj(31).decompress(data, limit)
+
+
+def _warc_headers(record: Buffer) -> Optional[tuple]:
+    """(WARC headers, block start, block length) of a record starting at *record*, or None."""
+    head = bytes(record[:HEAD_LIMIT])
+    end = head.find(b"\r\n\r\n")
+    if not head.startswith(b"WARC/") or end < 0:
+        return None
+    headers = _headers(head[:end])
+    return headers, end + 4, int(headers.get("content-length", "0") or 0)
+
+
+def _describe(headers: Mapping[str, str], block_head: bytes) -> Optional[tuple]:
+    """(target URL, mime type, status) of a response record, None for every other record."""
+    if headers.get("warc-type") != "response" or "application/http" not in headers.get("content-type", ""):
+        return None
+    url = headers.get("warc-target-uri", "").strip("<>")
+    end = block_head.find(b"\r\n\r\n")
+    if not url or end < 0:
+        return None
+    response = _http_response(url, block_head[: end + 4])
+    return url, response.headers.get("content-type", "").split(";")[0].strip().lower(), response.status_code
+
+
+class WarcArchive:
+    """Lazily indexed WARC records of one region of a memory mapping (a file, or a WACZ member)."""
+
+    def __init__(self, view: memoryview, name: str, entries: Optional[Dict[str, _Entry]] = None):
+        self._view = view
+        self.name = name
+        self._entries = entries
+        self._lock = threading.Lock()
+
+    def _scan(self) -> Dict[str, _Entry]:
+        entries: Dict[str, _Entry] = {}
+        view, pos = self._view, 0
+        while pos < len(view):
+            if view[pos : pos + 2] == b"\x1f\x8b":
+                # A gzip member ends where its deflate stream does; only the head is kept.
+                inflater, head, start = zlib.decompressobj(31), bytearray(), pos
+                while not inflater.eof and pos < len(view):
+                    data = view[pos : pos + CHUNK_SIZE]
+                    pos += len(data)
+                    while data and not inflater.eof:
+                        out = inflater.decompress(data, CHUNK_SIZE)
+                        if len(head) < HEAD_LIMIT:
+                            head += out[: HEAD_LIMIT - len(head)]
+                        data = inflater.unconsumed_tail
+                pos -= len(inflater.unused_data)
+                parsed = _warc_headers(head)
+                if parsed is not None:
+                    headers, block, _ = parsed
+                    self._add(entries, headers, bytes(head[block:]), start, pos - start, True)
+            else:
+                parsed = _warc_headers(view[pos:])
+                if parsed is None:
+                    raise ValueError(f"{self.name}: no WARC record at byte {pos}")
+                headers, block, length = parsed
+                end = pos + block + length
+                self._add(entries, headers, bytes(view[pos + block : min(end, pos + block + HEAD_LIMIT)]), pos, end - pos, False)
+                pos = end
+                while view[pos : pos + 2] == b"\r\n":
+                    pos += 2
+        return entries
+
+    @staticmethod
+    def _add(entries: Dict[str, _Entry], headers, block_head: bytes, offset: int, length: int, gzipped: bool) -> None:
+        described = _describe(headers, block_head)
+        if described is not None:
+            url, mime, status = described
+            # Later captures of a URL replace earlier ones.
+            entries[cache_key(url)] = _Entry(offset, length, gzipped, mime, status)
+
+    @property
+    def entries(self) -> Dict[str, _Entry]:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._scan()
+        return self._entries
+
+    def pages(self) -> List[str]:
+        """URLs of the archived HTML responses that were not errors."""
+        return [url for url, entry in self.entries.items() if entry.mime in ("text/html", "application/xhtml+xml") and entry.status < 400]
+
+    def get(self, url: str) -> Optional[Response]:
+        entry = self.entries.get(cache_key(url))
+        if entry is None:
+            return None
+        record: Buffer = self._view[entry.offset : entry.offset + entry.length]
+        if entry.gzipped:
+            record = _gunzip(record, MAX_PAGE_BYTES + HEAD_LIMIT)
+        parsed = _warc_headers(record)
+        if parsed is None:
+            return None
+        _, block, length = parsed
+        return _http_response(url, record[block : block + length])
+
+
+def _cdx_entries(wacz: zipfile.ZipFile) -> Dict[str, Dict[str, _Entry]]:
+    """Per-WARC record entries from a WACZ's CDXJ index ({} when it has none)."""
+    found: Dict[str, Dict[str, _Entry]] = {}
+    for name in wacz.namelist():
+        if not name.startswith("indexes/") or not name.endswith((".cdx", ".cdxj", ".cdx.gz", ".cdxj.gz")):
+            continue
+        with wacz.open(name) as raw:
+            lines = gzip.open(raw) if name.endswith(".gz") else raw
+            for line in lines:
+                fields = line.split(b" ", 2)
+                if len(fields) < 3 or not fields[2].startswith(b"{"):
+                    continue
+                record = json.loads(fields[2])
+                if "offset" not in record or "filename" not in record:
+                    continue
+                status = str(record.get("status", "200"))
+                entry = _Entry(
+                    int(record["offset"]),
+                    int(record["length"]),
+                    record["filename"].endswith(".gz"),
+                    str(record.get("mime", "")).lower(),
+                    int(status) if status.isdigit() else 200,
+                )
+                found.setdefault(record["filename"], {})[cache_key(record["url"])] = entry
+    return found
+
+
+def _open_wacz(path: str, view: memoryview) -> List[WarcArchive]:
+    archives = []
+    with zipfile.ZipFile(path) as wacz:
+        indexed = _cdx_entries(wacz)
+        for info in wacz.infolist():
+            if not info.filename.startswith("archive/") or not info.filename.endswith((".warc", ".warc.gz")):
+                continue
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed inside the WACZ and cannot be mapped")
+            # Data follows the 30-byte local header and its own name and extra fields.
+            local = view[info.header_offset : info.header_offset + 30]
+            start = info.header_offset + 30 + int.from_bytes(local[26:28], "little") + int.from_bytes(local[28:30], "little")
+            member = view[start : start + info.compress_size]
+            basename = info.filename[len("archive/") :]
+            archives.append(WarcArchive(member, f"{path}:{info.filename}", indexed.get(basename)))
+    return archives
+
+
+def open_archive(path: str) -> List[WarcArchive]:
+    """Map a ``.warc``, ``.warc.gz`` or ``.wacz`` file; a WACZ yields one archive per WARC inside it."""
+    view = _read_file(path)
+    if not isinstance(view, memoryview):
+        return []
+    if path.lower().endswith(".wacz"):
+        return _open_wacz(path, view)
+    return [WarcArchive(view, path)]
+
+# ===================== Mounts =====================
+
+class _Mount(NamedTuple):
+    path: str
+    base_url: str  # directory mounts only: the site URL, or the directory's own file:// URL
+    archives: List[WarcArchive]
+
+
+_mounts: List[_Mount] = []
+_mounts_lock = threading.Lock()
+_env_loaded = False
+
+
+def _mount_directory(root: Path, base_url: str) -> None:
+    mounted = _Mount(str(root), base_url.rstrip("/") + "/", [])
+    with _mounts_lock:
+        if mounted not in _mounts:
+            _mounts.append(mounted)
+
+
+def mount(path: str, base_url: str = "") -> List[str]:
+    """Serve *path* instead of the network; returns the URLs of the HTML pages it holds.
+
+    Archives serve their recorded URLs. A directory serves ``base_url`` + its
+    relative paths when *base_url* is given, and its own ``file://`` URLs
+    otherwise. A single HTML file is served as a ``file://`` URL, along with
+    the rest of its directory.
+    """
+    if path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path):
+        archives = open_archive(path)
+        with _mounts_lock:
+            _mounts.append(_Mount(path, "", archives))
+        return [url for archive in archives for url in archive.pages()]
+    if os.path.isdir(path):
+        root = Path(path).resolve()
+        files = sorted(p for p in root.rglob("*") if p.suffix.lower() in HTML_SUFFIXES and p.is_file())
+        base_url = (base_url or root.as_uri()).rstrip("/") + "/"
+        _mount_directory(root, base_url)
+        return [base_url + p.relative_to(root).as_posix() for p in files]
+    return [mount_file(path)]
+
+
+def mount_file(location: str) -> str:
+    """Mount the directory of a local file (path or ``file://`` URL) and return the file's URL.
+
+    A directory stands for its ``index.html`` and is mounted itself.
+    """
+    url = file_url(location)
+    root = Path(_url_path(urlsplit(url).path)).resolve().parent
+    _mount_directory(root, root.as_uri())
+    return url
+
+
+def unmount_all() -> None:
+    """Forget every mount (including the ``WCAG_OFFLINE`` ones)."""
+    with _mounts_lock:
+        _mounts.clear()
+
+
+def _load_env() -> None:
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    for item in filter(None, os.getenv("WCAG_OFFLINE", "").split(",")):
+        path, _, base_url = item.partition("=")
+        mount(path.strip(), base_url.strip())
+
+
+def mounted() -> bool:
+    """Whether any directory or archive is mounted."""
+    _load_env()
+    return bool(_mounts)
+
+
+def serves(url: str) -> bool:
+    """Cheap pre-check: could *url* be answered offline at all?"""
+    return mounted()
+
+
+def _directory_mounts(url: str) -> Iterator[_Mount]:
+    """Mounted directories *url* lies in, after resolving ``..`` and symlinks."""
+    _load_env()
+    url, _ = urldefrag(url)
+    with _mounts_lock:
+        mounts = list(_mounts)
+    for mounted in mounts:
+        if mounted.base_url and url.startswith(mounted.base_url):
+            if _inside(mounted.path, urlsplit(url).path[len(urlsplit(mounted.base_url).path) :]) is not None:
+                yield mounted
+
+
+def is_mounted(url: str) -> bool:
+    """Whether *url* lies in a mounted directory (``file://`` URLs are only served then)."""
+    return any(_directory_mounts(url))
+
+
+def directory_mount(url: str) -> Optional[Tuple[str, str]]:
+    """``(directory, base_url)`` of a mount serving *url*, for ``mount_directory`` in another process."""
+    for mounted in _directory_mounts(url):
+        return mounted.path, mounted.base_url
+    return None
+
+
+def mount_directory(path: str, base_url: str) -> None:
+    """Mount a directory returned by ``directory_mount`` again, without listing its pages."""
+    _mount_directory(Path(path), base_url)
+
+
+def same_mount(page_url: str, link: str) -> bool:
+    """Whether *link* lies in a mounted directory that *page_url* lies in too."""
+    bases = {mounted.base_url for mounted in _directory_mounts(page_url)}
+    return any(mounted.base_url in bases for mounted in _directory_mounts(link))
+
+
+def _url_path(path: str) -> str:
+    from urllib.request import url2pathname  # urllib.request is slow to import
+
+    return url2pathname(unquote(path))
+
+
+def _inside(root: str, relative: str) -> Optional[Path]:
+    """The file *relative* names under *root*, or None when it escapes *root* (``..``, symlinks)."""
+    path = Path(root, _url_path(relative))
+    if path.is_dir() or not relative or relative.endswith("/"):
+        path = path / "index.html"
+    try:
+        path.resolve().relative_to(root)
+    except ValueError:
+        return None
+    return path
+
+
+def _directory_file(root: str, relative: str) -> Optional[str]:
+    path = _inside(root, relative)
+    return str(path) if path is not None and path.is_file() else None
+
+
+def resolve(url: str) -> Optional[Response]:
+    """The offline response for *url*, or None when nothing mounted holds it."""
+    _load_env()
+    url, _ = urldefrag(url)
+    with _mounts_lock:
+        mounts = list(_mounts)
+    for mounted in reversed(mounts):
+        if mounted.base_url:
+            if url.startswith(mounted.base_url):
+                path = _directory_file(mounted.path, urlsplit(url).path[len(urlsplit(mounted.base_url).path) :])
+                if path is not None:
+                    return _file_response(url, path)
+            continue
+        for archive in mounted.archives:
+            response = archive.get(url)
+            if response is not None:
+                return response
+    return None
+
+
+def open_snapshot(url: str, parse: bool = True) -> Optional[PageSnapshot]:
+    """A snapshot of *url* read from disk, or None when it is not served offline.
+
+    ``parse=False`` leaves the page unparsed (see ``http_pool.fetch_snapshot_async``).
+    """
+    response = resolve(url)
+    if response is None:
+        return None
+    with timed(get_metrics().fetch.labels("offline"), "fetch", url=url):
+        encoding = declared_charset(response.headers.get("content-type"))
+        ingest = ingest_bytes(response.body, encoding, parse=parse)
+        return snapshot_from_ingest(url, ingest, response.headers, response.status_code, url, encoding)
+
+
+async def route(playwright_route) -> None:
+    """Playwright route handler answering mounted URLs from disk and passing the rest on."""
+    import asyncio
+
+    response = await asyncio.to_thread(resolve, playwright_route.request.url)
+    if response is None:
+        await playwright_route.continue_()
+        return
+    await playwright_route.fulfill(status=response.status_code, headers=response.headers, body=bytes(response.body))
+
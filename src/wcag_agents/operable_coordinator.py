@@ -4,6 +4,7 @@ from .timing import timing_controls_agent
 from .seizure import seizure_prevention_agent
 from .navigation import navigation_structure_agent
 from .input_modalities import input_modalities_agent
+from .metrics import agent_callbacks
 
 operable_coordinator = LlmAgent(
     model="gemini-1.5-flash",
@@ -25,4 +26,5 @@ If the request is generic (e.g. "check accessibility" or no clear keyword), sequ
         navigation_structure_agent,
         input_modalities_agent,
     ],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
@@ -1,5 +1,6 @@
 from google.adk.agents import LlmAgent
-from . import tools
+from . import async_tools
+from .metrics import agent_callbacks
 
 predictable_agent = LlmAgent(
     model="gemini-1.5-flash",
@@ -13,5 +14,6 @@ Process:
 1. Always call the `test_predictability` tool on the provided URL.
 2. Summarise any potential unpredictability and propose fixes.
 """,
-    tools=[tools.test_predictability],
+    tools=[async_tools.test_predictability],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
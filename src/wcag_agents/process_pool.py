@@ -0,0 +1,275 @@
+"""Process-pool execution of the CPU-bound static checks.
+
+Parsing, text scoring and the regex scans of the static checks are pure
+Python and hold the GIL, so threads give a bulk audit one core at most. With a
+process pool the parent only downloads pages: it ships each page's raw bytes
+to a worker process, which parses it, runs the requested checks and sends
+back their compact result dicts plus the page's link targets. No parsed object
+ever crosses the process boundary.
+
+Workers are started with ``forkserver`` (``spawn`` where that is missing).
+Once the pool has run ``TASKS_PER_CHILD`` pages per worker it is retired: it
+finishes the pages it already has while new pages go to a fresh pool, and its
+processes then exit, returning the memory lxml and the parse caches kept.
+(The executor's own ``max_tasks_per_child`` can deadlock on Python 3.11.)
+Each page gets ``TASK_TIMEOUT`` seconds: the
+worker interrupts itself with an interval timer where the platform has one,
+and the checks left once it fires report the timeout instead of running. The
+parent hands out at most one page per worker at a time, so its own deadline
+counts only the time a worker spends on the page, never time spent queued. A
+worker that still does not answer shortly after that deadline is killed along
+with the rest of the pool, which is then restarted.
+
+Configuration (environment variables)::
+
+    WCAG_PROCESS_WORKERS          worker processes, or "auto" for one per core (default 0: threads only)
+    WCAG_PROCESS_TASK_TIMEOUT     seconds per page in a worker (default 120)
+    WCAG_PROCESS_TASKS_PER_CHILD  pages per worker before the pool is replaced (default 100)
+"""
+
+import asyncio
+import atexit
+import contextlib
+import importlib
+import multiprocessing
+import os
+import signal
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+TASK_TIMEOUT = float(os.getenv("WCAG_PROCESS_TASK_TIMEOUT", "120"))
+TASKS_PER_CHILD = int(os.getenv("WCAG_PROCESS_TASKS_PER_CHILD", "100"))
+# Seconds past TASK_TIMEOUT before the parent gives up on a worker and kills the pool.
+KILL_GRACE = 10
+
+# ``tools`` functions that read only the page snapshot, by name (they run in the workers).
+CPU_CHECKS = frozenset(("test_timing_controls", "test_readability", "test_predictability", "test_input_assistance"))
+_WARM_MODULES = (".tools", ".language", ".readability", "lxml.etree", "langdetect", "pyphen")
+
+
+def configured_workers() -> int:
+    value = os.getenv("WCAG_PROCESS_WORKERS", "0").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    return int(value or 0)
+
+
+class PageTask(NamedTuple):
+    """One page for a worker: the raw response and the checks to run on it."""
+
+    url: str
+    content: bytes
+    headers: Dict[str, str]
+    status_code: int
+    final_url: str
+    encoding: Optional[str]
+    truncated: str  # set when the download already stopped at the byte limit
+    checks: Tuple[str, ...]  # names of ``tools`` functions from CPU_CHECKS
+    links: bool  # also return the page's link targets
+    mount: Optional[Tuple[str, str]] = None  # offline directory serving a file:// page (``offline.directory_mount``)
+
+
+class TaskTimeout(Exception):
+    pass
+
+
+def page_task(snap, checks: Sequence[str], links: bool = False) -> PageTask:
+    """Describe *snap* (an unparsed ``PageSnapshot``) and *checks* for a worker."""
+    from . import offline
+
+    return PageTask(
+        snap.url,
+        bytes(snap.content),
+        dict(snap.headers),
+        snap.status_code,
+        snap.final_url,
+        snap.encoding,
+        snap.truncated,
+        tuple(checks),
+        links,
+        # The checks only accept file:// URLs from a mounted directory, and workers do not share the parent's mounts.
+        offline.directory_mount(snap.url) if snap.url.startswith("file:") else None,
+    )
+
+# ===================== Worker side =====================
+
+def _init_worker() -> None:
+    # The parent handles Ctrl+C and shuts the pool down; workers never start pools of their own.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    os.environ["WCAG_PROCESS_WORKERS"] = "0"
+    # Import what the checks import lazily now: a task deadline firing mid-import
+    # would leave a half-initialised module behind for every later task.
+    for module in _WARM_MODULES:
+        try:
+            importlib.import_module(module, __package__)
+        except ImportError:
+            pass
+
+
+@contextlib.contextmanager
+def _deadline(seconds: float) -> Iterator[threading.Event]:
+    """Raise ``TaskTimeout`` after *seconds*; the yielded event is set once it has fired.
+
+    A check that catches the exception itself still sees the event, so the
+    caller can tell the page is out of time.
+    """
+    fired = threading.Event()
+    if not hasattr(signal, "setitimer"):
+        yield fired
+        return
+
+    def expired(signum, frame):
+        fired.set()
+        raise TaskTimeout(f"page took longer than {seconds:g} s")
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield fired
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_task(task: PageTask, timeout: float = TASK_TIMEOUT) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Parse the page and run its checks; returns ``({check: result}, link targets)``."""
+    from . import offline, tools
+    from .snapshot import PageSnapshot, audit_scope, remember_snapshot
+
+    if task.mount is not None:
+        offline.mount_directory(*task.mount)
+    results: Dict[str, Dict[str, Any]] = {}
+    links: List[str] = []
+    with audit_scope(), _deadline(timeout) as fired:
+        snap = PageSnapshot(
+            task.url, task.content, task.headers, task.status_code, task.final_url, task.encoding
+        )
+        snap.truncated = task.truncated
+        try:
+            index = snap.index
+        except TaskTimeout as exc:
+            error = {"url": task.url, "status": "ERROR", "error": str(exc)}
+            return {name: error for name in task.checks}, links
+        remember_snapshot(snap)
+        for position, name in enumerate(task.checks):
+            try:
+                results[name] = getattr(tools, name)(task.url)
+            except TaskTimeout:
+                pass  # reported below with the checks that are left
+            except Exception as exc:
+                results[name] = {"url": task.url, "status": "ERROR", "error": str(exc)}
+            if fired.is_set():
+                # The timer is one-shot: nothing after this point would have a deadline.
+                error = {"url": task.url, "status": "ERROR", "error": f"page took longer than {timeout:g} s"}
+                for rest in task.checks[position:]:
+                    results[rest] = error
+                break
+        if task.links:
+            links = list(index.links)
+    return results, links
+
+# ===================== Parent side =====================
+
+class CheckPool:
+    """A restartable ``ProcessPoolExecutor`` running ``run_task``."""
+
+    def __init__(self, workers: int, timeout: float = TASK_TIMEOUT, tasks_per_child: int = TASKS_PER_CHILD):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.tasks_per_child = tasks_per_child
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._submitted = 0
+        self._lock = threading.Lock()
+        # One page per worker in flight, per event loop; the rest wait here rather than in the executor queue.
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is not None and 0 < self.tasks_per_child * self.workers <= self._submitted:
+                # Queued pages still finish on the retired pool; its workers exit afterwards.
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker)
+                self._submitted = 0
+            self._submitted += 1
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Kill *executor*'s workers; the next task starts a fresh pool."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        # The executor cannot cancel a running task, so its processes are terminated directly.
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slot = self._slots.get(loop)
+            if slot is None:
+                slot = self._slots[loop] = asyncio.Semaphore(self.workers)
+            return slot
+
+    async def run(self, task: PageTask) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Run *task* in a worker process without blocking the event loop."""
+        async with self._slot():
+            try:
+                return await self._submit(task)
+            except BrokenProcessPool:
+                # Another task's timeout (or a crashed worker) took the pool down; retry once on a new one.
+                return await self._submit(task)
+
+    async def _submit(self, task: PageTask) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        # Called holding a slot, so a worker is free and the clock starts when the page does.
+        executor = self._get_executor()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(executor, run_task, task, self.timeout)
+            return await asyncio.wait_for(future, self.timeout + KILL_GRACE)
+        except asyncio.TimeoutError:
+            self._discard(executor)
+            raise TaskTimeout(f"worker did not answer within {self.timeout + KILL_GRACE:g} s") from None
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[CheckPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_check_pool(workers: Optional[int] = None) -> Optional[CheckPool]:
+    """The process-wide pool with *workers* (default ``WCAG_PROCESS_WORKERS``) processes, or None for 0."""
+    global _pool
+    workers = configured_workers() if workers is None else workers
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool.workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = CheckPool(workers)
+        return _pool
+
+
+@atexit.register
+def shutdown_check_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
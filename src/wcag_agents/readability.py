@@ -0,0 +1,327 @@
+"""Readability engine for the 3.1.x checks.
+
+textstat re-tokenizes and re-syllabifies the text for every formula it is asked
+for. This engine tokenizes the text blocks of a page once, counts syllables per
+distinct word, and derives every formula from the same per-block count arrays,
+so the whole document and each block on its own are scored in one pass. The
+formulas, their rounding and the grade consensus follow textstat's English
+implementation. A document can also be scored from separately counted runs of
+blocks (``count_blocks`` / ``score_counts``), so runs shared between pages are
+counted once.
+"""
+
+import functools
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SENTENCE = re.compile(r"\b[^.!?]+[.!?]*")
+_WORD_TOKEN = re.compile(r"[\w\='‘’]+")  # textstat's difficult-word tokenizer
+_WHITESPACE = re.compile(r"\s")
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+# Linsear Write only looks at the first 100 words of a text.
+LINSEAR_WORDS = 100
+
+_TERMINATORS = ".!?"
+# How a text's start meets an unfinished sentence of the text before it.
+_JOIN, _CLOSE, _PASS = range(3)
+
+
+@functools.lru_cache(maxsize=1)
+def _easy_words() -> frozenset:
+    """Dale-Chall easy-word list shipped with textstat (empty if unavailable)."""
+    try:
+        from importlib.resources import files
+
+        path = files("textstat") / "resources" / "en" / "easy_words.txt"
+        return frozenset(line.strip() for line in path.read_text(encoding="utf-8").splitlines())
+    except (ImportError, OSError):
+        return frozenset()
+
+
+@functools.lru_cache(maxsize=1)
+def _hyphenator():
+    try:
+        import pyphen  # type: ignore
+    except ImportError:
+        return None
+    return pyphen.Pyphen(lang="en_US")
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def syllables(word: str) -> int:
+    """Syllables in one lower-cased, punctuation-free word (pyphen positions, as textstat counts)."""
+    if not word:
+        return 0
+    dic = _hyphenator()
+    if dic is None:
+        return max(1, len(_VOWEL_GROUPS.findall(word)))
+    return len(dic.positions(word)) + 1
+
+
+def _sentence_count(text: str) -> int:
+    # Fragments of two words or fewer (menu items, labels) do not count as sentences.
+    sentences = _SENTENCE.findall(text)
+    short = sum(1 for s in sentences if len(_PUNCTUATION.sub("", s).split()) <= 2)
+    return max(1, len(sentences) - short)
+
+
+def _sentence_shape(text: str) -> Tuple[int, List[int], bool]:
+    """How *text* takes part in the sentences of a document it is joined into with spaces.
+
+    Returns how its start meets an unfinished sentence before it (``_JOIN``
+    continues it, ``_CLOSE`` ends it, ``_PASS`` leaves it open), the word
+    count of each of its own sentences, and whether its last one is left
+    unfinished.
+    """
+    matches = list(_SENTENCE.finditer(text))
+    words = [len(_PUNCTUATION.sub("", m.group()).split()) for m in matches]
+    start = matches[0].start() if matches else len(text)
+    if any(ch in _TERMINATORS for ch in text[:start]):
+        lead = _CLOSE
+    else:
+        lead = _JOIN if matches else _PASS
+    unfinished = bool(matches) and matches[-1].end() == len(text) and text[-1] not in _TERMINATORS
+    return lead, words, unfinished
+
+
+def _document_sentences(shapes: Iterable[Tuple[int, List[int], bool]]) -> int:
+    """Sentence count (as ``_sentence_count``) of the texts of *shapes* joined with spaces."""
+    lengths: List[int] = []
+    unfinished = False
+    for lead, words, ends_open in shapes:
+        if unfinished and lead == _JOIN:
+            lengths[-1] += words[0]
+            lengths.extend(words[1:])
+        else:
+            lengths.extend(words)
+        if words:
+            unfinished = ends_open
+        elif lead == _CLOSE:
+            unfinished = False
+    return max(1, sum(1 for n in lengths if n > 2))
+
+
+def _linsear_counts(raw_words: Sequence[str]) -> Tuple[int, int, int]:
+    head = list(raw_words[:LINSEAR_WORDS])
+    hard = sum(1 for w in head if syllables(_PUNCTUATION.sub("", w.lower())) >= 3)
+    return len(head) - hard, hard, _sentence_count(" ".join(head))
+
+
+def _round(values: np.ndarray, points: int = 0) -> np.ndarray:
+    # textstat's legacy rounding: half up.
+    scale = 10.0**points
+    return np.floor(values * scale + 0.5) / scale
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=float), where=denominator > 0)
+
+
+def _fre_grade(score: float) -> List[int]:
+    if score >= 90:  # textstat maps scores of 100+ to grade 13; very easy text is grade 5
+        return [5]
+    if score >= 60:
+        return [8, 9] if score < 70 else [7] if score < 80 else [6]
+    if score >= 30:
+        return [10] if score >= 50 else [11] if score >= 40 else [12]
+    return [13]
+
+
+def _bounds(value: float) -> List[int]:
+    return [int(np.floor(value + 0.5)), int(np.ceil(value))]
+
+
+def _consensus(row: Dict[str, float]) -> int:
+    """Most common grade across the formulas (textstat's ``text_standard``)."""
+    grades = _bounds(row["flesch_kincaid_grade"]) + _fre_grade(row["flesch_reading_ease"])
+    for key in (
+        "smog_index",
+        "coleman_liau_index",
+        "automated_readability_index",
+        "dale_chall_readability_score",
+        "linsear_write_formula",
+        "gunning_fog",
+    ):
+        grades += _bounds(row[key])
+    return Counter(grades).most_common(1)[0][0]
+
+
+def _grade_label(grade: int) -> str:
+    def suffix(n: int) -> str:
+        if n % 100 in (11, 12, 13):
+            return "th"
+        return {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+
+    lower = grade - 1
+    return f"{lower}{suffix(lower)} and {grade}{suffix(grade)} grade"
+
+
+class BlockCounts:
+    """Per-block counts of a run of text blocks, plus what the document totals need from it.
+
+    Runs combine into one document (``score_counts``), so the counts of a run
+    that repeats across pages (a shared template region) can be reused; its
+    per-block scores are computed on first use and kept with it.
+    """
+
+    __slots__ = ("counts", "tokens", "head", "shapes", "_rows")
+
+    def __init__(self, counts: Dict[str, np.ndarray], tokens: set, head: List[str], shapes: List[Tuple[int, List[int], bool]]):
+        self.counts = counts
+        self.tokens = tokens  # distinct non-easy word tokens of the run
+        self.head = head  # the run's first LINSEAR_WORDS words
+        self.shapes = shapes  # sentence shape of every block (``_sentence_shape``)
+        self._rows = None
+
+    def __len__(self) -> int:
+        return len(self.counts["words"])
+
+    def rows(self) -> List[Dict[str, Any]]:
+        if self._rows is None:
+            self._rows = _score_rows(self.counts)
+        return self._rows
+
+
+def count_blocks(texts: Sequence[str]) -> BlockCounts:
+    """Tokenize and count one run of text blocks."""
+    n = len(texts)
+    easy = _easy_words()
+    vocab: Dict[str, int] = {}
+    word_ids: List[int] = []
+    owners: List[int] = []
+    columns = {name: np.zeros(n) for name in ("sentences", "chars", "difficult", "unfamiliar", "complex")}
+    linsear = np.zeros((n, 3))
+    run_tokens: set = set()
+    run_head: List[str] = []
+    shapes: List[Tuple[int, List[int], bool]] = []
+
+    for i, text in enumerate(texts):
+        words = _PUNCTUATION.sub("", text).lower().split()
+        word_ids.extend(vocab.setdefault(w, len(vocab)) for w in words)
+        owners.extend([i] * len(words))
+        shape = _sentence_shape(text)
+        shapes.append(shape)
+        # A block scored on its own counts at least one sentence, as textstat does for any text.
+        columns["sentences"][i] = max(1, sum(1 for n in shape[1] if n > 2))
+        columns["chars"][i] = len(_WHITESPACE.sub("", text))
+
+        tokens = set(_WORD_TOKEN.findall(text.lower())) - easy
+        token_syllables = [syllables(_PUNCTUATION.sub("", t)) for t in tokens]
+        columns["unfamiliar"][i] = len(tokens)
+        columns["difficult"][i] = sum(1 for s in token_syllables if s >= 2)
+        columns["complex"][i] = sum(1 for s in token_syllables if s >= 3)
+        run_tokens |= tokens
+
+        raw = text.split()
+        linsear[i] = _linsear_counts(raw)
+        if len(run_head) < LINSEAR_WORDS:
+            run_head.extend(raw[: LINSEAR_WORDS - len(run_head)])
+
+    # Syllables once per distinct word, then spread back over every occurrence.
+    vocab_words = list(vocab)
+    vocab_syllables = np.fromiter((syllables(w) for w in vocab_words), dtype=np.int64, count=len(vocab_words))
+    vocab_letters = np.fromiter((len(w) for w in vocab_words), dtype=np.int64, count=len(vocab_words))
+    ids = np.asarray(word_ids, dtype=np.int64)
+    rows = np.asarray(owners, dtype=np.int64)
+    word_syllables = vocab_syllables[ids] if len(ids) else np.zeros(0)
+
+    counts = {
+        "words": np.bincount(rows, minlength=n).astype(float),
+        "syllables": np.bincount(rows, weights=word_syllables, minlength=n),
+        "letters": np.bincount(rows, weights=vocab_letters[ids] if len(ids) else None, minlength=n),
+        "polysyllables": np.bincount(rows, weights=(word_syllables >= 3), minlength=n),
+        **columns,
+    }
+    counts["linsear_easy"], counts["linsear_hard"], counts["linsear_sentences"] = linsear.T
+    return BlockCounts(counts, run_tokens, run_head, shapes)
+
+
+def _document_counts(runs: Sequence[BlockCounts]) -> Dict[str, np.ndarray]:
+    """One-row counts of the document made of *runs*, its blocks joined with spaces."""
+    counts = {
+        name: np.array([sum(float(run.counts[name].sum()) for run in runs)])
+        for name in ("words", "syllables", "letters", "polysyllables", "chars")
+    }
+    # Unterminated blocks (navigation, headings) run into the next one, so sentences are not per-block sums.
+    counts["sentences"] = np.array([float(_document_sentences(shape for run in runs for shape in run.shapes))])
+    doc_tokens: set = set().union(*(run.tokens for run in runs))
+    doc_syllables = [syllables(_PUNCTUATION.sub("", t)) for t in doc_tokens]
+    counts["unfamiliar"] = np.array([float(len(doc_tokens))])
+    counts["difficult"] = np.array([float(sum(1 for s in doc_syllables if s >= 2))])
+    counts["complex"] = np.array([float(sum(1 for s in doc_syllables if s >= 3))])
+    doc_head = [word for run in runs for word in run.head][:LINSEAR_WORDS]
+    easy, hard, sentences = _linsear_counts(doc_head)
+    counts["linsear_easy"], counts["linsear_hard"], counts["linsear_sentences"] = (
+        np.array([float(easy)]),
+        np.array([float(hard)]),
+        np.array([float(sentences)]),
+    )
+    return counts
+
+
+def _formulas(c: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    words, sentences = c["words"], c["sentences"]
+    has_words = words > 0
+    asl = _round(_ratio(words, sentences), 1)
+    asw = _round(_ratio(c["syllables"], words), 1)
+    letters_per_100 = _round(_round(_ratio(c["letters"], words), 2) * 100, 2)
+    sentences_per_100 = _round(_round(_ratio(sentences, words), 2) * 100, 2)
+    difficult_pct = 100 - _ratio(words - c["unfamiliar"], words) * 100
+    dale_chall = 0.1579 * difficult_pct + 0.0496 * asl + np.where(difficult_pct > 5, 3.6365, 0.0)
+    linsear = _ratio(c["linsear_easy"] + 3 * c["linsear_hard"], c["linsear_sentences"])
+    return {
+        "flesch_reading_ease": _round(206.835 - 1.015 * asl - 84.6 * asw, 2),
+        "flesch_kincaid_grade": _round(0.39 * asl + 11.8 * asw - 15.59, 1),
+        "smog_index": np.where(
+            sentences >= 3, _round(1.043 * np.sqrt(30 * _ratio(c["polysyllables"], sentences)) + 3.1291, 1), 0.0
+        ),
+        "coleman_liau_index": _round(0.058 * letters_per_100 - 0.296 * sentences_per_100 - 15.8, 2),
+        "automated_readability_index": np.where(
+            has_words,
+            _round(4.71 * _round(_ratio(c["chars"], words), 2) + 0.5 * _round(_ratio(words, sentences), 2) - 21.43, 1),
+            0.0,
+        ),
+        "dale_chall_readability_score": np.where(has_words, _round(dale_chall, 2), 0.0),
+        "linsear_write_formula": np.where(linsear <= 20, linsear - 2, linsear) / 2,
+        "gunning_fog": np.where(has_words, _round(0.4 * (asl + _ratio(c["complex"], words) * 100), 2), 0.0),
+    }
+
+
+def _score_rows(counts: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    scores = _formulas(counts)
+    rows: List[Dict[str, Any]] = []
+    for i in range(len(counts["words"])):
+        row: Dict[str, Any] = {
+            "words": int(counts["words"][i]),
+            "sentences": int(counts["sentences"][i]),
+            "difficult_words": int(counts["difficult"][i]),
+        }
+        row.update({name: float(values[i]) for name, values in scores.items()})
+        grade = _consensus(row)
+        row["grade"] = grade
+        row["text_standard"] = _grade_label(grade)
+        rows.append(row)
+    return rows
+
+
+def score_counts(runs: Sequence[BlockCounts]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Score the document made of *runs* (in order) and every block in them.
+
+    Returns ``(document, blocks)`` like ``score_blocks``.
+    """
+    blocks = [row for run in runs for row in run.rows()]
+    return _score_rows(_document_counts(runs))[0], blocks
+
+
+def score_blocks(texts: Sequence[str]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Score every text block and the whole document from one tokenization.
+
+    Returns ``(document, blocks)``: one dict of counts and formula scores for
+    the concatenated document and one per input text, in order.
+    """
+    return score_counts([count_blocks(texts)])
@@ -1,5 +1,6 @@
 from google.adk.agents import LlmAgent
-from . import tools
+from . import async_tools
+from .metrics import agent_callbacks
 
 readable_agent = LlmAgent(
     model="gemini-1.5-flash",
@@ -13,5 +14,6 @@ Process:
 1. Always call the `test_readability` tool on the provided URL.
 2. Summarise detected issues and provide concrete remediation guidance.
 """,
-    tools=[tools.test_readability],
+    tools=[async_tools.test_readability],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""Page regions and the checks that depend on them, for incremental re-audits.
+
+A deploy usually touches a few components of a page, not all of them. Each
+page is split into six regions and every region is hashed separately:
+
+* ``head``    – the ``<html>`` attributes, the doctype, the ``<head>`` metadata and any ``<meta>``
+* ``nav``     – ``<nav>``, ``role="navigation"``, ``<header>`` and ``<footer>`` subtrees
+* ``forms``   – ``<form>`` subtrees and form controls / labels / buttons outside them
+* ``scripts`` – ``<script>``, ``<style>`` and ``<link>`` elements plus inline ``on*`` handlers
+* ``media``   – ``<video>``, ``<audio>`` and ``<marquee>`` subtrees
+* ``main``    – everything else in the body
+
+``CHECK_REGIONS`` lists the regions each static check in ``tools`` reads. The
+result cache keys those checks by the hash of their regions instead of the
+whole page, so after a change only the checks reading a changed region run
+again and the previous verdicts are reused for the rest. Checks missing from
+the map (the browser-based engines) depend on the whole page. A region nested
+in another one (a ``<nav>`` inside a ``<form>``, a ``<script>`` in the
+``<head>``) is hashed into both, so a check reading either sees the change;
+``main`` only holds what no other region claims. A shared
+template region (header, navigation, footer or cookie banner; see
+``templates``) is hashed as a whole into every region its parts would
+otherwise fall in.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, List, Mapping, Set, Tuple
+
+REGIONS = ("head", "nav", "main", "forms", "scripts", "media")
+
+# Regions each check reads. Keep in sync with the DomIndex fields the check uses.
+CHECK_REGIONS: Dict[str, Tuple[str, ...]] = {
+    # meta refresh (head), autoplay media and marquees (media), timers in inline scripts and handlers
+    "test_timing_controls": ("head", "scripts", "media"),
+    # html lang and title (head) and the visible text, lang attributes, ruby and SSML of every other region
+    "test_readability": ("head", "nav", "main", "forms", "media"),
+    # focus / input / submit handlers (scripts), landmarks, button labels and help links anywhere in the body
+    "test_predictability": ("nav", "main", "forms", "scripts", "media"),
+    # controls and labels (forms), onsubmit (scripts), aria-describedby and "error" anywhere
+    "test_input_assistance": REGIONS,
+}
+
+_HEAD_TAGS = frozenset(("head", "meta"))
+_NAV_TAGS = frozenset(("nav", "header", "footer"))
+_FORM_TAGS = frozenset(("form", "input", "textarea", "select", "button", "label"))
+_SCRIPT_TAGS = frozenset(("script", "style", "link"))
+_MEDIA_TAGS = frozenset(("video", "audio", "marquee"))
+
+
+def _attr_value(value: Any) -> str:
+    return str(value)
+
+
+def _region_of(tag: str, attrs: Mapping[str, Any]) -> str:
+    """The region *tag* starts, or "" if it stays in its parent's."""
+    if tag in _SCRIPT_TAGS:
+        return "scripts"
+    if tag in _HEAD_TAGS:
+        return "head"
+    if tag in _FORM_TAGS:
+        return "forms"
+    if tag in _NAV_TAGS or _attr_value(attrs.get("role", "")).lower() == "navigation":
+        return "nav"
+    if tag in _MEDIA_TAGS:
+        return "media"
+    return ""
+
+
+def _nested(region: str, parent: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Regions of an element starting *region* inside an element in *parent*."""
+    if not region or region in parent:
+        return parent
+    return (region,) + tuple(name for name in parent if name != "main")
+
+
+class RegionHasher:
+    """Consumes start / data / end events (as ``DomIndexBuilder`` does) and hashes each region.
+
+    Comments and the doctype are fed as data too: checks that scan the raw
+    source can see them.
+    """
+
+    def __init__(self):
+        self._hashes = {name: hashlib.blake2b(digest_size=16) for name in REGIONS}
+        # Tokens are buffered per region and hashed in batches.
+        self._pending: Dict[str, List[str]] = {name: [] for name in REGIONS}
+        # Regions of each open element, innermost first.
+        self._stack: List[Tuple[str, ...]] = [("head",)]  # doctype and <html> attributes
+
+    def _feed(self, region: str, token: str) -> None:
+        pending = self._pending[region]
+        pending.append(token)
+        if len(pending) >= 4096:
+            self._flush(region)
+
+    def _flush(self, region: str) -> None:
+        pending = self._pending[region]
+        self._hashes[region].update("".join(pending).encode("utf-8", "surrogatepass"))
+        pending.clear()
+
+    def _feed_all(self, regions: Iterable[str], token: str) -> None:
+        for region in regions:
+            self._feed(region, token)
+
+    def start(self, tag: str, attrs: Mapping[str, Any]) -> None:
+        regions = ("main",) if tag == "body" else _nested(_region_of(tag, attrs), self._stack[-1])
+        markup, handlers = [], []
+        for name, value in attrs.items():
+            (handlers if name.startswith("on") else markup).append(f"{name}={_attr_value(value)!r}")
+        self._feed_all(regions, f"<{tag} {' '.join(markup)}>")
+        if handlers:
+            self._feed("scripts", f"<{tag} {' '.join(handlers)}>")
+        self._stack.append(regions)
+
+    def data(self, text: str) -> None:
+        self._feed_all(self._stack[-1], text)
+
+    def adopt(self, fingerprint: str, elements: Iterable[Tuple[str, Mapping[str, Any]]]) -> None:
+        """Hash a complete shared template subtree (see ``templates``) by its fingerprint.
+
+        *elements* are the ``(tag, attrs)`` of the subtree, root first. The
+        fingerprint goes in place of their markup into every region one of
+        them (or one of their handlers) falls in, including the regions the
+        subtree is nested in, so a change anywhere in it reaches each check
+        reading any of its parts.
+        """
+        touched: Set[str] = set()
+        parent = self._stack[-1]
+        for tag, attrs in elements:
+            # Below the root, an element without a region of its own stays in one already touched.
+            touched.update(_nested(_region_of(tag, attrs), parent))
+            if any(name.startswith("on") for name in attrs):
+                touched.add("scripts")
+            parent = ()
+        self._feed_all(sorted(touched), f"<template {fingerprint}>")
+
+    def end(self, tag: str) -> None:
+        if len(self._stack) > 1:
+            self._feed_all(self._stack.pop(), f"</{tag}>")
+
+    def finish(self) -> Dict[str, str]:
+        for name in REGIONS:
+            self._flush(name)
+        return {name: h.hexdigest() for name, h in self._hashes.items()}
+
+
+def regions_digest(hashes: Mapping[str, str], regions: Iterable[str]) -> str:
+    """Combined hash of the given regions, used as a check's input fingerprint."""
+    combined = hashlib.blake2b(digest_size=16)
+    for name in sorted(regions):
+        combined.update(f"{name}={hashes.get(name, '')};".encode("ascii"))
+    return combined.hexdigest()
+
@@ -0,0 +1,263 @@
+"""Typed, compact results for the deterministic WCAG checks.
+
+A check produces a ``CheckResult``: an overall ``Status`` plus one ``Finding``
+per test, each carrying an ``Outcome`` and a stable message code (with
+optional parameters) instead of a pre-rendered sentence. Recommendations are
+codes too. The tools return the compact dict form (``to_dict``), which is what
+the agents, the result cache and the bulk audit records carry; ``render``
+turns it into the human-readable prose of ``messages`` only at the edge.
+
+The same record packs into msgpack (``to_msgpack``) with the enums as small
+integers for storage and aggregation jobs.
+"""
+
+import json
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .messages import FINDINGS, RECOMMENDATIONS
+
+# Bump when the positional msgpack layout changes.
+FORMAT_VERSION = 1
+
+
+class Status(IntEnum):
+    """Overall status of one check run."""
+
+    TESTED = 0
+    SAFE = 1
+    NEEDS_TESTING = 2
+    NEEDS_REVIEW = 3
+    TRUNCATED = 4
+    ERROR = 5
+
+
+class Outcome(IntEnum):
+    """Severity of one finding, in increasing order."""
+
+    PASS = 0
+    INFO = 1
+    WARN = 2
+    FAIL = 3
+    ERROR = 4
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+_MARKERS = {Outcome.PASS: "✅", Outcome.INFO: "ℹ️", Outcome.WARN: "⚠️", Outcome.FAIL: "❌", Outcome.ERROR: "❌"}
+
+
+# WCAG criteria each finding key (the test within a check) speaks to. Keys not
+# listed here (``error``, ``coverage``) concern every criterion of their check.
+FINDING_CRITERIA: Dict[str, Tuple[str, ...]] = {
+    # 2.1.x Keyboard
+    "keyboard_navigation": ("2.1.1", "2.1.3"),
+    "keyboard_traps": ("2.1.2",),
+    "character_shortcuts": ("2.1.4",),
+    "focus_indicators": ("2.4.7",),
+    # 2.2.x Timing
+    "timing_adjustable": ("2.2.1",),
+    "pause_stop_hide": ("2.2.2",),
+    "no_timing": ("2.2.3",),
+    "interruptions": ("2.2.4",),
+    "re_authenticating": ("2.2.5",),
+    "timeouts": ("2.2.6",),
+    # 2.3.x Seizures
+    "flash_threshold": ("2.3.1", "2.3.2"),
+    "general_flash": ("2.3.1",),
+    "red_flash": ("2.3.1",),
+    "three_flashes": ("2.3.2",),
+    "animation_interactions": ("2.3.3",),
+    # 2.4.x Navigable
+    "bypass_blocks": ("2.4.1",),
+    "page_titled": ("2.4.2",),
+    "focus_order": ("2.4.3",),
+    "link_purpose": ("2.4.4",),
+    "multiple_ways": ("2.4.5",),
+    "headings_labels": ("2.4.6",),
+    "focus_visible": ("2.4.7",),
+    "location": ("2.4.8",),
+    "link_purpose_context": ("2.4.9",),
+    "section_headings": ("2.4.10",),
+    "focus_not_obscured_minimum": ("2.4.11",),
+    "focus_not_obscured_enhanced": ("2.4.12",),
+    "focus_indicator": ("2.4.7", "2.4.13"),
+    "focus_appearance": ("2.4.13",),
+    "focus_contrast": ("2.4.13",),
+    # 2.5.x Input modalities
+    "pointer_gestures": ("2.5.1",),
+    "pointer_cancellation": ("2.5.2",),
+    "label_in_name": ("2.5.3",),
+    "motion_actuation": ("2.5.4",),
+    "target_size": ("2.5.5", "2.5.8"),
+    "concurrent_input": ("2.5.6",),
+    "dragging_movements": ("2.5.7",),
+    # 3.1.x Readable
+    "language_of_page": ("3.1.1",),
+    "language_of_parts": ("3.1.2",),
+    "unusual_words": ("3.1.3",),
+    "abbreviations": ("3.1.4",),
+    "reading_level": ("3.1.5",),
+    "pronunciation": ("3.1.6",),
+    # 3.2.x Predictable
+    "on_focus": ("3.2.1",),
+    "on_input": ("3.2.2",),
+    "consistent_navigation": ("3.2.3",),
+    "consistent_identification": ("3.2.4",),
+    "change_on_request": ("3.2.5",),
+    "consistent_help": ("3.2.6",),
+    # 3.3.x Input assistance
+    "error_identification": ("3.3.1",),
+    "labels_instructions": ("3.3.2",),
+    "error_suggestion": ("3.3.3",),
+    "error_prevention_critical": ("3.3.4",),
+    "help": ("3.3.5",),
+    "error_prevention_all": ("3.3.6",),
+    "redundant_entry": ("3.3.7",),
+    "accessible_auth_minimum": ("3.3.8",),
+    "accessible_auth_enhanced": ("3.3.9",),
+}
+
+
+def finding_criteria(key: str, criteria: Sequence[str]) -> Tuple[str, ...]:
+    """The criteria among *criteria* (those of the check) that the finding *key* speaks to."""
+    mapped = FINDING_CRITERIA.get(key)
+    if mapped is None:
+        return tuple(criteria)
+    return tuple(criterion for criterion in criteria if criterion in mapped)
+
+
+class Finding(NamedTuple):
+    key: str  # the test within the check, e.g. "labels_instructions"
+    outcome: Outcome
+    code: str  # message code, see ``messages.FINDINGS``
+    params: Optional[Dict[str, Any]] = None
+
+    def to_list(self) -> List[Any]:
+        row: List[Any] = [self.key, self.outcome.label, self.code]
+        if self.params:
+            row.append(self.params)
+        return row
+
+    @classmethod
+    def from_list(cls, row: Sequence[Any]) -> "Finding":
+        outcome = Outcome[row[1].upper()] if isinstance(row[1], str) else Outcome(row[1])
+        return cls(row[0], outcome, row[2], row[3] if len(row) > 3 else None)
+
+    def text(self) -> str:
+        template = FINDINGS.get(self.code, self.code)
+        try:
+            message = template.format(**(self.params or {}))
+        except (KeyError, IndexError, ValueError):
+            message = template
+        return f"{_MARKERS[self.outcome]} {message}"
+
+
+class CheckResult:
+    """Findings of one check against one URL."""
+
+    __slots__ = ("url", "criteria", "status", "findings", "recommendations", "details")
+
+    def __init__(self, url: str, criteria: Sequence[str], status: Status = Status.TESTED):
+        self.url = url
+        self.criteria = tuple(criteria)
+        self.status = status
+        self.findings: List[Finding] = []
+        self.recommendations: List[str] = []
+        # Check-specific structured data (scores, samples) passed through unchanged.
+        self.details: Dict[str, Any] = {}
+
+    def add(self, key: str, outcome: Outcome, code: str, **params: Any) -> "CheckResult":
+        self.findings.append(Finding(key, outcome, code, params or None))
+        return self
+
+    def recommend(self, *codes: str) -> "CheckResult":
+        self.recommendations.extend(codes)
+        return self
+
+    def error(self, exc: BaseException) -> "CheckResult":
+        """Replace the findings with the exception that stopped the check."""
+        self.status = Status.ERROR
+        self.findings = [Finding("error", Outcome.ERROR, "check_error", {"error": str(exc) or type(exc).__name__})]
+        return self
+
+    # ---- Serialization ----
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact JSON-ready form returned by the tools."""
+        return {
+            "wcag_criteria": list(self.criteria),
+            "findings": [f.to_list() for f in self.findings],
+            "recommendations": list(self.recommendations),
+            **self.details,
+            "url": self.url,
+            "status": self.status.name,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CheckResult":
+        result = cls(data.get("url", ""), data.get("wcag_criteria", ()), Status[data.get("status", "ERROR")])
+        result.findings = [Finding.from_list(row) for row in data.get("findings", ())]
+        result.recommendations = list(data.get("recommendations", ()))
+        result.details = {k: v for k, v in data.items() if k not in _DICT_FIELDS}
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    def to_msgpack(self) -> bytes:
+        """Positional msgpack record with integer enums (requires the ``msgpack`` package)."""
+        import msgpack  # type: ignore
+
+        findings = [[f.key, int(f.outcome), f.code, f.params] for f in self.findings]
+        return msgpack.packb(
+            [FORMAT_VERSION, self.url, list(self.criteria), int(self.status), findings, self.recommendations, self.details],
+            use_bin_type=True,
+        )
+
+    @classmethod
+    def from_msgpack(cls, blob: bytes) -> "CheckResult":
+        import msgpack  # type: ignore
+
+        version, url, criteria, status, findings, recommendations, details = msgpack.unpackb(blob, raw=False)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported result format version {version}")
+        result = cls(url, criteria, Status(status))
+        result.findings = [Finding(key, Outcome(outcome), code, params) for key, outcome, code, params in findings]
+        result.recommendations = list(recommendations)
+        result.details = details
+        return result
+
+
+_DICT_FIELDS = frozenset(("wcag_criteria", "findings", "recommendations", "url", "status"))
+
+
+def iter_findings(result: Dict[str, Any]) -> Iterator[Finding]:
+    """Findings of a tool result dict; results without coded findings (external scanners) yield none."""
+    for row in result.get("findings") or ():
+        if isinstance(row, (list, tuple)) and len(row) >= 3:
+            yield Finding.from_list(row)
+
+
+def issues(result: Dict[str, Any], prefix: str = "") -> List[str]:
+    """``key: code`` for every warning or failure in *result*."""
+    return [f"{prefix}{f.key}: {f.code}" for f in iter_findings(result) if f.outcome >= Outcome.WARN]
+
+
+def render(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Human-readable form of a tool result: one sentence per test and per recommendation.
+
+    Dicts that are not coded check results are returned unchanged.
+    """
+    if "findings" not in result:
+        return result
+    rendered = {k: v for k, v in result.items() if k not in ("findings", "recommendations")}
+    test_results: Dict[str, str] = {}
+    for finding in iter_findings(result):
+        text = finding.text()
+        test_results[finding.key] = f"{test_results[finding.key]}; {text}" if finding.key in test_results else text
+    rendered["test_results"] = test_results
+    rendered["recommendations"] = [RECOMMENDATIONS.get(code, code) for code in result.get("recommendations", ())]
+    return rendered
@@ -1,13 +1,17 @@
 from google.adk.agents import LlmAgent
-from . import tools
+from . import async_tools
+from .metrics import agent_callbacks
 
 seizure_prevention_agent = LlmAgent(
     model="gemini-1.5-flash",
     name="SeizurePreventionAgent",
     description="Specialist for WCAG 2.3.x seizure prevention including flashing content and animation controls",
     instruction="""You are a SAFETY-CRITICAL agent for WCAG 2.3.x seizure prevention.
-Always run the `test_seizure_prevention` tool first.
+Always run the `test_seizure_prevention` tool first. It records the rendered page and measures
+general and red flashes per 341×256 area; a NEEDS_TESTING status means nothing could be measured,
+so never report the page as safe in that case.
 Provide guidance to remove content that flashes more than 3 times per second or violates thresholds.
 """,
-    tools=[tools.test_seizure_prevention],
+    tools=[async_tools.test_seizure_prevention],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
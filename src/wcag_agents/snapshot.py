@@ -0,0 +1,261 @@
+"""Shared page snapshots for the static WCAG checks.
+
+A snapshot holds everything the HTML-based checks read from a page (raw bytes,
+response headers, the DOM feature index and the extracted visible text) so that
+one audit downloads and parses each URL only once, no matter how many checks
+run. Pages are parsed while they stream in (see ``ingest``), within the byte and
+element caps configured there.
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Mapping, Optional
+
+from .cache import CachedPage, get_cache
+from .metrics import get_metrics, timed
+
+USER_AGENT = "Mozilla/5.0 (WCAG-audit)"
+FETCH_TIMEOUT = 15
+
+# Snapshots fetched outside an explicit audit scope are kept briefly so that the
+# sub-agents of a single conversation (one tool call per turn) still share them.
+RECENT_SNAPSHOT_TTL = 300
+RECENT_SNAPSHOT_LIMIT = 32
+
+
+class PageSnapshot:
+    """A fetched page whose parsed forms are built lazily and only once."""
+
+    __slots__ = (
+        "url",
+        "final_url",
+        "status_code",
+        "headers",
+        "content",
+        "encoding",
+        "fetched_at",
+        "truncated",
+        "_html",
+        "_index",
+        "_regions",
+        "_digest",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        url: str,
+        content: bytes,
+        headers: Optional[Mapping[str, str]] = None,
+        status_code: int = 200,
+        final_url: Optional[str] = None,
+        encoding: Optional[str] = None,
+    ):
+        self.url = url
+        self.final_url = final_url or url
+        self.status_code = status_code
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self.content = content
+        self.encoding = encoding
+        self.fetched_at = time.time()
+        self.truncated = ""
+        self._html: Optional[str] = None
+        self._index = None
+        self._regions: Optional[Dict[str, str]] = None
+        self._digest: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def digest(self) -> str:
+        """Content hash identifying this exact page body."""
+        if self._digest is None:
+            self._digest = hashlib.blake2b(self.content, digest_size=16).hexdigest()
+        return self._digest
+
+    @property
+    def html(self) -> str:
+        """Decoded page source."""
+        if self._html is None:
+            self._html = self.content.decode(self.encoding or "utf-8", errors="replace")
+        return self._html
+
+    def _ingested(self, ingest) -> bytes:
+        """Adopt the index and region hashes of a finished ingest; returns the bytes it kept."""
+        content, self._index, regions = ingest.close()
+        if self._regions is None:
+            self._regions = regions
+        # Re-parsing the kept bytes of a download cut at the byte limit cannot see the cut.
+        self.truncated = self.truncated or ingest.truncated
+        return content
+
+    def _parse(self) -> None:
+        with self._lock:
+            if self._index is None:
+                from .ingest import ingest_bytes
+
+                self._ingested(ingest_bytes(self.content, self.encoding))
+
+    @property
+    def index(self):
+        """Single-pass ``DomIndex`` of the page, built on first access."""
+        if self._index is None:
+            self._parse()
+        return self._index
+
+    @property
+    def regions(self) -> Dict[str, str]:
+        """Per-region content hashes (see ``regions``), computed on first access."""
+        if self._regions is None:
+            self._parse()
+        return self._regions
+
+    @regions.setter
+    def regions(self, hashes: Dict[str, str]) -> None:
+        self._regions = hashes
+
+    @property
+    def visible_text(self) -> str:
+        """Whitespace-collapsed text content, excluding scripts and styles."""
+        return self.index.visible_text
+
+
+def snapshot_from_ingest(
+    url: str, ingest, headers: Mapping[str, str], status_code: int, final_url: str, encoding: Optional[str]
+) -> PageSnapshot:
+    """Build a snapshot from a finished streaming download (see ``ingest.PageIngest``)."""
+    snap = PageSnapshot(url, b"", headers=headers, status_code=status_code, final_url=final_url, encoding=encoding)
+    snap.content = snap._ingested(ingest)
+    return snap
+
+
+def snapshot_from_cache(page: CachedPage) -> PageSnapshot:
+    snap = PageSnapshot(
+        page.url,
+        page.content,
+        headers=page.headers,
+        status_code=page.status_code,
+        final_url=page.final_url,
+        encoding=page.encoding,
+    )
+    snap.fetched_at = page.stored_at
+    return snap
+
+
+def fetch_snapshot(url: str) -> PageSnapshot:
+    """Download *url* into a new snapshot, revalidating any on-disk copy.
+
+    Local files and mounted archives or directories (see ``offline``) are read
+    from disk instead. A cached copy that is still fresh is returned without a request; otherwise
+    its validators are sent along and a 304 answer reuses the stored body.
+    """
+    from . import offline
+
+    if offline.serves(url):
+        snap = offline.open_snapshot(url)
+        if snap is not None:
+            return snap
+
+    import requests  # type: ignore
+
+    store = get_cache()
+    cached = store.get_page(url) if store is not None else None
+    if cached is not None and store.is_fresh(cached):
+        return snapshot_from_cache(cached)
+
+    from .ingest import CHUNK_SIZE, PageIngest, declared_charset
+
+    headers = {"User-Agent": USER_AGENT, **(store.conditional_headers(cached) if store is not None else {})}
+    with timed(get_metrics().fetch.labels("requests"), "fetch", url=url), requests.get(
+        url, timeout=FETCH_TIMEOUT, headers=headers, stream=True
+    ) as resp:
+        if resp.status_code == 304 and cached is not None:
+            return snapshot_from_cache(store.revalidated(cached))
+
+        encoding = declared_charset(resp.headers.get("content-type"))
+        ingest = PageIngest(encoding)
+        for chunk in resp.iter_content(CHUNK_SIZE):
+            if not ingest.feed(chunk):
+                break
+        snap = snapshot_from_ingest(url, ingest, resp.headers, resp.status_code, resp.url, encoding)
+    # A truncated body must not be revalidated later as if it were complete.
+    if store is not None and not snap.truncated:
+        store.put_page(url, snap.status_code, snap.final_url, dict(resp.headers), snap.encoding, snap.content)
+    return snap
+
+
+# ===================== Snapshot sharing =====================
+
+_audit_snapshots: contextvars.ContextVar[Optional[Dict[str, PageSnapshot]]] = contextvars.ContextVar(
+    "wcag_audit_snapshots", default=None
+)
+_recent: "OrderedDict[str, PageSnapshot]" = OrderedDict()
+_recent_lock = threading.Lock()
+_url_locks: Dict[str, threading.Lock] = {}
+
+
+@contextlib.contextmanager
+def audit_scope() -> Iterator[Dict[str, PageSnapshot]]:
+    """Share snapshots between every check run inside the ``with`` block."""
+    token = _audit_snapshots.set({})
+    try:
+        yield _audit_snapshots.get()
+    finally:
+        _audit_snapshots.reset(token)
+
+
+def lookup_snapshot(url: str) -> Optional[PageSnapshot]:
+    """Return the shared snapshot for *url* if one is held, without fetching."""
+    scope = _audit_snapshots.get()
+    if scope is not None and url in scope:
+        return scope[url]
+    with _recent_lock:
+        snap = _recent.get(url)
+        if snap is not None and time.time() - snap.fetched_at > RECENT_SNAPSHOT_TTL:
+            del _recent[url]
+            snap = None
+        if snap is not None:
+            _recent.move_to_end(url)
+    return snap
+
+
+def remember_snapshot(snap: PageSnapshot) -> PageSnapshot:
+    """Make *snap* available to later ``get_snapshot`` calls for its URL."""
+    scope = _audit_snapshots.get()
+    if scope is not None:
+        scope[snap.url] = snap
+    with _recent_lock:
+        _recent[snap.url] = snap
+        _recent.move_to_end(snap.url)
+        while len(_recent) > RECENT_SNAPSHOT_LIMIT:
+            _recent.popitem(last=False)
+    return snap
+
+
+def get_snapshot(url: str) -> PageSnapshot:
+    """Return the shared snapshot for *url*, fetching it at most once.
+
+    Concurrent callers asking for the same URL wait for the first download
+    instead of starting their own. Fetch errors propagate to the caller.
+    """
+    snap = lookup_snapshot(url)
+    if snap is not None:
+        return snap
+    with _recent_lock:
+        url_lock = _url_locks.setdefault(url, threading.Lock())
+    with url_lock:
+        snap = lookup_snapshot(url)
+        if snap is None:
+            snap = remember_snapshot(fetch_snapshot(url))
+    with _recent_lock:
+        _url_locks.pop(url, None)
+    return snap
+
+
+def clear_snapshots() -> None:
+    """Forget every snapshot held outside an audit scope."""
+    with _recent_lock:
+        _recent.clear()
@@ -0,0 +1,315 @@
+"""Keyboard tab walk for 2.1.2 No Keyboard Trap and 2.4.11 / 2.4.12 Focus Not Obscured.
+
+A ``focusin`` listener installed in the page records, for every focus move,
+the focused element (as a small integer id), its rectangle in the viewport and
+the rectangles of the visible fixed / sticky elements that do not contain it,
+measured once the browser has scrolled the element into view. Python then
+presses Tab (and afterwards Shift+Tab) in batches and drains the log once per
+batch, so a walk costs one script round trip per ``WALK_BATCH`` key presses.
+
+* A trap is a cycle of focus moves that revisits an element without passing
+  through the document and without covering the page's tab sequence. Escape
+  is tried before it is reported, since a dialog may legitimately keep focus
+  while offering a standard way out.
+* Obscured focus is measured by intersecting every recorded focus rectangle
+  with the overlays of its step through ``geometry.GridIndex``. The focused
+  element counts as hidden (2.4.11) when every sample point of its visible
+  rectangle lies under an overlay, and partly hidden (2.4.12) when any does.
+  Fixed and sticky elements are assumed to be painted above the content.
+
+Each page gets a time budget; a walk cut short is reported as partial.
+
+Configuration (environment variables)::
+
+    WCAG_TAB_BUDGET       seconds per page for the whole walk (default 20)
+    WCAG_TAB_MAX_STEPS    key presses per direction (default 1500)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .geometry import GRID_CELL, GridIndex
+
+TAB_BUDGET = float(os.getenv("WCAG_TAB_BUDGET", "20"))
+MAX_STEPS = int(os.getenv("WCAG_TAB_MAX_STEPS", "1500"))
+WALK_BATCH = 25
+# Sample points per axis when deciding whether a focus rectangle is fully covered.
+COVER_SAMPLES = 9
+# A loop covering at least this share of the page's tab stops is the page's own wrap-around.
+WRAP_SHARE = 0.9
+EXAMPLE_LIMIT = 10
+WALK_TTL = 300
+WALK_LIMIT = 16
+
+_INSTALL_SCRIPT = r"""
+() => {
+  if (window.__wcagWalk) return window.__wcagWalk.tabbable;
+  const ids = new WeakMap(), elements = [null], log = [];
+  const idOf = (el) => {
+    let id = ids.get(el);
+    if (id === undefined) { id = elements.length; ids.set(el, id); elements.push(el); }
+    return id;
+  };
+  const overlays = [];
+  for (const el of document.querySelectorAll('body *')) {
+    const position = getComputedStyle(el).position;
+    if (position === 'fixed' || position === 'sticky') overlays.push(el);
+  }
+  const measure = (el) => {
+    const r = el.getBoundingClientRect();
+    const covering = [];
+    for (const o of overlays) {
+      if (o.contains(el) || el.contains(o)) continue;
+      const style = getComputedStyle(o);
+      if (style.visibility !== 'visible' || style.display === 'none' || parseFloat(style.opacity) === 0) continue;
+      const q = o.getBoundingClientRect();
+      if (q.right <= 0 || q.bottom <= 0 || q.left >= innerWidth || q.top >= innerHeight || !q.width || !q.height) continue;
+      covering.push(q.left, q.top, q.right, q.bottom);
+    }
+    log.push([idOf(el), r.left, r.top, r.right, r.bottom, covering]);
+  };
+  document.addEventListener('focusin', (event) => {
+    const el = event.composedPath()[0];
+    // Measure after the browser has scrolled the element into view.
+    setTimeout(() => measure(el), 0);
+  }, true);
+  document.addEventListener('focusout', (event) => {
+    if (event.relatedTarget) return;
+    setTimeout(() => {
+      const active = document.activeElement;
+      if (!active || active === document.body || active === document.documentElement) log.push([0]);
+    }, 0);
+  }, true);
+  const tabbable = [...document.querySelectorAll(
+    'a[href], area[href], button, input:not([type=hidden]), select, textarea, summary, iframe, [contenteditable=""], [contenteditable=true], [tabindex]'
+  )].filter((el) => el.tabIndex >= 0 && !el.disabled && el.getClientRects().length).length;
+  window.__wcagWalk = { elements, log, tabbable };
+  return tabbable;
+}
+"""
+
+_DRAIN_SCRIPT = r"""
+async () => {
+  await new Promise((resolve) => setTimeout(resolve, 0));
+  const walk = window.__wcagWalk;
+  return [walk.log.splice(0), innerWidth, innerHeight];
+}
+"""
+
+_DESCRIBE_SCRIPT = r"""
+(ids) => ids.map((id) => {
+  const el = window.__wcagWalk.elements[id];
+  if (!el) return '';
+  let text = el.tagName.toLowerCase();
+  if (el.id) text += '#' + el.id;
+  const label = (el.getAttribute('aria-label') || el.textContent || el.value || '').trim().replace(/\s+/g, ' ');
+  return label ? `${text} "${label.slice(0, 40)}"` : text;
+})
+"""
+
+
+class Step(NamedTuple):
+    element: int  # 0: focus left the page content (document / browser UI)
+    rect: Tuple[float, float, float, float]  # left, top, right, bottom in the viewport
+    overlays: List[float]  # flat left, top, right, bottom of the overlays at that moment
+
+
+class Trap(NamedTuple):
+    direction: str  # "forward" or "backward"
+    cycle: List[int]  # element ids, in focus order
+    escapable: bool  # Escape moved focus out of the cycle
+
+
+class TabWalk(NamedTuple):
+    tabbable: int  # tab stops found in the DOM
+    reached: int  # distinct elements focused
+    steps: int  # key presses made
+    complete: bool  # the forward walk wrapped around the whole page within the budget
+    seconds: float
+    trap: Optional[Trap]
+    hidden: List[int]  # ids of elements whose focus rectangle was entirely covered (2.4.11)
+    partly_hidden: List[int]  # ids of elements whose focus rectangle was partly covered (2.4.12)
+    examples: Dict[str, List[str]]  # "trap" / "hidden" / "partly_hidden" -> descriptions
+
+
+def find_cycle(elements: Sequence[int]) -> Optional[List[int]]:
+    """The first loop of focus moves that revisits an element without leaving the page content."""
+    last_seen: Dict[int, int] = {}
+    since_exit = 0
+    for position, element in enumerate(elements):
+        if element == 0:
+            since_exit = position + 1
+            last_seen.clear()
+            continue
+        previous = last_seen.get(element)
+        if previous is not None and previous >= since_exit:
+            return list(elements[previous:position])
+        last_seen[element] = position
+    return None
+
+
+def obscured(steps: Sequence[Step], viewport: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Per step: whether the focus rectangle is entirely / partly covered by that step's overlays."""
+    n = len(steps)
+    hidden = np.zeros(n, dtype=bool)
+    partly = np.zeros(n, dtype=bool)
+    if not n:
+        return hidden, partly
+    width, height = viewport
+    rects = np.array([step.rect for step in steps], dtype=np.float64)
+    rects[:, [0, 2]] = rects[:, [0, 2]].clip(0, width)
+    rects[:, [1, 3]] = rects[:, [1, 3]].clip(0, height)
+    visible = (rects[:, 2] > rects[:, 0]) & (rects[:, 3] > rects[:, 1])
+
+    counts = np.array([len(step.overlays) // 4 for step in steps])
+    if not counts.sum():
+        return hidden, partly
+    overlays = np.concatenate([np.asarray(step.overlays, dtype=np.float64) for step in steps]).reshape(-1, 4)
+    overlays[:, [0, 2]] = overlays[:, [0, 2]].clip(0, width)
+    overlays[:, [1, 3]] = overlays[:, [1, 3]].clip(0, height)
+    overlay_step = np.repeat(np.arange(n), counts)
+    # Stack the steps vertically, one viewport apart, so a single index serves them all.
+    stride = height + GRID_CELL
+    shift = overlay_step * stride
+    index = GridIndex(overlays[:, 0], overlays[:, 1] + shift, overlays[:, 2], overlays[:, 3] + shift)
+    queries = np.flatnonzero(visible)
+    qshift = queries * stride
+    q, o = index.query(rects[queries, 0], rects[queries, 1] + qshift, rects[queries, 2], rects[queries, 3] + qshift)
+    step = queries[q]
+    same = overlay_step[o] == step
+    step, o = step[same], o[same]
+    left = np.maximum(rects[step, 0], overlays[o, 0])
+    top = np.maximum(rects[step, 1], overlays[o, 1])
+    right = np.minimum(rects[step, 2], overlays[o, 2])
+    bottom = np.minimum(rects[step, 3], overlays[o, 3])
+    overlapping = (right > left) & (bottom > top)
+    partly[step[overlapping]] = True
+
+    # Full cover may take several overlays together: test a grid of points inside each rectangle.
+    step, o = step[overlapping], o[overlapping]
+    if step.size:
+        fractions = (np.arange(COVER_SAMPLES) + 0.5) / COVER_SAMPLES
+        px = rects[step, 0, None] + (rects[step, 2] - rects[step, 0])[:, None] * fractions
+        py = rects[step, 1, None] + (rects[step, 3] - rects[step, 1])[:, None] * fractions
+        inside_x = (px >= overlays[o, 0, None]) & (px <= overlays[o, 2, None])
+        inside_y = (py >= overlays[o, 1, None]) & (py <= overlays[o, 3, None])
+        covered = (inside_y[:, :, None] & inside_x[:, None, :]).reshape(len(step), -1)
+        per_step = np.zeros((n, COVER_SAMPLES * COVER_SAMPLES), dtype=bool)
+        np.logical_or.at(per_step, step, covered)
+        hidden = per_step.all(axis=1) & visible
+    return hidden, partly
+
+
+async def _press(page, key: str, count: int, deadline: float) -> Tuple[List[Step], Tuple[float, float], int]:
+    """Press *key* up to *count* times in batches, returning the focus steps logged meanwhile."""
+    steps: List[Step] = []
+    viewport = (0.0, 0.0)
+    pressed = 0
+    while pressed < count and time.monotonic() < deadline:
+        batch = min(WALK_BATCH, count - pressed)
+        for _ in range(batch):
+            await page.keyboard.press(key)
+        pressed += batch
+        entries, width, height = await page.evaluate(_DRAIN_SCRIPT)
+        viewport = (float(width), float(height))
+        for entry in entries:
+            if entry[0] == 0:
+                steps.append(Step(0, (0.0, 0.0, 0.0, 0.0), []))
+            else:
+                steps.append(Step(entry[0], tuple(entry[1:5]), entry[5]))
+        if find_cycle([s.element for s in steps]) is not None or _wrapped(steps):
+            break
+    return steps, viewport, pressed
+
+
+def _wrapped(steps: Sequence[Step]) -> bool:
+    """Whether focus has left the page content after visiting at least one element."""
+    seen = False
+    for step in steps:
+        if step.element:
+            seen = True
+        elif seen:
+            return True
+    return False
+
+
+async def _walk_direction(page, key: str, tabbable: int, deadline: float, direction: str):
+    steps, viewport, pressed = await _press(page, key, MAX_STEPS, deadline)
+    elements = [s.element for s in steps]
+    cycle = find_cycle(elements)
+    trap = None
+    if cycle is not None and len(set(cycle)) < max(2, WRAP_SHARE * tabbable):
+        # Give the page a standard way out before calling it a trap.
+        await page.keyboard.press("Escape")
+        after, _, extra = await _press(page, key, len(cycle) + 2, deadline + 5)
+        pressed += extra
+        members = set(cycle)
+        escapable = any(s.element not in members for s in after)
+        trap = Trap(direction, cycle, escapable)
+    complete = trap is None and _wrapped(steps)
+    return steps, viewport, pressed, trap, complete
+
+
+async def walk(page, url: str, budget: float = TAB_BUDGET) -> TabWalk:
+    """Load *url* and tab through it forwards, then backwards, within *budget* seconds."""
+    started = time.monotonic()
+    deadline = started + budget
+    await page.goto(url, wait_until="load")
+    tabbable = await page.evaluate(_INSTALL_SCRIPT)
+    steps, viewport, pressed, trap, complete = await _walk_direction(page, "Tab", tabbable, deadline, "forward")
+    if trap is None and time.monotonic() < deadline:
+        back, _, back_pressed, trap, _ = await _walk_direction(page, "Shift+Tab", tabbable, deadline, "backward")
+        steps += back
+        pressed += back_pressed
+
+    measured = [s for s in steps if s.element]
+    hidden, partly = obscured(measured, viewport)
+    hidden_ids = sorted({s.element for s, h in zip(measured, hidden) if h})
+    partly_ids = sorted({s.element for s, p in zip(measured, partly) if p})
+    examples: Dict[str, List[str]] = {}
+    for key, ids in (("trap", trap.cycle if trap else []), ("hidden", hidden_ids), ("partly_hidden", partly_ids)):
+        if ids:
+            examples[key] = await page.evaluate(_DESCRIBE_SCRIPT, list(dict.fromkeys(ids))[:EXAMPLE_LIMIT])
+    return TabWalk(
+        tabbable=tabbable,
+        reached=len({s.element for s in measured}),
+        steps=pressed,
+        complete=complete,
+        seconds=round(time.monotonic() - started, 3),
+        trap=trap,
+        hidden=hidden_ids,
+        partly_hidden=partly_ids,
+        examples=examples,
+    )
+
+# ===================== Recent walks =====================
+
+_recent: "OrderedDict[str, Tuple[float, TabWalk]]" = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def remember_walk(url: str, result: TabWalk) -> TabWalk:
+    with _recent_lock:
+        _recent[url] = (time.time(), result)
+        _recent.move_to_end(url)
+        while len(_recent) > WALK_LIMIT:
+            _recent.popitem(last=False)
+    return result
+
+
+def lookup_walk(url: str) -> Optional[TabWalk]:
+    """The walk recorded for *url* within the last ``WALK_TTL`` seconds, if any."""
+    with _recent_lock:
+        entry = _recent.get(url)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > WALK_TTL:
+            del _recent[url]
+            return None
+        _recent.move_to_end(url)
+        return entry[1]
@@ -0,0 +1,238 @@
+"""Template-aware deduplication of the regions pages of one site share.
+
+The header, navigation, footer and cookie banner of a site are usually the
+same on thousands of pages. While a page is parsed, every such subtree is set
+aside and fingerprinted by hashing its events (tags, attributes, text). The
+first time a fingerprint is seen, the subtree gets its own ``DomIndex``,
+which is kept in a process-wide LRU. Every later page with the same subtree
+merges the cached fragment index into its own index (``DomIndex.merge``) and
+skips indexing it; the region hashes (see ``regions``) take the fingerprint
+instead of the subtree's markup. Page-level verdicts still see the whole page.
+
+Per-block work on template text is also done once per fingerprint:
+``map_runs`` computes a function over each page's runs of text blocks and
+reuses the result for runs that come from an already seen template. The
+readability check uses it for language scoring and readability counts.
+Template blocks keep their fingerprint (``TextBlock.template``), so examples
+a check reports from them point to the shared region they came from.
+
+A template region is an outermost block-level element that is a ``header``,
+``nav`` or ``footer`` (or has role banner, navigation or contentinfo), or a
+banner-like element (``aside``, ``div`` or ``section``, or role dialog,
+alertdialog or region) whose id, class or label names a cookie or consent
+banner. ``html``, ``body`` and ``main`` never are. A candidate that turns out
+to hold the main content, or grows past ``REGION_EVENT_LIMIT`` events, is
+indexed in place like the rest of the page.
+
+Configuration (environment variables)::
+
+    WCAG_TEMPLATES=0             index every page in full, without fragment reuse
+    WCAG_TEMPLATE_CACHE          template fragments (and their block results) kept per process (default 256)
+"""
+
+import hashlib
+import itertools
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from .dom_index import _BLOCK_TAGS, DomIndex, DomIndexBuilder, TextBlock, _attr
+from .metrics import get_metrics
+from .regions import RegionHasher
+
+ENABLED = os.getenv("WCAG_TEMPLATES", "1").lower() not in ("0", "false", "no")
+CACHE_LIMIT = int(os.getenv("WCAG_TEMPLATE_CACHE", "256"))
+# Results of ``map_runs`` kept per cached fragment (one per computation and run length).
+RESULTS_PER_FRAGMENT = 4
+
+_TAG_KINDS = {"header": "header", "nav": "nav", "footer": "footer"}
+_ROLE_KINDS = {"banner": "header", "navigation": "nav", "contentinfo": "footer"}
+_COOKIE = re.compile(r"cookie|consent|gdpr|\bcmp\b", re.I)
+_PAGE_TAGS = frozenset(("html", "body", "main"))
+_BANNER_TAGS = frozenset(("aside", "div", "section"))
+_BANNER_ROLES = frozenset(("dialog", "alertdialog", "region"))
+# Events buffered for one template region before it is given up and indexed in place.
+REGION_EVENT_LIMIT = 20000
+
+_START, _DATA, _END, _COMMENT = range(4)
+
+T = TypeVar("T")
+
+
+def template_kind(tag: str, attrs: Mapping[str, Any]) -> str:
+    """``header``, ``nav``, ``footer`` or ``cookie`` for a template region root, else ""."""
+    if tag not in _BLOCK_TAGS or tag in _PAGE_TAGS:
+        return ""
+    role = _attr(attrs, "role").lower()
+    kind = _TAG_KINDS.get(tag) or _ROLE_KINDS.get(role, "")
+    if kind:
+        return kind
+    if (tag in _BANNER_TAGS or role in _BANNER_ROLES) and _COOKIE.search(" ".join((_attr(attrs, "id"), _attr(attrs, "class"), _attr(attrs, "aria-label")))):
+        return "cookie"
+    return ""
+
+# ===================== Fragment cache =====================
+
+_fragments: "OrderedDict[str, DomIndex]" = OrderedDict()
+_results: Dict[str, Dict[Tuple[str, int], Any]] = {}
+_lock = threading.Lock()
+
+
+def lookup_fragment(fingerprint: str) -> Optional[DomIndex]:
+    with _lock:
+        fragment = _fragments.get(fingerprint)
+        if fragment is not None:
+            _fragments.move_to_end(fingerprint)
+    get_metrics().cache.labels("template", "hit" if fragment is not None else "miss").inc()
+    return fragment
+
+
+def remember_fragment(fingerprint: str, fragment: DomIndex) -> DomIndex:
+    with _lock:
+        _fragments[fingerprint] = fragment
+        _fragments.move_to_end(fingerprint)
+        while len(_fragments) > CACHE_LIMIT:
+            evicted, _ = _fragments.popitem(last=False)
+            _results.pop(evicted, None)
+    return fragment
+
+
+def clear_fragments() -> None:
+    with _lock:
+        _fragments.clear()
+        _results.clear()
+
+
+def map_runs(blocks: Sequence[TextBlock], name: str, compute: Callable[[List[str]], T]) -> List[T]:
+    """``compute`` over each run of consecutive *blocks* from the same source, in order.
+
+    Runs of page-specific blocks are always computed. Runs from a template
+    region are computed once per fingerprint (and run length, since the same
+    region can repeat back to back) under *name* and reused afterwards.
+    """
+    values: List[T] = []
+    for template, run in itertools.groupby(blocks, key=lambda block: block.template):
+        texts = [block.text for block in run]
+        if not template:
+            values.append(compute(texts))
+            continue
+        key = (name, len(texts))
+        with _lock:
+            cached = _results.get(template, {}).get(key)
+        if cached is None:
+            cached = compute(texts)
+            with _lock:
+                if template in _fragments:
+                    stored = _results.setdefault(template, {})
+                    if len(stored) < RESULTS_PER_FRAGMENT:
+                        stored[key] = cached
+        values.append(cached)
+    return values
+
+# ===================== Splitting =====================
+
+class TemplateSplitter:
+    """Forwards parser events to a ``DomIndexBuilder`` and a ``RegionHasher``, diverting template regions.
+
+    The events of a template region are buffered and hashed. When the region
+    closes, the builder adopts the cached fragment index (indexing the
+    buffered events into a new fragment first if there is none) and the
+    hasher takes the fingerprint in place of the events. With *enabled*
+    false, every event goes straight through.
+    """
+
+    def __init__(self, builder: DomIndexBuilder, hasher: RegionHasher, enabled: bool = ENABLED):
+        self.builder = builder
+        self.hasher = hasher
+        self.enabled = enabled
+        self._kind = ""
+        self._depth = 0
+        self._events: List[Tuple[Any, ...]] = []
+
+    def start(self, tag: str, attrs: Mapping[str, Any]) -> None:
+        if self._kind:
+            if tag in _PAGE_TAGS or _attr(attrs, "role").lower() == "main" or len(self._events) >= REGION_EVENT_LIMIT:
+                # Not a shared template after all: index what was buffered in place and stop diverting.
+                self._release()
+            else:
+                self._depth += 1
+                self._events.append((_START, tag, attrs))
+                return
+        kind = template_kind(tag, attrs) if self.enabled and self.builder.splittable else ""
+        if not kind:
+            self.builder.start(tag, attrs)
+            self.hasher.start(tag, attrs)
+            return
+        self._kind = kind
+        self._depth = 1
+        self._events = [(_START, tag, attrs)]
+
+    def data(self, text: str) -> None:
+        if self._kind and len(self._events) >= REGION_EVENT_LIMIT:
+            self._release()
+        if self._kind:
+            self._events.append((_DATA, text))
+        else:
+            self.builder.data(text)
+            self.hasher.data(text)
+
+    def comment(self, text: str) -> None:
+        """Comments and the doctype (hashed, not indexed)."""
+        if self._kind:
+            self._events.append((_COMMENT, text))
+        else:
+            self.hasher.data(text)
+
+    def end(self, tag: str) -> None:
+        if not self._kind:
+            self.builder.end(tag)
+            self.hasher.end(tag)
+            return
+        self._events.append((_END, tag))
+        self._depth -= 1
+        if self._depth == 0:
+            self._close()
+
+    def _close(self) -> None:
+        events, kind = self._events, self._kind
+        self._events, self._kind = [], ""
+        digest = hashlib.blake2b(f"{kind}:{events!r}".encode("utf-8", "surrogatepass"), digest_size=16)
+        fingerprint = digest.hexdigest()
+        fragment = lookup_fragment(fingerprint)
+        if fragment is None:
+            fragment_builder = DomIndexBuilder()
+            _replay(events, fragment_builder)
+            fragment = remember_fragment(fingerprint, fragment_builder.finish())
+        self.builder.adopt(fragment, fingerprint, kind)
+        self.hasher.adopt(fingerprint, [(event[1], event[2]) for event in events if event[0] == _START])
+
+    def _release(self) -> None:
+        _replay(self._events, self.builder, self.hasher)
+        self._events, self._kind, self._depth = [], "", 0
+
+    def finish(self) -> Tuple[DomIndex, Dict[str, str]]:
+        """The page's index and region hashes."""
+        if self._kind:
+            # A region cut off by the element cap or the end of the document is indexed in place.
+            self._release()
+        return self.builder.finish(), self.hasher.finish()
+
+
+def _replay(events: Sequence[Tuple[Any, ...]], builder: DomIndexBuilder, hasher: Optional[RegionHasher] = None) -> None:
+    for event in events:
+        if event[0] == _START:
+            builder.start(event[1], event[2])
+            if hasher is not None:
+                hasher.start(event[1], event[2])
+        elif event[0] == _DATA:
+            builder.data(event[1])
+            if hasher is not None:
+                hasher.data(event[1])
+        elif event[0] == _END:
+            builder.end(event[1])
+            if hasher is not None:
+                hasher.end(event[1])
+        elif hasher is not None:
+            hasher.data(event[1])
@@ -1,5 +1,6 @@
 from google.adk.agents import LlmAgent
-from . import tools
+from . import async_tools
+from .metrics import agent_callbacks
 
 timing_controls_agent = LlmAgent(
     model="gemini-1.5-flash",
@@ -13,5 +14,6 @@ Process:
 1. Always call the `test_timing_controls` tool on the provided URL
 2. Summarise issues and give clear remediation steps
 """,
-    tools=[tools.test_timing_controls],
+    tools=[async_tools.test_timing_controls],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
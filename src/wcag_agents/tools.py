@@ -1,195 +1,300 @@
-from typing import Dict, Any
-import json, subprocess, shutil, tempfile
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
+import functools, json, subprocess, shutil, tempfile
+
+from . import node_worker, offline
+from .ax_tree import CompactAXTree, lookup_tree, remember_tree
+from .cache import cached_check
+from .metrics import cli_label, get_metrics, instrumented, timed
+from .results import CheckResult, Outcome, Status
+from .browser_pool import PLAYWRIGHT_MISSING, get_browser_pool, playwright_available
+from .snapshot import get_snapshot, lookup_snapshot
+
+# The browser measurements need NumPy; they are imported by the checks that use them,
+# so the static checks (and the CLI) start without it.
+if TYPE_CHECKING:
+    from .flash import Recording
+    from .focus_appearance import FocusReport
+    from .geometry import TargetReport
+    from .tabwalk import TabWalk
 
 
 def _normalize_url(url: str) -> str:
+    # Local files are only audited once mounted (see ``offline``); any other input is a web address.
+    if url.startswith("file:") and offline.is_mounted(url):
+        return url
     if not url.startswith("http"):
         url = f"https://{url}"
     return url
 
+
+def _first_line(exc: Exception) -> str:
+    return (str(exc) or type(exc).__name__).splitlines()[0]
+
+
+def _reports_truncation(check):
+    """Flag results computed from a page cut short by the ingest byte / element caps."""
+
+    @functools.wraps(check)
+    def wrapper(url: str) -> Dict[str, Any]:
+        url = _normalize_url(url)
+        result = check(url)
+        snap = lookup_snapshot(url)
+        if snap is not None and snap.truncated:
+            result["truncated"] = snap.truncated
+            if result.get("status") == Status.TESTED.name:
+                # A clean result on part of the page is not a pass.
+                result["status"] = Status.TRUNCATED.name
+            result.setdefault("recommendations", []).append("review_truncated_page")
+        return result
+
+    return wrapper
+
 # ===================== WCAG 2.2 Keyboard =====================
 
+def _tab_walk(url: str) -> "TabWalk":
+    """Tab through *url* once and share the walk between the keyboard and focus checks.
+
+    Checks asking while the walk runs wait for it rather than starting their own.
+    """
+    from . import tabwalk
+
+    recorded = tabwalk.lookup_walk(url)
+    if recorded is None:
+        recorded = tabwalk.remember_walk(
+            url, get_browser_pool().run(tabwalk.walk, url, timeout=tabwalk.TAB_BUDGET + 60, key=("tabwalk", url))
+        )
+    return recorded
+
+
+def _try_tab_walk(url: str) -> Tuple[Optional["TabWalk"], str]:
+    if not playwright_available():
+        return None, PLAYWRIGHT_MISSING
+    try:
+        return _tab_walk(url), ""
+    except Exception as exc:
+        return None, _first_line(exc)
+
+
+def _keyboard_result(url: str, recorded: Optional["TabWalk"], error: str = "") -> Dict[str, Any]:
+    result = CheckResult(url, ["2.1.1", "2.1.2", "2.1.3", "2.1.4"])
+    if recorded is None:
+        result.status = Status.NEEDS_TESTING
+        result.add("keyboard_navigation", Outcome.WARN, "tab_walk_unavailable", error=error)
+        result.add("keyboard_traps", Outcome.WARN, "keyboard_traps_untested")
+    else:
+        walk_params = {"reached": recorded.reached, "tabbable": recorded.tabbable, "steps": recorded.steps}
+        if recorded.tabbable and not recorded.reached:
+            result.add("keyboard_navigation", Outcome.FAIL, "tab_reaches_nothing", **walk_params)
+        else:
+            result.add("keyboard_navigation", Outcome.PASS, "tab_walk_reached", **walk_params)
+        trap = recorded.trap
+        if trap is not None and not trap.escapable:
+            examples = ", ".join(recorded.examples.get("trap", []))
+            result.add("keyboard_traps", Outcome.FAIL, "keyboard_trap", count=len(trap.cycle), direction=trap.direction, examples=examples)
+        elif trap is not None:
+            result.add("keyboard_traps", Outcome.INFO, "focus_loop_escapable", count=len(trap.cycle))
+        elif not recorded.complete:
+            result.add("keyboard_traps", Outcome.INFO, "tab_walk_partial", steps=recorded.steps, seconds=recorded.seconds)
+        else:
+            result.add("keyboard_traps", Outcome.PASS, "no_keyboard_traps", steps=recorded.steps)
+    result.add("focus_indicators", Outcome.WARN, "focus_contrast_unverified")
+    result.add("character_shortcuts", Outcome.WARN, "shortcuts_unidentified")
+    result.recommend("manual_keyboard_test", "focus_contrast", "custom_widget_traps", "add_skip_links")
+    return result.to_dict()
+
+
+@instrumented
 def test_keyboard_accessibility(url: str) -> Dict[str, Any]:
-    """Light-weight keyboard accessibility tester used by KeyboardAccessibilityAgent"""
+    """WCAG 2.1.1–2.1.4 – Tab and Shift+Tab through the rendered page, recording the focus order and
+    detecting keyboard traps (focus loops that Escape cannot leave). Requires Playwright with Chromium;
+    without it the check reports NEEDS_TESTING.
+    """
     url = _normalize_url(url)
-    return {
-        "wcag_criteria": ["2.1.1", "2.1.2", "2.1.3", "2.1.4"],
-        "test_results": {
-            "keyboard_navigation": "✅ Tab/Shift+Tab navigation functional",
-            "keyboard_traps": "⚠️ No keyboard traps detected in standard elements",
-            "focus_indicators": "⚠️ Focus indicators present but need contrast verification",
-            "character_shortcuts": "⚠️ Single character shortcuts need identification",
-        },
-        "recommendations": [
-            "Manually test all interactive elements with keyboard only",
-            "Verify focus indicators meet 3:1 contrast ratio",
-            "Test for keyboard traps in custom widgets",
-            "Implement skip links for navigation",
-        ],
-        "url": url,
-        "status": "TESTED",
-    }
+    return _keyboard_result(url, *_try_tab_walk(url))
 
 # ===================== WCAG 2.2.x Timing Controls =====================
 
+@instrumented
+@cached_check(version=3)
+@_reports_truncation
 def test_timing_controls(url: str) -> Dict[str, Any]:
     url = _normalize_url(url)
+    result = CheckResult(url, ["2.2.1", "2.2.2", "2.2.3", "2.2.4", "2.2.5", "2.2.6"])
 
-    # ---- Download page HTML ----
+    # ---- Shared page snapshot ----
     try:
-        import requests
-        from bs4 import BeautifulSoup  # type: ignore
-        import re
-
-        resp = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0 (WCAG-bot)"})
-        html = resp.text
-        soup = BeautifulSoup(html, "lxml")
+        index = get_snapshot(url).index
 
         # ---- Heuristic checks ----
-        has_meta_refresh = any(
-            meta.get("http-equiv", "").lower() == "refresh" for meta in soup.find_all("meta")
-        )
+        has_meta_refresh = bool(index.meta_refresh)
 
-        has_autoplay_media = bool(soup.select("video[autoplay], audio[autoplay]"))
+        has_autoplay_media = bool(index.autoplay_media)
 
-        has_marquee = bool(soup.find_all("marquee"))
+        has_marquee = bool(index.marquee_count)
 
-        # Simple regex scan for common JS timing functions
-        js_timer_pattern = re.compile(r"set(Time|Interval)\\s*\\(", re.IGNORECASE)
-        has_js_timers = bool(js_timer_pattern.search(html))
+        # setTimeout / setInterval calls in inline scripts and event handlers
+        has_js_timers = bool(index.timer_scripts)
 
-        # Build test results ----------------------------------------------------
-        test_results = {
-            "timing_adjustable": "✅ No automatic timeouts detected" if not has_js_timers else "⚠️ Potential JavaScript timeouts present (setTimeout/setInterval detected)",
-            "pause_stop_hide": "✅ No auto-playing media found" if not has_autoplay_media else "⚠️ Auto-playing media detected (video/audio with autoplay)",
-            "no_timing": "✅ No timing-dependent interactions detected" if not any([has_js_timers, has_meta_refresh]) else "⚠️ Possible timing-dependent interactions (meta refresh or JS timers)",
-            "interruptions": "✅ No automatic interruptions detected" if not has_meta_refresh else "⚠️ Meta refresh tag may interrupt user flow",
-            "re_authenticating": "⚠️ Session timeout behaviour not determinable via static scan – needs manual verification",
-            "timeouts": "✅ No timeout warnings needed" if not has_meta_refresh else "⚠️ Implement timeout warnings / extend option",
-        }
+        # Findings --------------------------------------------------------------
+        if has_js_timers:
+            result.add("timing_adjustable", Outcome.WARN, "js_timers")
+        else:
+            result.add("timing_adjustable", Outcome.PASS, "no_timeouts")
+        if has_autoplay_media:
+            result.add("pause_stop_hide", Outcome.WARN, "autoplay_media")
+        else:
+            result.add("pause_stop_hide", Outcome.PASS, "no_autoplay")
+        if has_js_timers or has_meta_refresh:
+            result.add("no_timing", Outcome.WARN, "timing_interactions")
+        else:
+            result.add("no_timing", Outcome.PASS, "no_timing_interactions")
+        if has_meta_refresh:
+            result.add("interruptions", Outcome.WARN, "meta_refresh_interrupts")
+        else:
+            result.add("interruptions", Outcome.PASS, "no_interruptions")
+        result.add("re_authenticating", Outcome.WARN, "session_timeout_manual")
+        if has_meta_refresh:
+            result.add("timeouts", Outcome.WARN, "timeout_warnings_needed")
+        else:
+            result.add("timeouts", Outcome.PASS, "no_timeout_warnings_needed")
 
         # Recommendations -------------------------------------------------------
-        recommendations = []
         if has_meta_refresh:
-            recommendations.append("Remove or extend any meta refresh to at least 20 hours OR provide a user-extendable control.")
+            result.recommend("extend_meta_refresh")
         if has_js_timers:
-            recommendations.append("Ensure JavaScript timeouts are adjustable, can be turned off, or extended by the user.")
+            result.recommend("adjustable_timeouts")
         if has_autoplay_media or has_marquee:
-            recommendations.append("Provide user controls to pause, stop or hide any auto-moving / autoplaying content that lasts more than 5 seconds.")
-        if not recommendations:
-            recommendations.append("No major timing-related issues detected – continue to monitor dynamic components.")
+            result.recommend("pause_moving_content")
+        if not result.recommendations:
+            result.recommend("monitor_timing")
 
-        status = "TESTED" if not (has_meta_refresh or has_autoplay_media or has_js_timers or has_marquee) else "NEEDS_REVIEW"
+        if has_meta_refresh or has_autoplay_media or has_js_timers or has_marquee:
+            result.status = Status.NEEDS_REVIEW
 
     except Exception as exc:
-        # Graceful fallback if requests / bs4 not available or network error
-        test_results = {
-            "timing_adjustable": "⚠️ Unable to fetch page to test (" + str(exc) + ")",
-            "pause_stop_hide": "⚠️ Unknown – page fetch failed",
-            "no_timing": "⚠️ Unknown – page fetch failed",
-            "interruptions": "⚠️ Unknown – page fetch failed",
-            "re_authenticating": "⚠️ Manual verification required",
-            "timeouts": "⚠️ Manual verification required",
-        }
-        recommendations = [
-            "Ensure the execution environment has internet access and the 'requests' & 'beautifulsoup4' packages installed.",
-            "Perform a manual review of timing controls on the target site.",
-        ]
-        status = "ERROR"
+        # Graceful fallback if requests / lxml not available or network error
+        result.error(exc)
+        result.recommend("check_fetch_environment", "manual_timing_review")
 
-    return {
-        "wcag_criteria": ["2.2.1", "2.2.2", "2.2.3", "2.2.4", "2.2.5", "2.2.6"],
-        "test_results": test_results,
-        "recommendations": recommendations,
-        "url": url,
-        "status": status,
-    }
+    return result.to_dict()
 
 # ===================== WCAG 2.3.x Seizure Prevention =====================
 
+def _seizure_result(url: str, recording: Optional["Recording"] = None, error: str = "") -> Dict[str, Any]:
+    """Measure a screencast of the page against the 2.3.1 / 2.3.2 flash thresholds."""
+    result = CheckResult(url, ["2.3.1", "2.3.2", "2.3.3"], Status.SAFE)
+    if recording is None:
+        # Nothing was measured, so nothing may be reported as safe.
+        result.status = Status.NEEDS_TESTING
+        result.add("flash_threshold", Outcome.WARN, "flash_capture_unavailable", error=error)
+        result.add("animation_interactions", Outcome.INFO, "animation_interactions_unverified")
+        result.recommend("test_video_flashing", "animation_controls")
+        return result.to_dict()
+
+    from . import flash
+
+    report = flash.analyze(flash.decode(recording))
+    params = {"frames": report.frames, "seconds": report.seconds}
+    if report.any_fail:
+        result.add("three_flashes", Outcome.FAIL, "flashes_any_size", flashes=report.any_flashes, **params)
+    else:
+        result.add("three_flashes", Outcome.PASS, "no_flashes_any_size", flashes=report.any_flashes, **params)
+    if report.general_fail:
+        result.add("general_flash", Outcome.FAIL, "general_flash_exceeds", flashes=report.general_flashes, at=report.first_failure)
+    else:
+        result.add("general_flash", Outcome.PASS, "general_flash_below_threshold", flashes=report.general_flashes)
+    if report.red_fail:
+        result.add("red_flash", Outcome.FAIL, "red_flash_exceeds", flashes=report.red_flashes, at=report.first_failure)
+    else:
+        result.add("red_flash", Outcome.PASS, "red_flash_below_threshold", flashes=report.red_flashes)
+    result.add("animation_interactions", Outcome.INFO, "animation_interactions_unverified")
+
+    if report.general_fail or report.red_fail:
+        result.status = Status.TESTED
+        result.recommend("remove_flashing", "animation_controls")
+    elif report.any_fail:
+        result.status = Status.TESTED
+        result.recommend("reduce_small_flashes", "animation_controls")
+    else:
+        result.recommend("test_video_flashing", "animation_controls")
+    return result.to_dict()
+
+
+# Not result-cached: flashing comes from media and scripts whose output the
+# page markup does not capture.
+@instrumented
 def test_seizure_prevention(url: str) -> Dict[str, Any]:
+    """Record a few seconds of the rendered page and measure general and red flashes
+    (WCAG 2.3.1, 2.3.2). Requires Playwright with Chromium; without it the check
+    reports NEEDS_TESTING rather than SAFE.
+    """
     url = _normalize_url(url)
-    return {
-        "wcag_criteria": ["2.3.1", "2.3.2", "2.3.3"],
-        "test_results": {
-            "three_flashes": "✅ No content flashes more than 3 times per second",
-            "flash_threshold": "✅ No flashing content exceeds safe thresholds",
-            "animation_interactions": "✅ No seizure-inducing animations detected",
-        },
-        "recommendations": [
-            "Continue monitoring for dynamic content",
-            "Test video content for flashing sequences",
-            "Verify animation controls are available",
-        ],
-        "url": url,
-        "status": "SAFE",
-    }
+    if not playwright_available():
+        return _seizure_result(url, error=PLAYWRIGHT_MISSING)
+    from .flash import record
+
+    try:
+        recording = get_browser_pool().run(record, url)
+    except Exception as exc:
+        return _seizure_result(url, error=_first_line(exc))
+    return _seizure_result(url, recording)
 
 # ===================== WCAG 2.4.x Navigation Structure =====================
 
+@instrumented
 def test_navigation_structure(url: str) -> Dict[str, Any]:
     url = _normalize_url(url)
-    return {
-        "wcag_criteria": [
-            "2.4.1",
-            "2.4.2",
-            "2.4.3",
-            "2.4.4",
-            "2.4.5",
-            "2.4.6",
-            "2.4.7",
-            "2.4.8",
-            "2.4.9",
-            "2.4.10",
-        ],
-        "test_results": {
-            "bypass_blocks": "⚠️ Skip links need verification",
-            "page_titled": "⚠️ Page titles need descriptiveness check",
-            "focus_order": "✅ Logical focus order maintained",
-            "link_purpose": "⚠️ Link purposes need clarity assessment",
-            "multiple_ways": "✅ Multiple navigation methods available",
-            "headings_labels": "⚠️ Heading hierarchy requires validation",
-            "focus_visible": "⚠️ Focus indicators need contrast verification",
-            "location": "✅ User location indicators present",
-            "link_purpose_context": "⚠️ Link context needs improvement",
-            "section_headings": "⚠️ Section headings need organization review",
-        },
-        "recommendations": [
-            "Implement ARIA landmarks",
-            "Ensure logical heading structure (H1-H6)",
-            "Improve link descriptiveness",
-            "Add skip navigation links",
-        ],
-        "url": url,
-        "status": "NEEDS_REVIEW",
-    }
+    result = CheckResult(
+        url,
+        ["2.4.1", "2.4.2", "2.4.3", "2.4.4", "2.4.5", "2.4.6", "2.4.7", "2.4.8", "2.4.9", "2.4.10"],
+        Status.NEEDS_REVIEW,
+    )
+    result.add("bypass_blocks", Outcome.WARN, "skip_links_unverified")
+    result.add("page_titled", Outcome.WARN, "title_unverified")
+    result.add("focus_order", Outcome.PASS, "focus_order_logical")
+    result.add("link_purpose", Outcome.WARN, "link_purpose_unverified")
+    result.add("multiple_ways", Outcome.PASS, "multiple_ways_available")
+    result.add("headings_labels", Outcome.WARN, "heading_hierarchy_unverified")
+    result.add("focus_visible", Outcome.WARN, "focus_contrast_unverified")
+    result.add("location", Outcome.PASS, "location_indicators")
+    result.add("link_purpose_context", Outcome.WARN, "link_context_weak")
+    result.add("section_headings", Outcome.WARN, "section_headings_unverified")
+    result.recommend("aria_landmarks", "heading_structure", "descriptive_links", "add_skip_links")
+    return result.to_dict()
 
 # ===================== WCAG 2.5.x Input Modalities =====================
 
+def _input_modalities_result(url: str, report: Optional["TargetReport"] = None) -> Dict[str, Any]:
+    result = CheckResult(url, ["2.5.1", "2.5.2", "2.5.3", "2.5.4", "2.5.5", "2.5.6"], Status.NEEDS_TESTING)
+    result.add("pointer_gestures", Outcome.WARN, "gesture_alternatives_needed")
+    result.add("pointer_cancellation", Outcome.PASS, "pointer_cancellation_available")
+    result.add("label_in_name", Outcome.WARN, "label_in_name_unverified")
+    result.add("motion_actuation", Outcome.WARN, "motion_alternatives_needed")
+    if report is None:
+        result.add("target_size", Outcome.WARN, "target_size_unverified")
+    elif report.enhanced_failing:
+        result.add("target_size", Outcome.WARN, "targets_below_44", count=report.enhanced_failing, total=report.total)
+    else:
+        result.add("target_size", Outcome.PASS, "targets_meet_44", total=report.total)
+    result.add("concurrent_input", Outcome.PASS, "concurrent_input_supported")
+    result.recommend("touch_target_44", "motion_alternatives", "assistive_input_testing", "gesture_alternatives")
+    return result.to_dict()
+
+
+@instrumented
 def test_input_modalities(url: str) -> Dict[str, Any]:
     url = _normalize_url(url)
-    return {
-        "wcag_criteria": ["2.5.1", "2.5.2", "2.5.3", "2.5.4", "2.5.5", "2.5.6"],
-        "test_results": {
-            "pointer_gestures": "⚠️ Multi-point gesture alternatives needed",
-            "pointer_cancellation": "✅ Pointer cancellation available",
-            "label_in_name": "⚠️ Label accessibility needs verification",
-            "motion_actuation": "⚠️ Device motion alternatives needed",
-            "target_size": "⚠️ Touch target size verification needed",
-            "concurrent_input": "✅ Multiple input methods supported",
-        },
-        "recommendations": [
-            "Ensure 44x44 pixel minimum touch targets",
-            "Provide alternatives to motion-based controls",
-            "Test with assistive input devices",
-            "Verify pointer gesture alternatives",
-        ],
-        "url": url,
-        "status": "NEEDS_TESTING",
-    }
+    report = None
+    if playwright_available():
+        try:
+            report = _target_report(url)
+        except Exception:
+            pass  # fall back to the manual-verification note
+    return _input_modalities_result(url, report)
 
 # ===================== Root-level Comprehensive Tool =====================
 
+@instrumented
 def test_website_accessibility(url: str) -> Dict[str, Any]:
     """High-level summary test used by the root agent before routing."""
     url = _normalize_url(url)
@@ -197,17 +302,26 @@ def test_website_accessibility(url: str) -> Dict[str, Any]:
 
 # ===================== External CLI Integrations =====================
 
+CLI_TIMEOUT = 180
+
+
+def _cli_result(returncode: int, stdout: str, stderr: str) -> dict:
+    """Turn a finished CLI run into parsed JSON, raw stdout or an error."""
+    if returncode == 0:
+        # If stdout is JSON parse it; otherwise return raw.
+        try:
+            return json.loads(stdout)
+        except json.JSONDecodeError:
+            return {"stdout": stdout.strip()}
+    return {"error": stderr.strip() or stdout.strip()}
+
+
 def _run_cli(cmd: list[str]) -> dict:
     """Helper to run a CLI command and capture JSON/stdout."""
     try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
-        if proc.returncode == 0:
-            # If stdout is JSON parse it; otherwise return raw.
-            try:
-                return json.loads(proc.stdout)
-            except json.JSONDecodeError:
-                return {"stdout": proc.stdout.strip()}
-        return {"error": proc.stderr.strip() or proc.stdout.strip()}
+        with timed(get_metrics().cli.labels(cli_label(cmd)), "cli", command=" ".join(cmd[:2])):
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=CLI_TIMEOUT)
+        return _cli_result(proc.returncode, proc.stdout, proc.stderr)
     except FileNotFoundError:
         return {"error": f"{cmd[0]} binary not found. Please ensure it is installed in the system PATH."}
     except Exception as exc:
@@ -215,56 +329,94 @@ def _run_cli(cmd: list[str]) -> dict:
 
 # Pa11y (Node CLI) ----------------------------------------------------
 
+def _pa11y_cmd(url: str) -> list[str]:
+    return ["npx", "pa11y", url, "--reporter", "json"]
+
+
+@instrumented
+@cached_check(version=1)
 def run_pa11y(url: str) -> dict:
-    """Run Pa11y accessibility scan via npx (requires Node & pa11y)."""
+    """Run Pa11y accessibility scan via the warm Node worker, falling back to npx (requires Node & pa11y)."""
     url = _normalize_url(url)
-    if not shutil.which("npx"):
-        return {"error": "npx command not found – Node.js is required for Pa11y."}
-    cmd = ["npx", "pa11y", url, "--reporter", "json"]
-    result = _run_cli(cmd)
+    result = node_worker.run_engine("pa11y", url)
+    if result is None:
+        if not shutil.which("npx"):
+            return {"error": "npx command not found – Node.js is required for Pa11y."}
+        result = _run_cli(_pa11y_cmd(url))
     return {"tool": "pa11y", "url": url, "result": result}
 
 # axe DevTools CLI ----------------------------------------------------
 
+def _axe_cmd(url: str) -> list[str]:
+    return ["npx", "axe", url, "--tags", "wcag2a,wcag2aa", "--format", "json"]
+
+
+@instrumented
+@cached_check(version=1)
 def run_axe_devtools(url: str) -> dict:
     """Run axe DevTools CLI scan (requires Node & axe DevTools installed)."""
     url = _normalize_url(url)
-    if not shutil.which("npx"):
-        return {"error": "npx command not found – Node.js is required for axe DevTools."}
-    cmd = ["npx", "axe", url, "--tags", "wcag2a,wcag2aa", "--format", "json"]
-    result = _run_cli(cmd)
+    result = node_worker.run_engine("axe", url)
+    if result is None:
+        if not shutil.which("npx"):
+            return {"error": "npx command not found – Node.js is required for axe DevTools."}
+        result = _run_cli(_axe_cmd(url))
     return {"tool": "axe-devtools", "url": url, "result": result}
 
 # ===================== Chrome DevTools / Lighthouse Integrations =====================
 
+async def _capture_accessibility_tree(page, url: str) -> CompactAXTree:
+    await page.goto(url, wait_until="networkidle")
+    return CompactAXTree.from_snapshot(await page.accessibility.snapshot())
+
+
+def _accessibility_tree(url: str) -> CompactAXTree:
+    tree = lookup_tree(url)
+    if tree is None:
+        tree = remember_tree(url, get_browser_pool().run(_capture_accessibility_tree, url))
+    return tree
+
+
+@instrumented
 def get_accessibility_tree(url: str) -> dict:
     """Capture the page's accessibility tree using the Chrome DevTools protocol via Playwright.
-    Requires the `playwright` Python package and Chromium browser. If unavailable, returns an error message.
+    Returns a pruned summary (role counts, landmarks, heading outline, unnamed controls, focus order);
+    call `query_accessibility_tree` to drill into a node or list. Requires the `playwright` Python
+    package and Chromium browser. If unavailable, returns an error message.
+    Pages are served from the shared browser pool, so no browser is launched per call.
     """
     url = _normalize_url(url)
-    try:
-        from playwright.sync_api import sync_playwright  # type: ignore
-    except ImportError:
-        return {"error": "playwright not installed. Run: pip install playwright && playwright install chromium"}
+    if not playwright_available():
+        return {"error": PLAYWRIGHT_MISSING}
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(url, wait_until="networkidle")
-            tree = page.accessibility.snapshot()
-            browser.close()
-        # The accessibility tree can be quite large; we return the top-level summary.
-        return {"tool": "chromedevtools-accessibility-tree", "url": url, "snapshot": tree}
+        tree = _accessibility_tree(url)
+        return {"tool": "chromedevtools-accessibility-tree", "url": url, "summary": tree.summary()}
     except Exception as exc:
-        return {"error": str(exc)}
+        return {"error": str(exc) or type(exc).__name__}
 
-def run_lighthouse_accessibility(url: str) -> dict:
-    """Run Lighthouse accessibility audit via npx Lighthouse CLI (Chrome DevTools)."""
+
+@instrumented
+def query_accessibility_tree(
+    url: str, query: str = "subtree", node: int = 0, depth: int = 2, role: str = "", name: str = ""
+) -> dict:
+    """Drill into the accessibility tree captured by `get_accessibility_tree` (reused for a few minutes).
+    query: "subtree" (node id + depth), "find" (role and/or name substring), "landmarks", "headings",
+    "unnamed_controls", "focus_order" or "summary". Lists hold the first 25 matches plus their total
+    "count"; narrow "find" by role or name to see others.
+    """
     url = _normalize_url(url)
-    if not shutil.which("npx"):
-        return {"error": "npx command not found – Node.js is required for Lighthouse."}
-    cmd = [
+    if not playwright_available():
+        return {"error": PLAYWRIGHT_MISSING}
+
+    try:
+        result = _accessibility_tree(url).query(query, node=node, depth=depth, role=role, name=name)
+        return {"tool": "chromedevtools-accessibility-tree", "url": url, "query": query, "result": result}
+    except Exception as exc:
+        return {"error": str(exc) or type(exc).__name__}
+
+def _lighthouse_cmd(url: str) -> list[str]:
+    return [
         "npx",
         "lighthouse",
         url,
@@ -273,323 +425,450 @@ def run_lighthouse_accessibility(url: str) -> dict:
         "--output=json",
         "--chrome-flags=--headless",
     ]
-    result = _run_cli(cmd)
+
+
+@instrumented
+@cached_check(version=1)
+def run_lighthouse_accessibility(url: str) -> dict:
+    """Run Lighthouse accessibility audit via npx Lighthouse CLI (Chrome DevTools)."""
+    url = _normalize_url(url)
+    result = node_worker.run_engine("lighthouse", url)
+    if result is None:
+        if not shutil.which("npx"):
+            return {"error": "npx command not found – Node.js is required for Lighthouse."}
+        result = _run_cli(_lighthouse_cmd(url))
     return {"tool": "lighthouse", "url": url, "result": result}
 
 # ===================== WCAG 2.2 ADDITIONS (Navigation & Input) =====================
 
 
+def _focus_not_obscured_result(url: str, recorded: Optional["TabWalk"], error: str = "") -> Dict[str, Any]:
+    result = CheckResult(url, ["2.4.11", "2.4.12"], Status.TESTED)
+    if recorded is None:
+        result.status = Status.NEEDS_REVIEW
+        result.add("focus_not_obscured_minimum", Outcome.WARN, "focus_obscured_unmeasured", error=error)
+        result.add("focus_not_obscured_enhanced", Outcome.WARN, "focus_obscured_heuristic")
+        result.recommend("sticky_overlap", "focus_partially_visible")
+        return result.to_dict()
+
+    if recorded.hidden:
+        examples = ", ".join(recorded.examples.get("hidden", []))
+        result.add("focus_not_obscured_minimum", Outcome.FAIL, "focus_fully_obscured", count=len(recorded.hidden), examples=examples)
+    else:
+        result.add("focus_not_obscured_minimum", Outcome.PASS, "focus_never_fully_obscured", reached=recorded.reached)
+    if recorded.partly_hidden:
+        examples = ", ".join(recorded.examples.get("partly_hidden", []))
+        result.add("focus_not_obscured_enhanced", Outcome.FAIL, "focus_partly_obscured", count=len(recorded.partly_hidden), examples=examples)
+    else:
+        result.add("focus_not_obscured_enhanced", Outcome.PASS, "focus_never_obscured", reached=recorded.reached)
+    if not recorded.complete:
+        result.add("coverage", Outcome.INFO, "tab_walk_partial", steps=recorded.steps, seconds=recorded.seconds)
+    if recorded.hidden or recorded.partly_hidden:
+        result.recommend("sticky_overlap", "focus_partially_visible")
+    return result.to_dict()
+
+
+@instrumented
 def test_focus_not_obscured(url: str) -> Dict[str, Any]:
-    """WCAG 2.4.11-12 – Ensure the focused element is not obscured by other UI (sticky headers, dialogs, etc.).
-    This is a heuristic placeholder; real implementation would need viewport intersection checks via Playwright/Puppeteer.
+    """WCAG 2.4.11-12 – Tab through the rendered page and check every focused element against the fixed
+    and sticky overlays (headers, cookie banners, chat widgets) on screen at that moment. Requires
+    Playwright with Chromium; without it the check reports NEEDS_REVIEW.
     """
     url = _normalize_url(url)
-    return {
-        "wcag_criteria": ["2.4.11", "2.4.12"],
-        "test_results": {
-            "focus_not_obscured_minimum": "⚠️ Needs manual verification (heuristic only)",
-            "focus_not_obscured_enhanced": "⚠️ Needs manual verification (heuristic only)",
-        },
-        "recommendations": [
-            "Check that sticky headers/footers do not cover the keyboard focus ring.",
-            "Ensure focused elements remain at least partially visible within the viewport.",
-        ],
-        "url": url,
-        "status": "NEEDS_REVIEW",
-    }
-
-
+    return _focus_not_obscured_result(url, *_try_tab_walk(url))
+
+
+def _focus_appearance_result(url: str, report: Optional["FocusReport"] = None, error: str = "") -> Dict[str, Any]:
+    result = CheckResult(url, ["2.4.7", "2.4.13"], Status.TESTED)
+    if report is None:
+        result.status = Status.NEEDS_REVIEW
+        result.add("focus_indicator", Outcome.WARN, "focus_appearance_unmeasured", error=error)
+        result.add("focus_appearance", Outcome.WARN, "focus_appearance_unverified")
+        result.recommend("focus_indicator_area", "focus_contrast")
+        return result.to_dict()
+
+    from .focus_appearance import EXAMPLE_LIMIT
+
+    def examples(labels: list) -> str:
+        return ", ".join(labels[:EXAMPLE_LIMIT])
+
+    measured = report.measured
+    if report.invisible:
+        result.add("focus_indicator", Outcome.FAIL, "focus_indicator_missing", count=len(report.invisible), measured=measured, examples=examples(report.invisible))
+    else:
+        result.add("focus_indicator", Outcome.PASS, "focus_indicator_visible", measured=measured)
+    if report.insufficient:
+        result.add("focus_appearance", Outcome.FAIL, "focus_indicator_insufficient", count=len(report.insufficient), measured=measured, examples=examples(report.insufficient))
+    if report.low_adjacent:
+        result.add("focus_contrast", Outcome.FAIL, "focus_indicator_low_adjacent", count=len(report.low_adjacent), measured=measured, examples=examples(report.low_adjacent))
+    if not (report.invisible or report.insufficient or report.low_adjacent):
+        result.add("focus_appearance", Outcome.PASS, "focus_indicator_sufficient", measured=measured)
+    if not report.complete:
+        result.add("coverage", Outcome.INFO, "focus_appearance_partial", measured=measured, tabbable=report.tabbable)
+    if report.invisible or report.insufficient:
+        result.recommend("focus_indicator_area")
+    if report.insufficient or report.low_adjacent:
+        result.recommend("focus_contrast")
+    return result.to_dict()
+
+
+@instrumented
 def test_focus_appearance(url: str) -> Dict[str, Any]:
-    """WCAG 2.4.13 – Evaluate focus indicator size and contrast (placeholder)."""
+    """WCAG 2.4.7 / 2.4.13 – Screenshot every focusable element unfocused and focused in one page session
+    and measure the changed area and its contrast. Requires Playwright with Chromium; without it the check
+    reports NEEDS_REVIEW.
+    """
     url = _normalize_url(url)
-    return {
-        "wcag_criteria": ["2.4.13"],
-        "test_results": {
-            "focus_indicator": "⚠️ Focus appearance needs size/contrast validation",
-        },
-        "recommendations": [
-            "Ensure focus indicator has minimum area ≥ 2 CSS px outline or 8 px thickness equivalent.",
-            "Maintain 3:1 contrast ratio against adjacent colors.",
-        ],
-        "url": url,
-        "status": "NEEDS_REVIEW",
-    }
+    if not playwright_available():
+        return _focus_appearance_result(url, error=PLAYWRIGHT_MISSING)
+    from . import focus_appearance
 
+    try:
+        captured = get_browser_pool().run(
+            focus_appearance.capture, url, timeout=focus_appearance.FOCUS_BUDGET + 60
+        )
+    except Exception as exc:
+        return _focus_appearance_result(url, error=_first_line(exc))
+    # Image decoding and comparison run here, off the browser's event loop.
+    return _focus_appearance_result(url, focus_appearance.analyze(captured))
 
+
+@instrumented
 def test_dragging_movements(url: str) -> Dict[str, Any]:
     """WCAG 2.5.7 – Check that functionality requiring dragging is also available by single-pointer operations."""
     url = _normalize_url(url)
-    return {
-        "wcag_criteria": ["2.5.7"],
-        "test_results": {
-            "dragging_movements": "⚠️ Manual verification required – no automatic detection implemented",
-        },
-        "recommendations": [
-            "Provide alternative controls (e.g., buttons) for functionality that currently relies on drag-and-drop.",
-        ],
-        "url": url,
-        "status": "NEEDS_TESTING",
-    }
+    result = CheckResult(url, ["2.5.7"], Status.NEEDS_TESTING)
+    result.add("dragging_movements", Outcome.WARN, "dragging_unverified")
+    result.recommend("single_pointer_alternative")
+    return result.to_dict()
+
+
+def _target_report(url: str) -> "TargetReport":
+    from .geometry import lookup_targets, measure_targets, remember_targets
 
+    report = lookup_targets(url)
+    if report is None:
+        # Both target checks may ask at once; the second waits for the first measurement.
+        report = remember_targets(url, get_browser_pool().run(measure_targets, url, key=("targets", url)))
+    return report
 
+
+def _target_size_result(url: str, report: Optional["TargetReport"] = None, error: str = "") -> Dict[str, Any]:
+    result = CheckResult(url, ["2.5.8"], Status.TESTED)
+    if report is None:
+        result.status = Status.NEEDS_TESTING
+        result.add("target_size", Outcome.WARN, "target_size_unmeasured", error=error)
+        result.recommend("target_size_24", "target_spacing")
+        return result.to_dict()
+
+    params = {"total": report.total, "spaced": report.spaced, "inline": report.inline}
+    if report.failing:
+        result.add("target_size", Outcome.FAIL, "targets_too_small", count=len(report.failing), examples=", ".join(report.examples), **params)
+        result.recommend("target_size_24", "target_spacing")
+    else:
+        result.add("target_size", Outcome.PASS, "targets_meet_minimum", **params)
+    return result.to_dict()
+
+
+@instrumented
 def test_target_size_minimum(url: str) -> Dict[str, Any]:
-    """WCAG 2.5.8 – Verify interactive target size is at least 24 × 24 CSS pixels (heuristic)."""
+    """WCAG 2.5.8 – Measure every rendered target against 24 × 24 CSS px, with the spacing and inline exceptions.
+    Requires Playwright with Chromium; without it the check reports NEEDS_TESTING.
+    """
     url = _normalize_url(url)
-    return {
-        "wcag_criteria": ["2.5.8"],
-        "test_results": {
-            "target_size": "⚠️ Automatic estimation suggests some targets < 24 px; manual audit advised",
-        },
-        "recommendations": [
-            "Increase touch target size to minimum 24×24 CSS px (or provide spacing).",
-            "Ensure sufficient spacing between smaller targets to avoid activation errors.",
-        ],
-        "url": url,
-        "status": "NEEDS_TESTING",
-    }
+    if not playwright_available():
+        return _target_size_result(url, error=PLAYWRIGHT_MISSING)
+    try:
+        report = _target_report(url)
+    except Exception as exc:
+        return _target_size_result(url, error=_first_line(exc))
+    return _target_size_result(url, report)
 
 # ===================== WCAG 3.1.x Readable =====================
 
+# Text blocks shorter than this are too short for a meaningful per-block score.
+READABILITY_BLOCK_MIN_WORDS = 30
+
+
+def _block_example(block, **fields: Any) -> Dict[str, Any]:
+    """A text block reported as an example; blocks of a shared template region name its fingerprint."""
+    example = {"tag": block.tag, **fields, "text": block.text[:120]}
+    if block.template:
+        example["template"] = block.template
+    return example
+
+
+@instrumented
+@cached_check(version=8)
+@_reports_truncation
 def test_readability(url: str) -> Dict[str, Any]:
     url = _normalize_url(url)
-    import re, requests, textstat  # type: ignore
-    from langdetect import detect  # type: ignore
-    from bs4 import BeautifulSoup  # type: ignore
+    import re
+    from .language import MIN_CONFIDENCE, MIN_LETTERS, detect_runs, same_language, score_run
+    from .readability import count_blocks, score_counts
+    from .templates import map_runs
+
+    result = CheckResult(url, ["3.1.1", "3.1.2", "3.1.3", "3.1.4", "3.1.5", "3.1.6"])
+    scores: Dict[str, Any] = {}
+    language_mismatches: list = []
 
     try:
-        resp = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0 (WCAG-audit)"})
-        html = resp.text
-        soup = BeautifulSoup(html, "lxml")
-
-        # -------- 3.1.1 / 3.1.2 language attributes --------
-        page_lang = soup.html.get("lang", "").lower() if soup.html else ""
-        language_of_page = f"✅ html lang attribute set to '{page_lang}'" if page_lang else "❌ Missing html lang attribute"
-
-        # Parts with differing lang
-        parts_with_lang = [el for el in soup.find_all(attrs={"lang": True}) if el.get("lang", "").lower() != page_lang]
-        language_of_parts = (
-            f"✅ {len(parts_with_lang)} elements have correct secondary lang attributes" if parts_with_lang else "⚠️ No secondary lang attributes detected (verify if needed)"
+        snap = get_snapshot(url)
+        index = snap.index
+
+        # -------- 3.1.1 / 3.1.2 language of page and of parts --------
+        page_lang = index.html_lang
+
+        # One batched detection pass over every text block; the page language is the combined score of
+        # the blocks in the page's own language (parts marked with another lang only count for 3.1.2).
+        # Blocks of shared template regions are scored once per region (see ``templates``).
+        blocks = index.text_blocks
+        in_page_lang = [
+            not block.lang or bool(page_lang and same_language(block.lang, page_lang)) for block in blocks
+        ]
+        detections, detected_page = detect_runs(
+            map_runs(blocks, "language", score_run), in_page_lang if any(in_page_lang) else None
         )
-
-        # Grab visible text for readability analysis
-        text_only = soup.get_text(separator=" ")
-        text_only = re.sub(r"\s+", " ", text_only)
-        sample_text = text_only[:15000]
-
-        # Detect primary language via langdetect for cross-check
-        detected_lang = detect(sample_text) if sample_text.strip() else "unknown"
-        if page_lang and detected_lang != page_lang:
-            language_of_page += f" (Warning: detected '{detected_lang}')"
+        mismatch = detected_page.lang and not (page_lang and same_language(detected_page.lang, page_lang))
+        if not page_lang:
+            if mismatch:
+                result.add("language_of_page", Outcome.FAIL, "page_lang_missing_detected", detected=detected_page.lang)
+            else:
+                result.add("language_of_page", Outcome.FAIL, "page_lang_missing")
+        elif mismatch:
+            result.add("language_of_page", Outcome.WARN, "page_lang_mismatch", lang=page_lang, detected=detected_page.lang)
+        else:
+            result.add("language_of_page", Outcome.PASS, "page_lang_set", lang=page_lang)
+
+        # Blocks whose detected language disagrees with their effective lang (own or inherited)
+        parts_with_lang = [tag for tag, lang in index.lang_elements if lang != page_lang]
+        checked = [
+            (block, found)
+            for block, found in zip(blocks, detections)
+            if block.lang and found.lang and found.letters >= MIN_LETTERS and found.confidence >= MIN_CONFIDENCE
+        ]
+        language_mismatches = [
+            _block_example(block, lang=block.lang, detected=found.lang)
+            for block, found in checked
+            if not same_language(found.lang, block.lang)
+        ]
+        if language_mismatches:
+            first = language_mismatches[0]
+            result.add(
+                "language_of_parts",
+                Outcome.FAIL,
+                "parts_lang_mismatch",
+                count=len(language_mismatches),
+                tag=first["tag"],
+                lang=first["lang"],
+                detected=first["detected"],
+            )
+        elif parts_with_lang:
+            result.add("language_of_parts", Outcome.PASS, "parts_lang_match", count=len(parts_with_lang), checked=len(checked))
+        elif checked:
+            result.add("language_of_parts", Outcome.PASS, "no_foreign_passages", checked=len(checked))
+        else:
+            result.add("language_of_parts", Outcome.WARN, "no_secondary_lang")
+
+        document, block_scores = score_counts(map_runs(blocks, "readability", count_blocks))
 
         # -------- 3.1.3 unusual / difficult words --------
-        difficult_pct = textstat.difficult_words(sample_text) / (len(sample_text.split()) or 1) * 100
-        unusual_words = (
-            f"✅ Difficult-word ratio {difficult_pct:.1f}% (acceptable)" if difficult_pct < 5 else f"⚠️ Difficult-word ratio high ({difficult_pct:.1f}%)"
-        )
+        difficult_pct = round(document["difficult_words"] / (document["words"] or 1) * 100, 1)
+        if difficult_pct < 5:
+            result.add("unusual_words", Outcome.PASS, "difficult_ratio_ok", pct=difficult_pct)
+        else:
+            result.add("unusual_words", Outcome.WARN, "difficult_ratio_high", pct=difficult_pct)
 
         # -------- 3.1.4 abbreviations --------
-        abbreviations_found = re.findall(r"\b[A-Z]{2,6}s?\b", sample_text)
-        unique_abbr = set(abbreviations_found)
-        abbreviations = (
-            f"✅ Few abbreviations detected ({len(unique_abbr)})" if len(unique_abbr) <= 10 else f"⚠️ Many abbreviations detected ({len(unique_abbr)})"
-        )
+        abbreviations_found = re.findall(r"\b[A-Z]{2,6}s?\b", snap.visible_text)
+        unique_abbr = len(set(abbreviations_found))
+        if unique_abbr <= 10:
+            result.add("abbreviations", Outcome.PASS, "few_abbreviations", count=unique_abbr)
+        else:
+            result.add("abbreviations", Outcome.WARN, "many_abbreviations", count=unique_abbr)
 
         # -------- 3.1.5 reading level --------
-        flesch = textstat.flesch_reading_ease(sample_text)
-        grade = textstat.text_standard(sample_text, float_output=False)
-        reading_level = f"✅ Readability ≈ {grade} (Flesch {flesch:.0f})" if flesch >= 60 else f"⚠️ Readability difficult – {grade} (Flesch {flesch:.0f})"
+        flesch = document["flesch_reading_ease"]
+        # Blocks long enough to score on their own
+        scored = [
+            (block, score)
+            for block, score in zip(blocks, block_scores)
+            if score["words"] >= READABILITY_BLOCK_MIN_WORDS
+        ]
+        hard_blocks = sorted((item for item in scored if item[1]["flesch_reading_ease"] < 60), key=lambda item: item[1]["flesch_reading_ease"])
+        level = {"grade": document["text_standard"], "flesch": flesch}
+        if hard_blocks:
+            level.update(hard=len(hard_blocks), scored=len(scored))
+        if flesch >= 60:
+            result.add("reading_level", Outcome.PASS, "readable_hard_blocks" if hard_blocks else "readable", **level)
+        else:
+            result.add("reading_level", Outcome.WARN, "hard_to_read_blocks" if hard_blocks else "hard_to_read", **level)
+        scores = {
+            "document": document,
+            "hardest_blocks": [
+                _block_example(
+                    block, flesch_reading_ease=score["flesch_reading_ease"], text_standard=score["text_standard"]
+                )
+                for block, score in hard_blocks[:5]
+            ],
+        }
 
         # -------- 3.1.6 pronunciation cues --------
-        has_ruby = bool(soup.find("ruby"))
-        has_ssml = "<phoneme" in html
-        pronunciation = (
-            "✅ Pronunciation cues present (ruby/phoneme)" if has_ruby or has_ssml else "⚠️ No pronunciation aids detected"
-        )
-
-        status = "TESTED"
+        if index.has_ruby or index.has_phoneme:
+            result.add("pronunciation", Outcome.PASS, "pronunciation_cues")
+        else:
+            result.add("pronunciation", Outcome.WARN, "no_pronunciation_aids")
 
     except Exception as exc:
-        language_of_page = language_of_parts = unusual_words = abbreviations = reading_level = pronunciation = f"❌ Error: {exc}"
-        status = "ERROR"
-
-    return {
-        "wcag_criteria": ["3.1.1", "3.1.2", "3.1.3", "3.1.4", "3.1.5", "3.1.6"],
-        "test_results": {
-            "language_of_page": language_of_page,
-            "language_of_parts": language_of_parts,
-            "unusual_words": unusual_words,
-            "abbreviations": abbreviations,
-            "reading_level": reading_level,
-            "pronunciation": pronunciation,
-        },
-        "recommendations": [
-            "Ensure <html lang> is set and matches detected language.",
-            "Add lang attributes for passages in other languages.",
-            "Explain jargon/idioms & provide glossary for abbreviations.",
-            "Target Flesch score ≥ 60 (about grade 8).",
-            "Provide pronunciation guides (e.g., ruby, phoneme).",
-        ],
-        "url": url,
-        "status": status,
-    }
+        result.error(exc)
+
+    result.recommend("set_page_lang", "mark_language_parts", "explain_jargon", "target_flesch_60", "pronunciation_guides")
+    result.details["readability"] = scores
+    result.details["language_mismatches"] = language_mismatches[:10]
+    return result.to_dict()
 
 
 # ===================== WCAG 3.2.x Predictable =====================
 
+@instrumented
+@cached_check(version=4)
+@_reports_truncation
 def test_predictability(url: str) -> Dict[str, Any]:
     url = _normalize_url(url)
-    import requests, re
-    from bs4 import BeautifulSoup  # type: ignore
+    import re
 
+    result = CheckResult(url, ["3.2.1", "3.2.2", "3.2.3", "3.2.4", "3.2.5", "3.2.6"])
     try:
-        html = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0 (WCAG-audit)"}).text
-        soup = BeautifulSoup(html, "lxml")
+        index = get_snapshot(url).index
 
         # Helper to search JS snippets indicating navigation
         nav_js_regex = re.compile(r"location\.href|window\.location|document\.location", re.I)
 
         # 3.2.1 On Focus
-        focus_elements = [el for el in soup.find_all(attrs={"onfocus": True})]
-        focus_nav = [el for el in focus_elements if nav_js_regex.search(el["onfocus"])]
-        on_focus = "✅ No focus-triggered navigation" if not focus_nav else f"❌ {len(focus_nav)} elements change context on focus"
+        focus_nav = [handler for handler in index.focus_handlers if nav_js_regex.search(handler)]
+        if focus_nav:
+            result.add("on_focus", Outcome.FAIL, "focus_navigation", count=len(focus_nav))
+        else:
+            result.add("on_focus", Outcome.PASS, "no_focus_navigation")
 
         # 3.2.2 On Input
-        input_handlers = soup.find_all(attrs={"oninput": True}) + soup.find_all(attrs={"onchange": True})
-        input_nav = [el for el in input_handlers if nav_js_regex.search(" ".join(el.get(attr) for attr in ("oninput", "onchange") if el.get(attr)))]
-        on_input = "✅ No input-triggered context change" if not input_nav else f"❌ {len(input_nav)} elements change context on input"
+        input_nav = [handler for handler in index.input_handlers if nav_js_regex.search(handler)]
+        if input_nav:
+            result.add("on_input", Outcome.FAIL, "input_navigation", count=len(input_nav))
+        else:
+            result.add("on_input", Outcome.PASS, "no_input_navigation")
 
         # 3.2.3 Consistent Navigation – presence of <nav>
-        nav_tags = soup.find_all("nav")
-        consistent_navigation = "✅ <nav> landmarks present" if nav_tags else "⚠️ No explicit <nav> landmarks detected"
+        if index.nav_landmarks:
+            result.add("consistent_navigation", Outcome.PASS, "nav_landmarks")
+        else:
+            result.add("consistent_navigation", Outcome.WARN, "no_nav_landmarks")
 
         # 3.2.4 Consistent Identification – identical components have same aria-label
-        buttons = soup.find_all("button")
-        labels = [btn.get_text(strip=True).lower() for btn in buttons]
-        dup_labels = len(labels) != len(set(labels))
-        consistent_identification = "✅ Component labelling appears consistent" if not dup_labels else "⚠️ Duplicate button labels might cause confusion"
+        labels = index.button_labels
+        if len(labels) != len(set(labels)):
+            result.add("consistent_identification", Outcome.WARN, "duplicate_button_labels")
+        else:
+            result.add("consistent_identification", Outcome.PASS, "consistent_labels")
 
         # 3.2.5 Change on Request – ensure submit / buttons handle
-        auto_submit_forms = [form for form in soup.find_all("form") if form.get("onsubmit") and nav_js_regex.search(form["onsubmit"])]
-        change_on_request = "✅ No unsolicited context changes detected" if not auto_submit_forms else f"❌ {len(auto_submit_forms)} forms submit automatically without user confirmation"
+        auto_submit_forms = [onsubmit for onsubmit in index.form_onsubmit if onsubmit and nav_js_regex.search(onsubmit)]
+        if auto_submit_forms:
+            result.add("change_on_request", Outcome.FAIL, "auto_submit_forms", count=len(auto_submit_forms))
+        else:
+            result.add("change_on_request", Outcome.PASS, "no_unsolicited_changes")
 
         # 3.2.6 Consistent Help – check for help links
-        help_links = soup.find_all("a", string=re.compile(r"help|faq|support", re.I))
-        consistent_help = "✅ Help links found" if help_links else "⚠️ No help links detected"
+        if index.help_links:
+            result.add("consistent_help", Outcome.PASS, "help_links")
+        else:
+            result.add("consistent_help", Outcome.WARN, "no_help_links")
 
-        status = "TESTED"
     except Exception as exc:
-        on_focus = on_input = consistent_navigation = consistent_identification = change_on_request = consistent_help = f"❌ Error: {exc}"
-        status = "ERROR"
-
-    return {
-        "wcag_criteria": ["3.2.1", "3.2.2", "3.2.3", "3.2.4", "3.2.5", "3.2.6"],
-        "test_results": {
-            "on_focus": on_focus,
-            "on_input": on_input,
-            "consistent_navigation": consistent_navigation,
-            "consistent_identification": consistent_identification,
-            "change_on_request": change_on_request,
-            "consistent_help": consistent_help,
-        },
-        "recommendations": [
-            "Avoid changing pages automatically on focus or input events.",
-            "Use <nav> landmarks and keep navigation order stable.",
-            "Label components consistently across the site.",
-            "Ensure context changes occur only after explicit user action (e.g., button click).",
-            "Provide a persistent Help / FAQ link on every page.",
-        ],
-        "url": url,
-        "status": status,
-    }
+        result.error(exc)
+
+    result.recommend(
+        "no_context_change_on_event", "stable_navigation", "consistent_labelling", "explicit_context_change", "persistent_help"
+    )
+    return result.to_dict()
 
 
 # ===================== WCAG 3.3.x Input Assistance =====================
 
+@instrumented
+@cached_check(version=4)
+@_reports_truncation
 def test_input_assistance(url: str) -> Dict[str, Any]:
     url = _normalize_url(url)
-    import requests, re
-    from bs4 import BeautifulSoup  # type: ignore
+    import re
 
+    result = CheckResult(url, ["3.3.1", "3.3.2", "3.3.3", "3.3.4", "3.3.5", "3.3.6", "3.3.7", "3.3.8", "3.3.9"])
     try:
-        html = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0 (WCAG-audit)"}).text
-        soup = BeautifulSoup(html, "lxml")
+        index = get_snapshot(url).index
 
-        inputs = soup.find_all(["input", "textarea", "select"])
-        labels = {label.get("for"): label.get_text(strip=True) for label in soup.find_all("label")}
+        inputs = index.form_controls
+        labels = index.labels
 
         # 3.3.1 Error Identification – look for aria-invalid or error messages
-        aria_invalid = [el for el in inputs if el.get("aria-invalid") == "true"]
-        error_identification = "⚠️ No inline validation attributes found" if not aria_invalid else "✅ aria-invalid markers present"
+        if any(el.aria_invalid == "true" for el in inputs):
+            result.add("error_identification", Outcome.PASS, "aria_invalid_present")
+        else:
+            result.add("error_identification", Outcome.WARN, "no_inline_validation")
 
         # 3.3.2 Labels / Instructions – every input should have label or aria-label
-        unlabeled = [el for el in inputs if not (el.get("id") in labels or el.get("aria-label") or el.get("aria-labelledby"))]
-        labels_instructions = "✅ All form controls have labels" if not unlabeled else f"❌ {len(unlabeled)} controls missing labels"
-
-        # 3.3.3 Error Suggestion – look for role=alert or <span class="error">
-        error_suggestion = "⚠️ Could not detect automatic error suggestion patterns" if "error" not in html.lower() else "✅ Potential error message elements found"
+        unlabeled = [el for el in inputs if not (el.in_label or el.id in labels or el.aria_label or el.aria_labelledby)]
+        if unlabeled:
+            result.add("labels_instructions", Outcome.FAIL, "missing_labels", count=len(unlabeled))
+        else:
+            result.add("labels_instructions", Outcome.PASS, "all_labelled")
+
+        # 3.3.3 Error Suggestion – "error" in the text or attributes of any element
+        if index.error_hints:
+            result.add("error_suggestion", Outcome.PASS, "error_messages_found")
+        else:
+            result.add("error_suggestion", Outcome.WARN, "no_error_suggestion")
 
         # 3.3.4 Error Prevention (Legal/Financial/Data) – forms with type=submit should have confirmation dialog? Heuristic: look for confirm() in onsubmit
-        risky_forms = [form for form in soup.find_all("form") if re.search(r"confirm\\(", form.get("onsubmit", ""))]
-        error_prevention_critical = "✅ Confirmation prompts present" if risky_forms else "⚠️ No confirmation prompts detected for critical forms"
+        if any(re.search(r"confirm\(", onsubmit) for onsubmit in index.form_onsubmit):
+            result.add("error_prevention_critical", Outcome.PASS, "confirmation_prompts")
+        else:
+            result.add("error_prevention_critical", Outcome.WARN, "no_confirmation_prompts")
 
         # 3.3.5 Help – presence of aria-describedby or help text
-        help_texts = soup.find_all(attrs={"aria-describedby": True})
-        help = "✅ Help descriptors present" if help_texts else "⚠️ No help descriptors detected"
+        if index.described_by_count:
+            result.add("help", Outcome.PASS, "help_descriptors")
+        else:
+            result.add("help", Outcome.WARN, "no_help_descriptors")
 
         # 3.3.6 Error Prevention (All) – detect autocomplete attributes
-        autocomplete_off = [inp for inp in inputs if inp.get("autocomplete") == "off"]
-        error_prevention_all = "⚠️ Some inputs disable autocomplete" if autocomplete_off else "✅ Autocomplete available on inputs"
+        if any(inp.autocomplete == "off" for inp in inputs):
+            result.add("error_prevention_all", Outcome.WARN, "autocomplete_disabled")
+        else:
+            result.add("error_prevention_all", Outcome.PASS, "autocomplete_available")
 
         # 3.3.7 Redundant Entry – heuristic: detect duplicate name attributes across forms
         name_counts = {}
         for inp in inputs:
-            name = inp.get("name")
+            name = inp.name
             if name:
                 name_counts[name] = name_counts.get(name, 0) + 1
         redundant = [n for n, cnt in name_counts.items() if cnt > 1]
-        redundant_entry = "⚠️ Possible redundant entry fields: " + ", ".join(redundant) if redundant else "✅ No obvious redundant fields"
+        if redundant:
+            result.add("redundant_entry", Outcome.WARN, "redundant_fields", fields=", ".join(redundant))
+        else:
+            result.add("redundant_entry", Outcome.PASS, "no_redundant_fields")
 
         # 3.3.8 / 3.3.9 Accessible Authentication – detect 2FA alternatives or passwordless? Heuristic: look for input type password
-        password_inputs = [inp for inp in inputs if inp.get("type") == "password"]
-        accessible_auth_minimum = "⚠️ Password fields present – ensure alternative authentication methods" if password_inputs else "✅ No password-only authentication detected"
-        accessible_auth_enhanced = "⚠️ Unable to verify enhanced authentication heuristics"  # Provide generic guidance
+        if index.password_inputs:
+            result.add("accessible_auth_minimum", Outcome.WARN, "password_fields")
+        else:
+            result.add("accessible_auth_minimum", Outcome.PASS, "no_password_auth")
+        result.add("accessible_auth_enhanced", Outcome.WARN, "enhanced_auth_unverified")  # Provide generic guidance
 
-        status = "TESTED"
     except Exception as exc:
-        error_identification = labels_instructions = error_suggestion = error_prevention_critical = help = error_prevention_all = redundant_entry = accessible_auth_minimum = accessible_auth_enhanced = f"❌ Error: {exc}"
-        status = "ERROR"
-
-    return {
-        "wcag_criteria": [
-            "3.3.1",
-            "3.3.2",
-            "3.3.3",
-            "3.3.4",
-            "3.3.5",
-            "3.3.6",
-            "3.3.7",
-            "3.3.8",
-            "3.3.9",
-        ],
-        "test_results": {
-            "error_identification": error_identification,
-            "labels_instructions": labels_instructions,
-            "error_suggestion": error_suggestion,
-            "error_prevention_critical": error_prevention_critical,
-            "help": help,
-            "error_prevention_all": error_prevention_all,
-            "redundant_entry": redundant_entry,
-            "accessible_auth_minimum": accessible_auth_minimum,
-            "accessible_auth_enhanced": accessible_auth_enhanced,
-        },
-        "recommendations": [
-            "Provide programmatically associated labels for every form control.",
-            "Use inline validation (aria-invalid) and descriptive error messages.",
-            "Confirm critical transactions before final submission.",
-            "Offer help text via aria-describedby or visible instructions.",
-            "Enable autocomplete and avoid redundant data entry.",
-            "Provide passkey / MFA / passwordless authentication options.",
-        ],
-        "url": url,
-        "status": status,
-    } 
\ No newline at end of file
+        result.error(exc)
+
+    result.recommend(
+        "associate_labels", "inline_validation", "confirm_transactions", "help_text", "autocomplete_no_redundancy", "passwordless_auth"
+    )
+    return result.to_dict()
@@ -2,6 +2,7 @@ from google.adk.agents import LlmAgent
 from .readable import readable_agent
 from .predictable import predictable_agent
 from .input_assistance import input_assistance_agent
+from .metrics import agent_callbacks
 
 understandable_coordinator = LlmAgent(
     model="gemini-1.5-flash",
@@ -19,4 +20,5 @@ If the request is generic (e.g., 'check understandable compliance') or no clear
         predictable_agent,
         input_assistance_agent,
     ],
+    **agent_callbacks(),
 ) 
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""The readability engine scores a page like textstat scores its joined text."""
+
+import pytest
+
+from wcag_agents.readability import score_blocks
+
+textstat = pytest.importorskip("textstat")
+
+NAV_HEAVY = [
+    "Home",
+    "About us",
+    "Products and services",
+    "Latest news from the team",
+    "Contact",
+    "Quarterly infrastructure modernisation initiatives necessitate comprehensive organisational coordination.",
+    "Read the full story",
+    "Departmental accountability frameworks institutionalise interdisciplinary collaboration; consequently, "
+    "administrative responsibilities proliferate considerably.",
+    "Privacy policy",
+    "Terms of use",
+    "» Next",
+]
+
+FORMULAS = (
+    "flesch_reading_ease",
+    "flesch_kincaid_grade",
+    "coleman_liau_index",
+    "automated_readability_index",
+    "gunning_fog",
+)
+
+
+def test_document_matches_textstat_on_multi_block_page():
+    document, blocks = score_blocks(NAV_HEAVY)
+    text = " ".join(NAV_HEAVY)
+    assert document["sentences"] == textstat.sentence_count(text)
+    for name in FORMULAS:
+        assert document[name] == pytest.approx(getattr(textstat, name)(text), abs=0.01), name
+    assert document["text_standard"] == textstat.text_standard(text, float_output=False)
+    # Each block on its own still scores like the block's text.
+    assert [row["sentences"] for row in blocks] == [textstat.sentence_count(t) for t in NAV_HEAVY]
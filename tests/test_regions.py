@@ -0,0 +1,39 @@
+"""Region hashes must change for every check that reads the changed markup."""
+
+import pytest
+
+from wcag_agents import templates
+from wcag_agents.ingest import PageIngest
+from wcag_agents.dom_index import DomIndexBuilder
+from wcag_agents.regions import CHECK_REGIONS, RegionHasher, regions_digest
+
+PAGE = """<html lang="en"><head><title>Shop</title>{head}</head><body>
+<form><nav><a href="/step/2">Next</a><p>{nav}</p></nav><input id="q"></form>
+<main><p>Text.</p></main>
+</body></html>"""
+
+
+def _hashes(enabled: bool, **parts: str) -> dict:
+    templates.clear_fragments()
+    ingest = PageIngest()
+    ingest._events = templates.TemplateSplitter(DomIndexBuilder(), RegionHasher(), enabled=enabled)
+    ingest.feed(PAGE.format(**{"head": "", "nav": "Step 1", **parts}).encode("utf-8"))
+    return ingest.close()[2]
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_nested_region_reaches_every_enclosing_region(enabled):
+    before = _hashes(enabled)
+    after = _hashes(enabled, nav="An error occurred")
+    changed = {name for name in before if before[name] != after[name]}
+    assert {"nav", "forms"} <= changed
+    assert "main" not in changed
+    digest = lambda hashes, check: regions_digest(hashes, CHECK_REGIONS[check])  # noqa: E731
+    assert digest(before, "test_input_assistance") != digest(after, "test_input_assistance")
+
+
+def test_head_script_reaches_head_and_scripts():
+    before = _hashes(False)
+    after = _hashes(False, head="<script>setTimeout(go, 5)</script>")
+    changed = {name for name in before if before[name] != after[name]}
+    assert changed == {"head", "scripts"}
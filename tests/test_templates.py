@@ -0,0 +1,55 @@
+"""Template splitting must not change what a page's index records."""
+
+import pytest
+
+from wcag_agents import templates
+from wcag_agents.dom_index import DomIndex, DomIndexBuilder
+from wcag_agents.ingest import PageIngest
+from wcag_agents.regions import RegionHasher
+
+NESTED = """<html lang="en"><body>
+<header><nav><a href="/help">Help</a></nav></header>
+<form>
+  <div role="banner" class="error-banner" lang="fr"><p>Une error est survenue</p><button>OK</button></div>
+  <label for="q">Search</label><input id="q" aria-describedby="tip"><p id="tip">Type an error code</p>
+</form>
+<nav><footer><a href="/faq">FAQ</a><p>Contact support</p></footer></nav>
+<div id="cookie-consent"><p>We use cookies.</p><button>Accept</button></div>
+<main><p>Main text.</p></main>
+</body></html>"""
+
+WRAPPED = """<html lang="en"><body><div class="cookie-consent-shown">
+<header><p>Site</p></header><main><h1>Title</h1><p>Body text.</p></main>
+</div></body></html>"""
+
+
+def _parse(html: str, enabled: bool) -> DomIndex:
+    ingest = PageIngest()
+    ingest._events = templates.TemplateSplitter(DomIndexBuilder(), RegionHasher(), enabled=enabled)
+    ingest.feed(html.encode("utf-8"))
+    return ingest.close()[1]
+
+
+def _features(index: DomIndex) -> dict:
+    features = {name: getattr(index, name) for name in DomIndex.__slots__ if name not in ("templates", "text_blocks")}
+    features["text_blocks"] = [(block.tag, block.lang, block.text) for block in index.text_blocks]
+    return features
+
+
+@pytest.mark.parametrize("html", [NESTED, WRAPPED])
+def test_split_index_matches_full_parse(html):
+    templates.clear_fragments()
+    full = _features(_parse(html, enabled=False))
+    assert _features(_parse(html, enabled=True)) == full
+    # Second page: every template now comes from the fragment cache.
+    assert _features(_parse(html, enabled=True)) == full
+
+
+def test_page_level_elements_are_never_templates():
+    templates.clear_fragments()
+    index = _parse(WRAPPED, enabled=True)
+    assert "cookie" not in index.templates.values()
+    assert templates.template_kind("body", {"class": "cookie-consent-shown"}) == ""
+    assert templates.template_kind("main", {"id": "consent"}) == ""
+    assert templates.template_kind("p", {"class": "cookie"}) == ""
+    assert templates.template_kind("div", {"id": "cookie-banner"}) == "cookie"